@@ -1,11 +1,29 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import os
 import sys
-import pyautogui
 import threading
 import time
 import math
+import json
+import io
+import zlib
+import re
+import bisect
+import secrets
 import platform
+import gc
+import http.client
+import urllib.parse
+
+# Frozen builds re-launch this executable to benchmark one async backend
+# (see asyncbench.py) and to run the injector process (see injector.py); do
+# that before anything else gets set up
+if os.environ.get('TRACKPAD_ASYNC_BENCH_CHILD'):
+    import asyncbench
+    sys.exit(asyncbench.child_main(os.environ['TRACKPAD_ASYNC_BENCH_CHILD']))
+if os.environ.get('TRACKPAD_INJECTOR_CHILD'):
+    import injector
+    sys.exit(injector.child_main())
 
 # On Windows we can query the virtual screen bounds so the cursor can move across
 # multiple monitors. Fall back to primary monitor size on other platforms.
@@ -14,6 +32,52 @@ virtual_top = 0
 screen_width = 0
 screen_height = 0
 
+# Input injection backend. TRACKPAD_BACKEND=null swaps pyautogui for a no-op
+# stand-in that only tracks a virtual cursor and counts calls, so the server can
+# run (e.g. under scripts/loadgen.py) on a display-less box where importing
+# pyautogui would fail.
+INPUT_BACKEND = os.environ.get('TRACKPAD_BACKEND', 'pyautogui').lower()
+if INPUT_BACKEND == 'null':
+    class NullInputBackend:
+        FAILSAFE = False
+        PAUSE = 0.0
+
+        def __init__(self, width=1920, height=1080):
+            self._size = (width, height)
+            self._x = width // 2
+            self._y = height // 2
+            self.calls = {}
+
+        def _count(self, name):
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+        def size(self):
+            return self._size
+
+        def position(self):
+            return (self._x, self._y)
+
+        def moveTo(self, x, y, *args, **kwargs):
+            self._count('moveTo')
+            self._x = int(x)
+            self._y = int(y)
+
+        def drag(self, dx, dy, *args, **kwargs):
+            self._count('drag')
+            self._x += int(dx)
+            self._y += int(dy)
+
+        def __getattr__(self, name):
+            # click, scroll, keyDown, press, typewrite, ... are counted no-ops
+            if name.startswith('_'):
+                raise AttributeError(name)
+            def call(*args, **kwargs):
+                self._count(name)
+            return call
+    pyautogui = NullInputBackend()
+else:
+    import pyautogui
+
 # WebSocket support
 from flask_socketio import SocketIO
 
@@ -24,6 +88,9 @@ base_dir = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
 app = Flask(__name__, static_folder=os.path.join(base_dir, 'static'), template_folder=os.path.join(base_dir, 'templates'))
 import traceback
 import logging
+import logging.handlers
+import queue
+import atexit
 try:
     # Monkey-patch Werkzeug serving logger to suppress access log lines with date/time
     from werkzeug import serving as _wz_serving
@@ -37,17 +104,238 @@ try:
 except Exception:
     pass
 
+# Structured, non-blocking logging. Records go onto a bounded queue that a
+# background QueueListener drains, so callers never wait on console or file
+# I/O; when the queue is full records are dropped instead. Hot-path errors go
+# through log_error(), which rate-limits per call site: the first error is
+# logged (with traceback the first time a site fails), repeats within
+# LOG_RATE_WINDOW_S are only counted and later summarised as
+# "suppressed N similar errors". Extra keyword fields (session, event, ...)
+# are appended to the line as key=value pairs.
+# Windowed builds (PyInstaller console=False) have no stderr, so they log to
+# ~/digital-trackpad.log unless TRACKPAD_LOG_FILE points elsewhere.
+LOG_RATE_WINDOW_S = 5.0
+LOG_QUEUE_SIZE = 1000
+LOG_FILE = os.environ.get('TRACKPAD_LOG_FILE') or (os.path.join(os.path.expanduser('~'), 'digital-trackpad.log') if sys.stderr is None else None)
+
+log = logging.getLogger('trackpad')
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def _setup_logging():
+    handlers = []
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+    if sys.stderr is not None:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    if LOG_FILE:
+        try:
+            handlers.append(logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=1_000_000, backupCount=3, encoding='utf-8'))
+        except Exception:
+            pass
+    for h in handlers:
+        h.setFormatter(formatter)
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    log.addHandler(_DroppingQueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+try:
+    _log_listener = _setup_logging()
+except Exception:
+    _log_listener = None
+
+# site -> [window start (monotonic), suppressed count]
+_log_sites = {}
+_log_sites_lock = threading.Lock()
+
+
+def log_error(site, exc, **fields):
+    """Log a hot-path exception from `site` without blocking, rate-limited per site."""
+    now = time.monotonic()
+    with _log_sites_lock:
+        entry = _log_sites.get(site)
+        if entry is not None and now - entry[0] < LOG_RATE_WINDOW_S:
+            entry[1] += 1
+            return
+        first = entry is None
+        suppressed = 0 if first else entry[1]
+        _log_sites[site] = [now, 0]
+    if suppressed:
+        fields['suppressed'] = suppressed
+    # Fields go into the message itself: QueueHandler flattens records (and any
+    # traceback) into one string before they cross the queue.
+    log.error('%s error: %r%s', site, exc, ''.join(f' {k}={v}' for k, v in fields.items()), exc_info=exc if first else None)
+
+
+def flush_suppressed_logs():
+    """Report errors suppressed in windows that have since expired."""
+    now = time.monotonic()
+    pending = []
+    with _log_sites_lock:
+        for site, entry in _log_sites.items():
+            if entry[1] and now - entry[0] >= LOG_RATE_WINDOW_S:
+                pending.append((site, entry[1]))
+                entry[1] = 0
+    for site, count in pending:
+        log.warning('%s: suppressed %d similar errors in the last %gs', site, count, LOG_RATE_WINDOW_S)
+
+# Message decoding. When orjson is installed it decodes request bodies (Flask's
+# JSON provider) and Socket.IO packets (the json= option) instead of the
+# standard library; without it everything still works, just slower. Payloads
+# are then checked against the schemas below in one pass: each schema is a
+# tuple of (field, kind, required), where kind is a key of MESSAGE_FIELD_KINDS
+# or a tuple of allowed strings. A field that is missing or null is fine
+# unless required. A message that doesn't match is rejected before any
+# handler state is touched. Unknown extra fields are ignored.
+# The range checks also keep NaN/inf (accepted by the stdlib decoder) out of
+# cursor math: coordinates and deltas stay within MESSAGE_MAX_NUMBER, client
+# timestamps (Date.now() milliseconds) within MESSAGE_MAX_TIME.
+MESSAGE_MAX_NUMBER = 1e7
+MESSAGE_MAX_TIME = 1e14
+MESSAGE_MAX_STRING = 64
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSON:
+    """json-module stand-in backed by orjson, for Flask-SocketIO's json= option."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # Integers beyond 64 bits and other oddities orjson refuses
+            return json.dumps(obj, *args, **kwargs)
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class FastJSONProvider(DefaultJSONProvider):
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = FastJSONProvider(app)
+
+
+def _is_number(v):
+    # Chained comparison is False for NaN and rejects inf and absurd values
+    return (type(v) is float or type(v) is int) and -MESSAGE_MAX_NUMBER < v < MESSAGE_MAX_NUMBER
+
+
+MESSAGE_FIELD_KINDS = {
+    'number': _is_number,
+    'time': lambda v: (type(v) is float or type(v) is int) and 0 <= v < MESSAGE_MAX_TIME,
+    'int': lambda v: type(v) is int,
+    'bool': lambda v: type(v) is bool,
+    'str': lambda v: type(v) is str and len(v) <= MESSAGE_MAX_STRING,
+    'id': lambda v: type(v) is int or (type(v) is str and len(v) <= MESSAGE_MAX_STRING),
+}
+
+
+def _compile_schema(fields):
+    compiled = []
+    for name, kind, required in fields:
+        if isinstance(kind, tuple):
+            check = (lambda allowed: lambda v: type(v) is str and v in allowed)(frozenset(kind))
+        else:
+            check = MESSAGE_FIELD_KINDS[kind]
+        compiled.append((name, check, required))
+    return tuple(compiled)
+
+
+RAW_EVENT_SCHEMA = _compile_schema((
+    ('type', ('down', 'move', 'up'), True), ('id', 'id', True), ('x', 'number', True), ('y', 'number', True),
+    ('seq', 'int', False), ('time', 'time', False), ('pointerType', 'str', False), ('handoff', 'bool', False),
+))
+SCROLL_SCHEMA = _compile_schema((('scrollX', 'number', False), ('scrollY', 'number', False)))
+CLICK_SCHEMA = _compile_schema((('button', ('left', 'right', 'middle'), False),))
+KEY_SCHEMA = _compile_schema((('type', ('char', 'key'), True), ('value', 'str', False), ('key', 'str', False)))
+DRAG_SCHEMA = _compile_schema((
+    ('startX', 'number', False), ('startY', 'number', False), ('endX', 'number', False), ('endY', 'number', False),
+    ('duration', 'number', False), ('cancel', 'bool', False),
+))
+
+# Messages rejected by a schema, per kind (raw events are also counted per connection)
+rejected_messages = {}
+
+
+def valid_message(schema, data):
+    """True when `data` is a dict that matches `schema`."""
+    if type(data) is not dict:
+        return False
+    for name, check, required in schema:
+        v = data.get(name)
+        if v is None:
+            if required:
+                return False
+        elif not check(v):
+            return False
+    return True
+
+
+def reject_message(kind, count=1):
+    rejected_messages[kind] = rejected_messages.get(kind, 0) + count
+
+
 # Try to initialize SocketIO with a list of candidate async modes. If none
 # succeed (common when the bundled environment is missing or incompatible
 # async libraries), fall back to a lightweight stub that preserves the
 # decorator API but runs a plain Flask HTTP server. This keeps the app
 # functional (HTTP endpoints work) even when real WebSocket support isn't
 # available inside a packaged exe.
+# Engine.IO heartbeat. The library defaults (25s + 20s) let a dropped Wi-Fi
+# link go unnoticed for most of a minute; short pings let both ends notice
+# within a few seconds so the client reconnects and resumes its session.
+SOCKET_PING_INTERVAL_S = 5
+SOCKET_PING_TIMEOUT_S = 5
+
+# TRACKPAD_ASYNC_BENCH=1 orders the candidates by a short loopback benchmark
+# (see asyncbench.py) instead of trying them in this fixed order. The result is
+# cached per environment in TRACKPAD_ASYNC_BENCH_CACHE; =rerun measures again.
+ASYNC_BENCH = os.environ.get('TRACKPAD_ASYNC_BENCH', '').lower()
+ASYNC_BENCH_CACHE = os.environ.get('TRACKPAD_ASYNC_BENCH_CACHE') or os.path.join(os.path.expanduser('~'), '.digital-trackpad-async.json')
+# Report of the last benchmark (None when it wasn't requested)
+async_bench = None
+
 socketio = None
 async_candidates = ['eventlet', 'gevent', 'threading', 'asyncio']
+if ASYNC_BENCH in ('1', 'true', 'yes', 'rerun'):
+    try:
+        import asyncbench
+        async_bench = asyncbench.choose_async_mode(async_candidates, ASYNC_BENCH_CACHE, rerun=ASYNC_BENCH == 'rerun')
+        fastest = async_bench['mode']
+        if fastest is not None:
+            async_candidates = [fastest] + [m for m in async_candidates if m != fastest]
+        print(f"Async backend benchmark{' (cached)' if async_bench['cached'] else ''}: " + ', '.join(
+            f"{r['mode']}={r['score']}us" if 'score' in r else f"{r['mode']}=unavailable" for r in async_bench['results']))
+    except Exception as e:
+        print(f'Async backend benchmark failed: {e}')
 for mode in async_candidates:
     try:
-        socketio = SocketIO(app, cors_allowed_origins='*', async_mode=mode, logger=False, engineio_logger=False)
+        socketio = SocketIO(app, cors_allowed_origins='*', async_mode=mode, logger=False, engineio_logger=False,
+                            ping_interval=SOCKET_PING_INTERVAL_S, ping_timeout=SOCKET_PING_TIMEOUT_S, json=FastJSON if orjson is not None else json)
         print(f"SocketIO initialized with async_mode={mode}")
         break
     except Exception as e:
@@ -69,10 +357,25 @@ if socketio is None:
             app.run(host=host, port=port, debug=debug)
     socketio = StubSocketIO()
 
+# Listening port; override with TRACKPAD_PORT to run several instances on one host
+PORT = int(os.environ.get('TRACKPAD_PORT', 51273))
+
 # Configure pyautogui
-pyautogui.FAILSAFE = True  # Move mouse to corner to stop
+pyautogui.FAILSAFE = False  # Corners are handled by pointer arbitration (see pointer_base)
 pyautogui.PAUSE = 0.0001   # Small pause between commands
 
+# Where injection runs. TRACKPAD_INJECTOR=process moves every pyautogui call
+# into a separate injector process fed through a shared-memory command ring
+# (see injector.py), so OS input calls and socket handling stop competing for
+# one GIL. The injector is started on first use and supervised: if it dies it
+# is restarted, the new one releases any buttons/modifiers left held, and the
+# server clears its own hold flags. The injector runs injector.py on its own,
+# so none of this module's start-up is repeated in it.
+INJECTOR_MODE = os.environ.get('TRACKPAD_INJECTOR', 'inline').lower()
+if INJECTOR_MODE == 'process' and INPUT_BACKEND != 'null':
+    import injector
+    pyautogui = injector.InjectorClient(pyautogui, on_restart=lambda: force_release_all_holds())
+
 # Server-side multiplier for incoming fractional scroll values. Increase if scroll feels weak.
 SCROLL_MULTIPLIER = 2
 # Server-side multiplier for incoming move deltas. Increase to amplify movement,
@@ -119,11 +422,201 @@ DOUBLE_TAP_HOLD_TIMEOUT_MS = 3000
 # Double-tap timing: max interval between taps and hold trigger duration
 DOUBLE_TAP_MAX_INTERVAL_MS = 200
 DOUBLE_TAP_HOLD_TRIGGER_MS = 200
+# Accumulated three-finger travel that fires a swipe action
+SWIPE_TRIGGER_DISTANCE = 12
+# Moves ignored after a two-finger tap so the context menu stays open
+RIGHT_CLICK_SUPPRESS_MS = 300
 
-# Get screen size for scaling. Prefer virtual screen on Windows so multiple
-# monitors are supported.
-def detect_screen_bounds():
-    global virtual_left, virtual_top, screen_width, screen_height
+# Monitor layout. The cursor is clamped to the union of the real monitor
+# rectangles rather than to one bounding box, so it can't be lost in the dead
+# zones between differently sized monitors, and Linux multi-head setups aren't
+# limited to one screen. Rectangles come from EnumDisplayMonitors on Windows,
+# XRandR on Linux and Quartz on macOS. TRACKPAD_MONITORS replaces them with a
+# fake layout in xrandr geometry notation ("1920x1080+0+0,1280x1024+1920+0"),
+# or names a file holding one, for headless testing; editing that file
+# simulates a hot-plug. The layout is re-read as soon as the OS reports a
+# display change (RandR ScreenChangeNotify through python-xlib on Linux,
+# WM_DISPLAYCHANGE on Windows), and also every MONITOR_REFRESH_S as a
+# fallback, so plugging a monitor in needs no restart.
+MONITOR_REFRESH_S = 2.0
+# Without RandR 1.5 in python-xlib the layout comes from running the xrandr
+# tool. While its answer stays the same the tool runs half as often each time,
+# up to once per MONITOR_XRANDR_MAX_S. A change, or a display-change event,
+# resets it to MONITOR_REFRESH_S.
+MONITOR_XRANDR_MAX_S = 4.0
+MONITOR_XRANDR_TIMEOUT_S = 2.0
+xrandr_poll = {'rects': None, 'interval': MONITOR_REFRESH_S, 'next': 0.0}
+
+
+class MonitorLayout:
+    """Monitor rectangles indexed for O(log n) clamping of points on a monitor.
+
+    The desktop is cut into vertical strips at every monitor's left and right
+    edge. Each strip keeps the merged, sorted y-intervals of the monitors that
+    cover it. A point is found by bisecting the strips on x and then the
+    intervals on y; a point that is on no monitor is moved to the nearest
+    covered edge of any strip.
+    """
+
+    def __init__(self, rects):
+        rects = sorted((int(l), int(t), int(w), int(h)) for l, t, w, h in rects if w > 0 and h > 0)
+        if not rects:
+            raise ValueError('no monitors')
+        self.monitors = rects
+        left = min(r[0] for r in rects)
+        top = min(r[1] for r in rects)
+        right = max(r[0] + r[2] for r in rects)
+        bottom = max(r[1] + r[3] for r in rects)
+        self.bounds = (left, top, right - left, bottom - top)
+        edges = sorted({r[0] for r in rects} | {r[0] + r[2] for r in rects})
+        self._starts = edges[:-1]
+        self._ends = edges[1:]
+        self._strips = []
+        for x0, x1 in zip(self._starts, self._ends):
+            merged = []
+            for t, b in sorted((r[1], r[1] + r[3]) for r in rects if r[0] < x1 and r[0] + r[2] > x0):
+                if merged and t <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], b)
+                else:
+                    merged.append([t, b])
+            self._strips.append((tuple(m[0] for m in merged), tuple(m[1] for m in merged)))
+
+    def __eq__(self, other):
+        return isinstance(other, MonitorLayout) and self.monitors == other.monitors
+
+    @staticmethod
+    def _snap_y(strip, y):
+        tops, bottoms = strip
+        k = bisect.bisect_right(tops, y) - 1
+        if k >= 0 and y < bottoms[k]:
+            return y
+        # In a dead zone: snap to the closer of the intervals above and below
+        above = bottoms[k] - 1 if k >= 0 else None
+        below = tops[k + 1] if k + 1 < len(tops) else None
+        if below is None or (above is not None and y - above <= below - y):
+            return above
+        return below
+
+    def contains(self, x, y):
+        """True when the pixel (x, y) is on a monitor."""
+        i = bisect.bisect_right(self._starts, x) - 1
+        if i < 0 or x >= self._ends[i]:
+            return False
+        tops, bottoms = self._strips[i]
+        k = bisect.bisect_right(tops, y) - 1
+        return k >= 0 and y < bottoms[k]
+
+    def is_corner(self, x, y):
+        """True when (x, y) is on a monitor and blocked both horizontally and vertically."""
+        return (self.contains(x, y) and not (self.contains(x - 1, y) and self.contains(x + 1, y))
+                and not (self.contains(x, y - 1) and self.contains(x, y + 1)))
+
+    def clamp(self, x, y):
+        """Return the on-screen point nearest to (x, y) (exact when x, y is on a monitor)."""
+        x = int(x)
+        y = int(y)
+        if self.contains(x, y):
+            return x, y
+        starts = self._starts
+        # Off every monitor (only at the edges of the desktop): the nearest
+        # covered point of each strip is a candidate, pick the closest
+        best = None
+        for j, strip in enumerate(self._strips):
+            if not strip[0]:
+                continue
+            cx = min(max(x, starts[j]), self._ends[j] - 1)
+            cy = self._snap_y(strip, y)
+            d = (cx - x) ** 2 + (cy - y) ** 2
+            if best is None or d < best[0]:
+                best = (d, cx, cy)
+        return best[1], best[2]
+
+
+def _parse_monitor_spec(spec):
+    rects = []
+    for m in re.finditer(r'(\d+)x(\d+)\+(-?\d+)\+(-?\d+)', spec):
+        w, h, x, y = (int(v) for v in m.groups())
+        rects.append((x, y, w, h))
+    return rects
+
+
+def _monitors_fake():
+    spec = os.environ.get('TRACKPAD_MONITORS', '')
+    if os.path.isfile(spec):
+        with open(spec, encoding='utf-8') as fh:
+            spec = fh.read()
+    return _parse_monitor_spec(spec)
+
+
+def _monitors_windows():
+    import ctypes
+    from ctypes import wintypes
+    rects = []
+    proc_type = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC, ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+
+    def on_monitor(hmonitor, hdc, rect, data):
+        r = rect.contents
+        rects.append((r.left, r.top, r.right - r.left, r.bottom - r.top))
+        return 1
+    ctypes.windll.user32.EnumDisplayMonitors(None, None, proc_type(on_monitor), 0)
+    return rects
+
+
+def _monitors_xrandr():
+    try:
+        from Xlib import display
+        d = display.Display()
+        try:
+            monitors = d.screen().root.xrandr_get_monitors().monitors
+            return [(m.x, m.y, m.width_in_pixels, m.height_in_pixels) for m in monitors]
+        finally:
+            d.close()
+    except Exception:
+        # python-xlib missing or without RandR 1.5: ask the xrandr tool instead
+        return _monitors_xrandr_tool()
+
+
+def _monitors_xrandr_tool():
+    import subprocess
+    now = time.time()
+    last = xrandr_poll['rects']
+    if last is not None and now < xrandr_poll['next']:
+        return last
+    try:
+        out = subprocess.run(['xrandr', '--listmonitors'], capture_output=True, text=True, timeout=MONITOR_XRANDR_TIMEOUT_S).stdout
+    except subprocess.TimeoutExpired as e:
+        # A hung X server: keep the layout we had and try again later
+        log_error('monitors_xrandr', e)
+        xrandr_poll['next'] = now + xrandr_poll['interval']
+        return last or []
+    except OSError:
+        # No X tools at all (headless box): use the pyautogui fallback
+        return []
+    rects = [(int(x), int(y), int(w), int(h)) for w, h, x, y in re.findall(r'(\d+)/\d+x(\d+)/\d+\+(-?\d+)\+(-?\d+)', out)]
+    if rects == last:
+        xrandr_poll['interval'] = min(xrandr_poll['interval'] * 2, MONITOR_XRANDR_MAX_S)
+    else:
+        xrandr_poll['interval'] = MONITOR_REFRESH_S
+    xrandr_poll['rects'] = rects
+    xrandr_poll['next'] = now + xrandr_poll['interval']
+    return rects
+
+
+def _monitors_quartz():
+    import Quartz
+    err, ids, count = Quartz.CGGetActiveDisplayList(32, None, None)
+    rects = []
+    for display_id in ids[:count]:
+        b = Quartz.CGDisplayBounds(display_id)
+        rects.append((int(b.origin.x), int(b.origin.y), int(b.size.width), int(b.size.height)))
+    return rects
+
+
+MONITOR_PROVIDERS = {'Windows': _monitors_windows, 'Linux': _monitors_xrandr, 'Darwin': _monitors_quartz}
+
+
+def _virtual_screen_rect():
+    """Single bounding rectangle: the virtual screen on Windows, the primary monitor elsewhere."""
     try:
         if platform.system() == 'Windows':
             # Use Win32 GetSystemMetrics for virtual screen bounds
@@ -133,28 +626,138 @@ def detect_screen_bounds():
             SM_YVIRTUALSCREEN = 77
             SM_CXVIRTUALSCREEN = 78
             SM_CYVIRTUALSCREEN = 79
-            virtual_left = int(user32.GetSystemMetrics(SM_XVIRTUALSCREEN))
-            virtual_top = int(user32.GetSystemMetrics(SM_YVIRTUALSCREEN))
-            screen_width = int(user32.GetSystemMetrics(SM_CXVIRTUALSCREEN))
-            screen_height = int(user32.GetSystemMetrics(SM_CYVIRTUALSCREEN))
-        else:
-            # Non-Windows: fall back to pyautogui primary screen size and origin 0,0
-            virtual_left = 0
-            virtual_top = 0
-            w, h = pyautogui.size()
-            screen_width = int(w)
-            screen_height = int(h)
+            return (int(user32.GetSystemMetrics(SM_XVIRTUALSCREEN)), int(user32.GetSystemMetrics(SM_YVIRTUALSCREEN)),
+                    int(user32.GetSystemMetrics(SM_CXVIRTUALSCREEN)), int(user32.GetSystemMetrics(SM_CYVIRTUALSCREEN)))
     except Exception:
-        # Last-resort fallback
-        virtual_left = 0
-        virtual_top = 0
-        w, h = pyautogui.size()
-        screen_width = int(w)
-        screen_height = int(h)
+        pass
+    # Non-Windows (or last-resort) fallback: pyautogui primary screen size and origin 0,0
+    w, h = pyautogui.size()
+    return (0, 0, int(w), int(h))
+
+
+def detect_monitors():
+    if os.environ.get('TRACKPAD_MONITORS'):
+        provider = _monitors_fake
+    else:
+        provider = MONITOR_PROVIDERS.get(platform.system())
+    try:
+        rects = provider() if provider is not None else []
+        if rects:
+            return MonitorLayout(rects)
+    except Exception as e:
+        log_error('detect_monitors', e)
+    return MonitorLayout([_virtual_screen_rect()])
+
+
+monitor_layout = None
+# The watchdog and the display-change watcher both rebuild the layout
+monitor_lock = threading.Lock()
+
+
+def detect_screen_bounds():
+    """(Re)build the monitor layout; virtual_* hold its bounding box. Returns True if it changed."""
+    global monitor_layout, virtual_left, virtual_top, screen_width, screen_height
+    with monitor_lock:
+        layout = detect_monitors()
+        if layout == monitor_layout:
+            return False
+        monitor_layout = layout
+        virtual_left, virtual_top, screen_width, screen_height = layout.bounds
+        return True
+
+
+def _on_display_change():
+    xrandr_poll['interval'] = MONITOR_REFRESH_S
+    xrandr_poll['next'] = 0.0
+    if detect_screen_bounds():
+        log.info('Monitor layout changed: %s', monitor_layout.monitors)
+
+
+def _watch_display_changes_xlib():
+    from Xlib import display
+    from Xlib.ext import randr
+    d = display.Display()
+    if not d.has_extension('RANDR'):
+        d.close()
+        return False
+    d.screen().root.xrandr_select_input(randr.RRScreenChangeNotifyMask | randr.RROutputChangeNotifyMask)
+    d.flush()
+
+    def loop():
+        try:
+            while True:
+                d.next_event()
+                # A hot-plug arrives as a burst of events; re-read once per burst
+                while d.pending_events():
+                    d.next_event()
+                _on_display_change()
+        except Exception as e:
+            # X server gone: the MONITOR_REFRESH_S poll still runs
+            log_error('display_changes', e)
+    threading.Thread(target=loop, name='display-changes', daemon=True).start()
+    return True
+
+
+def _watch_display_changes_windows():
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    WM_DISPLAYCHANGE = 0x007E
+    LRESULT = ctypes.c_ssize_t
+    WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+    user32.DefWindowProcW.restype = LRESULT
+    user32.DefWindowProcW.argtypes = (wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+    class WNDCLASSW(ctypes.Structure):
+        _fields_ = [('style', wintypes.UINT), ('lpfnWndProc', WNDPROC), ('cbClsExtra', ctypes.c_int), ('cbWndExtra', ctypes.c_int),
+                    ('hInstance', wintypes.HINSTANCE), ('hIcon', wintypes.HICON), ('hCursor', wintypes.HANDLE), ('hbrBackground', wintypes.HBRUSH),
+                    ('lpszMenuName', wintypes.LPCWSTR), ('lpszClassName', wintypes.LPCWSTR)]
+
+    def wndproc(hwnd, msg, wparam, lparam):
+        if msg == WM_DISPLAYCHANGE:
+            try:
+                _on_display_change()
+            except Exception as e:
+                log_error('display_changes', e)
+        return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+    def loop():
+        # WM_DISPLAYCHANGE is only broadcast to top-level windows, so this is
+        # a hidden top-level window rather than a message-only one. It must be
+        # created on the thread that pumps its messages.
+        proc = WNDPROC(wndproc)
+        cls = WNDCLASSW(lpfnWndProc=proc, hInstance=ctypes.windll.kernel32.GetModuleHandleW(None), lpszClassName='DigitalTrackpadDisplayWatch')
+        if not user32.RegisterClassW(ctypes.byref(cls)):
+            return
+        if not user32.CreateWindowExW(0, cls.lpszClassName, cls.lpszClassName, 0, 0, 0, 0, 0, None, None, cls.hInstance, None):
+            return
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+    threading.Thread(target=loop, name='display-changes', daemon=True).start()
+    return True
+
+
+# macOS only reports reconfiguration to a CFRunLoop; it keeps to the poll
+DISPLAY_WATCHERS = {'Linux': _watch_display_changes_xlib, 'Windows': _watch_display_changes_windows}
+
+
+def watch_display_changes():
+    """Start refreshing the layout on OS display-change events. Returns True if a watcher runs."""
+    watcher = DISPLAY_WATCHERS.get(platform.system())
+    if watcher is None or os.environ.get('TRACKPAD_MONITORS'):
+        return False
+    try:
+        return watcher()
+    except Exception:
+        # No python-xlib, no X display or no RandR: polling only
+        return False
 
 
 # Initialize screen bounds
 detect_screen_bounds()
+display_watch = watch_display_changes()
 
 # Accumulators to buffer fractional scrolls so very small client deltas still result in scrolling
 scroll_accum_x = 0.0
@@ -177,62 +780,166 @@ def _try_hscroll(amount):
                 pyautogui.scroll(-int(abs(amount)))
                 pyautogui.keyUp('shift')
         except Exception as e:
-            print('_try_hscroll error', e)
+            log_error('_try_hscroll', e)
 
 
-def _press_key_combo(mods, key):
-    """Press modifier keys + a key. Try pyautogui first, then a Windows ctypes fallback.
+# Actions: named key sequences that gestures and shortcut endpoints trigger.
+# Each action is a list of steps; a step is a combo like 'winleft+tab' (every
+# key but the last is held while the last one is tapped) or a single key name.
+# Actions are compiled once at startup into flat (key, is_down) event tuples
+# and, on Windows with inline injection, into a prebuilt SendInput array, so
+# running one is a single injection call with no per-call platform checks,
+# imports or key-map lookups. Extra or replacement actions can be bound without
+# code changes through TRACKPAD_MACROS, either a JSON object or a path to a JSON
+# file, e.g. {"copy": ["ctrl+c"], "swipe_up": ["ctrl+winleft+right"]}. Any action
+# can be run by name through POST /action or the 'action' socket event.
+ACTIONS = {
+    'swipe_up': ['winleft+tab'],        # three-finger swipe up
+    'swipe_down': ['esc'],              # three-finger swipe down
+    'taskview': ['winleft+tab'] if platform.system() == 'Windows' else ['alt+tab'],
+    'taskview_exit': ['esc'],
+}
 
-    mods: list of modifier names such as ['winleft'] or ['alt']
-    key: single key name like 'tab' or 'esc'
-    """
+# Windows virtual-key codes for keys SendInput must flag as extended
+_WIN_EXTENDED_VKS = {0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2D, 0x2E, 0x5B, 0x5C, 0x5D, 0xA3, 0xA5}
+_win_input = {}
+
+
+def _win_input_types():
+    """ctypes INPUT structure for SendInput, built on first use (Windows only)."""
+    if not _win_input:
+        import ctypes
+        from ctypes import wintypes
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD), ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [('wVk', wintypes.WORD), ('wScan', wintypes.WORD), ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+        class HARDWAREINPUT(ctypes.Structure):
+            _fields_ = [('uMsg', wintypes.DWORD), ('wParamL', wintypes.WORD), ('wParamH', wintypes.WORD)]
+
+        class INPUT(ctypes.Structure):
+            class _U(ctypes.Union):
+                _fields_ = [('mi', MOUSEINPUT), ('ki', KEYBDINPUT), ('hi', HARDWAREINPUT)]
+            _anonymous_ = ('u',)
+            _fields_ = [('type', wintypes.DWORD), ('u', _U)]
+
+        _win_input['INPUT'] = INPUT
+        _win_input['send'] = ctypes.windll.user32.SendInput
+    return _win_input
+
+
+def _compile_native_batch(events):
+    """Prebuild a SendInput call for `events`; None where that isn't possible."""
+    if platform.system() != 'Windows' or INPUT_BACKEND == 'null' or INJECTOR_MODE == 'process':
+        return None
     try:
-        for m in mods:
-            pyautogui.keyDown(m)
-        pyautogui.press(key)
-        for m in reversed(mods):
-            pyautogui.keyUp(m)
+        import ctypes
+        from pyautogui import _pyautogui_win
+        mapping = _pyautogui_win.keyboardMapping
+        types = _win_input_types()
+        INPUT = types['INPUT']
+        batch = (INPUT * len(events))()
+        for i, (key, down) in enumerate(events):
+            vk = mapping.get(key)
+            # Shifted characters (high byte set) need more than one key event
+            if vk is None or vk > 0xFF:
+                return None
+            flags = (0 if down else 0x0002) | (0x0001 if vk in _WIN_EXTENDED_VKS else 0)
+            batch[i].type = 1  # INPUT_KEYBOARD
+            batch[i].ki.wVk = vk
+            batch[i].ki.dwFlags = flags
+        send = types['send']
+        size = ctypes.sizeof(INPUT)
+        count = len(events)
+        return lambda: send(count, batch, size)
     except Exception:
-        # Windows fallback using keybd_event for common keys
+        return None
+
+
+def _compile_action(steps):
+    """Turn a list of combo strings into ((key, is_down), ...) events."""
+    if isinstance(steps, str):
+        steps = [steps]
+    known = getattr(pyautogui, 'KEYBOARD_KEYS', None)
+    known = set(known) if isinstance(known, (list, tuple)) else set()
+    events = []
+    for step in steps:
+        keys = [k.strip().lower() if len(k.strip()) > 1 else k.strip() for k in str(step).split('+')]
+        if not keys or not all(keys):
+            raise ValueError(f'empty key in {step!r}')
+        for k in keys:
+            if known and k not in known:
+                raise ValueError(f'unknown key {k!r}')
+        *mods, key = keys
+        events.extend((m, True) for m in mods)
+        events.append((key, True))
+        events.append((key, False))
+        events.extend((m, False) for m in reversed(mods))
+    return tuple(events)
+
+
+def _load_custom_actions(spec):
+    if not spec:
+        return {}
+    try:
+        if os.path.isfile(spec):
+            with open(spec, encoding='utf-8') as fh:
+                custom = json.load(fh)
+        else:
+            custom = json.loads(spec)
+        if not isinstance(custom, dict):
+            raise ValueError('expected a JSON object of name -> steps')
+        return custom
+    except Exception as e:
+        log.warning('Ignoring TRACKPAD_MACROS: %s', e)
+        return {}
+
+
+def compile_actions(actions):
+    compiled = {}
+    for name, steps in actions.items():
         try:
-            import ctypes
-            user32 = ctypes.windll.user32
-            vk_map = {'winleft': 0x5B, 'alt': 0x12}
-            key_map = {'tab': 0x09, 'esc': 0x1B}
-            # press modifiers
-            for m in mods:
-                vk = vk_map.get(m)
-                if vk:
-                    user32.keybd_event(vk, 0, 0, 0)
-            # press key
-            k = key_map.get(key)
-            if k:
-                user32.keybd_event(k, 0, 0, 0)
-                user32.keybd_event(k, 0, 2, 0)
-            # release modifiers
-            for m in reversed(mods):
-                vk = vk_map.get(m)
-                if vk:
-                    user32.keybd_event(vk, 0, 2, 0)
+            events = _compile_action(steps)
+            compiled[name] = (events, _compile_native_batch(events))
         except Exception as e:
-            print('_press_key_combo fallback failed', e)
+            log.warning('Ignoring action %r: %s', name, e)
+    return compiled
 
 
-def _press_single_key(key):
-    """Press a single key, with ctypes fallback for Windows."""
-    try:
-        pyautogui.press(key)
-    except Exception:
+def run_action(name):
+    """Inject a compiled action. Returns False if no action has that name."""
+    action = compiled_actions.get(name)
+    if action is None:
+        return False
+    events, native = action
+    if native is not None:
         try:
-            import ctypes
-            user32 = ctypes.windll.user32
-            key_map = {'esc': 0x1B, 'tab': 0x09}
-            k = key_map.get(key)
-            if k:
-                user32.keybd_event(k, 0, 0, 0)
-                user32.keybd_event(k, 0, 2, 0)
+            if native() == len(events):
+                return True
         except Exception as e:
-            print('_press_single_key fallback failed', e)
+            log_error('run_action native', e, action=name)
+    try:
+        for key, down in events:
+            if down:
+                pyautogui.keyDown(key, _pause=False)
+            else:
+                pyautogui.keyUp(key, _pause=False)
+    except Exception as e:
+        log_error('run_action', e, action=name)
+        # Don't leave a modifier stuck if a key in the middle failed
+        for key, down in events:
+            if not down:
+                try:
+                    pyautogui.keyUp(key, _pause=False)
+                except Exception:
+                    pass
+    return True
+
+
+compiled_actions = compile_actions(dict(ACTIONS, **_load_custom_actions(os.environ.get('TRACKPAD_MACROS', ''))))
 
 @app.route('/')
 def index():
@@ -244,6 +951,9 @@ def index():
 def click_mouse():
     try:
         data = request.json
+        if not valid_message(CLICK_SCHEMA, data):
+            reject_message('click')
+            return jsonify({'status': 'error', 'message': 'invalid click message'}), 400
         button = data.get('button', 'left')  # left, right, middle
         
         if button == 'left':
@@ -261,10 +971,13 @@ def click_mouse():
 def scroll_mouse():
     try:
         data = request.json
+        if not valid_message(SCROLL_SCHEMA, data):
+            reject_message('scroll')
+            return jsonify({'status': 'error', 'message': 'invalid scroll message'}), 400
         scroll_x = float(data.get('scrollX', 0))
         scroll_y = float(data.get('scrollY', 0))
         if SCROLL_DEBUG:
-            print(f"/scroll received: scroll_x={scroll_x:.4f}, scroll_y={scroll_y:.4f}")
+            log.info('/scroll received: scroll_x=%.4f, scroll_y=%.4f', scroll_x, scroll_y)
         
         # Vertical scrolling (most common)
         if scroll_y != 0:
@@ -311,6 +1024,9 @@ def scroll_mouse():
 @socketio.on('click')
 def on_click(data):
     try:
+        if not valid_message(CLICK_SCHEMA, data):
+            reject_message('click')
+            return
         button = data.get('button', 'left')
         if button == 'left':
             pyautogui.click()
@@ -319,16 +1035,19 @@ def on_click(data):
         elif button == 'middle':
             pyautogui.middleClick()
     except Exception as e:
-        print('on_click error', e)
+        log_error('on_click', e, session=request.sid, event='click')
 
 
 @socketio.on('scroll')
 def on_scroll(data):
     try:
+        if not valid_message(SCROLL_SCHEMA, data):
+            reject_message('scroll')
+            return
         scroll_x = float(data.get('scrollX', 0))
         scroll_y = float(data.get('scrollY', 0))
         if SCROLL_DEBUG:
-            print(f"[socket] /scroll received: scroll_x={scroll_x:.4f}, scroll_y={scroll_y:.4f}")
+            log.info('[socket] /scroll received: scroll_x=%.4f, scroll_y=%.4f', scroll_x, scroll_y)
 
         # Accumulate vertical fractional scrolls like HTTP handler
         if scroll_y != 0:
@@ -366,17 +1085,371 @@ def on_scroll(data):
                             pyautogui.keyUp('shift')
                     scroll_accum_x -= scroll_amount_x
     except Exception as e:
-        print('on_scroll error', e)
+        log_error('on_scroll', e, session=request.sid, event='scroll')
 
 
 # Per-connection touch state for raw events
 touch_state = {}
 
 
-def process_move_delta(delta_x, delta_y):
+def _new_touch_state():
+    return {'touches': {}, 'gesture': 'idle', 'tapPhase': 'idle', 'deltaSumY': 0.0, 'deltaAbsSumY': 0.0, 'deltaEpoch': 0, 'lastSumY': 0.0, 'startSumY': 0.0, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'lastTapTime': 0, 'doubleTapDownTime': 0, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None, 'tablet': None, 'tabletDown': False, 'touchPool': [], 'lastInput': 0.0}
+
+
+def _get_touch_state(sid_key):
+    st = touch_state.get(sid_key)
+    if st is None:
+        st = _new_touch_state()
+        touch_state[sid_key] = st
+    return st
+
+
+# Garbage collection. Every raw event allocates dicts, so during a long gesture
+# CPython's cyclic collector keeps kicking in and each pass shows up as a
+# hitch in cursor motion. With TRACKPAD_GC=idle the objects alive at startup
+# are moved out of the collector's view (gc.freeze), and automatic
+# collection is switched off when input starts. The watchdog collects once
+# no finger has been down and no input has arrived for GC_IDLE_DELAY_S. If
+# input keeps going for GC_MAX_DEFER_S, automatic collection comes back
+# until the next idle period, so a finger resting on the glass can't grow
+# the heap without bound. Contacts of a connection that sent nothing for
+# SESSION_GRACE_S don't count as down: an HTTP client that vanished mid-touch
+# never sends its ups and would otherwise block idle collection for good.
+# Touch dicts are recycled per connection ('touchPool') instead of allocated
+# per finger.
+# Pause times are recorded in every mode (gc.callbacks) and split into
+# pauses during gestures and pauses while idle; see 'gc' in /admin/stats.
+GC_MODE = os.environ.get('TRACKPAD_GC', 'default').lower()
+GC_IDLE_DELAY_S = 0.3
+GC_MAX_DEFER_S = 10.0
+GC_IDLE_GENERATION = 2
+TOUCH_POOL_SIZE = 10
+
+# deferred: automatic collection is off until the next idle period
+# suspended: deferral gave up (GC_MAX_DEFER_S) and waits for an idle period
+gc_state = {'lastInput': 0.0, 'deferred': False, 'deferredAt': 0.0, 'suspended': False, 'pauseStart': 0.0, 'pauseInGesture': False}
+gc_stats = {'collections': [0, 0, 0], 'pauseMs': 0.0, 'maxPauseMs': 0.0, 'gesturePauses': 0, 'gesturePauseMs': 0.0, 'gestureMaxPauseMs': 0.0,
+            'idleCollections': 0, 'forcedResumes': 0}
+
+
+def _gc_callback(phase, info):
+    now = time.perf_counter()
+    if phase == 'start':
+        gc_state['pauseStart'] = now
+        gc_state['pauseInGesture'] = time.time() - gc_state['lastInput'] < GC_IDLE_DELAY_S
+        return
+    ms = (now - gc_state['pauseStart']) * 1000
+    gc_stats['collections'][info['generation']] += 1
+    gc_stats['pauseMs'] += ms
+    if ms > gc_stats['maxPauseMs']:
+        gc_stats['maxPauseMs'] = ms
+    if gc_state['pauseInGesture']:
+        gc_stats['gesturePauses'] += 1
+        gc_stats['gesturePauseMs'] += ms
+        if ms > gc_stats['gestureMaxPauseMs']:
+            gc_stats['gestureMaxPauseMs'] = ms
+
+
+gc.callbacks.append(_gc_callback)
+
+
+def note_input(now):
+    """Called once per input message; starts deferring collection in idle mode."""
+    gc_state['lastInput'] = now
+    if GC_MODE == 'idle' and not gc_state['deferred'] and not gc_state['suspended']:
+        gc_state['deferred'] = True
+        gc_state['deferredAt'] = now
+        gc.disable()
+
+
+def _contacts_down(now):
+    for st in list(touch_state.values()):
+        if st['touches'] and now - st['lastInput'] < SESSION_GRACE_S:
+            return True
+    return False
+
+
+def gc_idle_tick():
+    """Watchdog hook: collect once input has gone idle, or stop deferring after GC_MAX_DEFER_S."""
+    if not gc_state['deferred'] and not gc_state['suspended']:
+        return
+    now = time.time()
+    if now - gc_state['lastInput'] >= GC_IDLE_DELAY_S and not _contacts_down(now):
+        gc.collect(GC_IDLE_GENERATION)
+        gc_stats['idleCollections'] += 1
+        gc_state['deferred'] = gc_state['suspended'] = False
+        gc.enable()
+    elif gc_state['deferred'] and now - gc_state['deferredAt'] >= GC_MAX_DEFER_S:
+        gc_state['deferred'] = False
+        gc_state['suspended'] = True
+        gc_stats['forcedResumes'] += 1
+        gc.enable()
+
+
+def freeze_startup_objects():
+    """Move everything allocated during startup out of the collector's view (idle mode)."""
+    if GC_MODE == 'idle' and hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
+
+
+def gc_report():
+    report = {k: (round(v, 3) if isinstance(v, float) else v) for k, v in gc_stats.items()}
+    report['collections'] = list(gc_stats['collections'])
+    report.update(mode=GC_MODE, deferred=gc_state['deferred'], frozen=gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0, pending=list(gc.get_count()))
+    return report
+
+
+# Animated drags. /drag used to call pyautogui.drag(duration=0.1), which sleeps
+# through pyautogui's tween inside the request handler and, under eventlet,
+# stalls every other client. DragAnimator instead interpolates the cursor toward
+# a target on its own thread; callers only set the target and return. A /drag
+# that arrives while another is running retargets it from wherever the cursor is
+# (the deltas add up and the button stays down), pointer moves in the meantime
+# shift the target too, and {"cancel": true} stops it and releases the button.
+# During double-tap-hold, raw pointer moves glide over DRAG_SMOOTH_S instead of
+# jumping, so the application under the cursor sees a continuous drag path.
+DRAG_DURATION_S = 0.1
+DRAG_MAX_DURATION_S = 2.0
+DRAG_SMOOTH_S = 0.02   # set to 0 to disable hold smoothing
+DRAG_TICK_S = 1.0 / 120
+
+
+class DragAnimator:
+    """Move the cursor toward a target over time from a background thread."""
+
+    def __init__(self, tick=DRAG_TICK_S):
+        self.tick = tick
+        self._cond = threading.Condition()
+        self._active = False
+        self._from = (0.0, 0.0)
+        self._to = (0.0, 0.0)
+        self._t0 = 0.0
+        self._duration = 0.0
+        self._pressed = False  # we pressed the button, so we release it at the end
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._active
+
+    def _current(self, now):
+        if not self._active or self._duration <= 0:
+            return self._to
+        f = min(1.0, (now - self._t0) / self._duration)
+        return (self._from[0] + (self._to[0] - self._from[0]) * f, self._from[1] + (self._to[1] - self._from[1]) * f)
+
+    def target(self):
+        with self._cond:
+            return self._to
+
+    def glide_to(self, x, y, duration=None, press=False):
+        """Animate to (x, y). duration=None keeps the remaining time of a running glide."""
+        with self._cond:
+            now = time.time()
+            if self._active:
+                start = self._current(now)
+                if duration is None:
+                    duration = max(self.tick, self._t0 + self._duration - now)
+            else:
+                cx, cy = pyautogui.position()
+                start = (float(cx), float(cy))
+                if duration is None:
+                    duration = self.tick
+            if press and not self._pressed:
+                pyautogui.mouseDown()
+                self._pressed = True
+            self._from = start
+            self._to = (float(x), float(y))
+            self._t0 = now
+            self._duration = duration
+            self._active = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='drag-animator', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def drag_by(self, dx, dy, duration=DRAG_DURATION_S):
+        """Press, move by (dx, dy) over `duration`, release; merges into a running drag."""
+        with self._cond:
+            bx, by = self._to if self._active else pyautogui.position()
+            tx, ty = monitor_layout.clamp(bx + dx, by + dy)
+            self.glide_to(tx, ty, duration, press=True)
+
+    def settle(self):
+        """Jump to the pending target now, e.g. right before a hold is released."""
+        with self._cond:
+            if not self._active:
+                return
+            self._active = False
+            inject_move_to(int(round(self._to[0])), int(round(self._to[1])))
+            if self._pressed:
+                self._pressed = False
+                pyautogui.mouseUp()
+
+    def cancel(self):
+        """Stop where the cursor is now and release a button we pressed."""
+        with self._cond:
+            if self._active:
+                x, y = self._current(time.time())
+                self._to = (x, y)
+                self._active = False
+            if self._pressed:
+                self._pressed = False
+                pyautogui.mouseUp()
+
+    def _follow_mouse(self, now):
+        """Blend physical mouse motion since the last tick into the glide, or stop when the mouse owns the cursor."""
+        try:
+            moved = _pointer_check(now)
+        except Exception as e:
+            log_error('pointer check', e)
+            return
+        if moved is None:
+            return
+        if pointer_state['owner'] != 'phone':
+            self.cancel()
+            return
+        dx, dy = moved
+        self._from = (self._from[0] + dx, self._from[1] + dy)
+        self._to = monitor_layout.clamp(self._to[0] + dx, self._to[1] + dy)
+
+    def _run(self):
+        last = None
+        while True:
+            with self._cond:
+                while not self._active:
+                    last = None
+                    self._cond.wait()
+                now = time.time()
+                if last is not None:
+                    self._follow_mouse(now)
+                    if not self._active:
+                        continue
+                x, y = self._current(now)
+                done = now >= self._t0 + self._duration
+                release = False
+                if done:
+                    self._active = False
+                    release, self._pressed = self._pressed, False
+            pos = (int(round(x)), int(round(y)))
+            try:
+                if pos != last:
+                    inject_move_to(*pos)
+                    last = pos
+                if release:
+                    pyautogui.mouseUp()
+            except Exception as e:
+                log_error('drag animator', e)
+            if not done:
+                time.sleep(self.tick)
+
+
+drag_animator = DragAnimator()
+
+
+# Pointer ownership. The phone and the host's physical mouse share one cursor.
+# Relative phone moves start from the position the server injected last
+# (pointer_state). Before every relative move, and on every tick of a drag
+# glide, the real position is compared with it. A difference of more than
+# POINTER_TOLERANCE_PX means the physical mouse moved the cursor since our
+# last injection. With TRACKPAD_INJECTOR=process the comparison only reads the
+# position the injector shares. Arbitration is still best-effort: mouse
+# motion in the few microseconds between that read and our own move is
+# overwritten. TRACKPAD_POINTER_POLICY decides what happens next:
+#   blend (default)  phone moves continue from wherever the mouse left the cursor
+#   yield            the mouse owns the cursor; phone moves are dropped until it
+#                    has been still for POINTER_YIELD_S
+# Tablet mode and relay warps place the cursor absolutely and skip the check.
+# pyautogui's FAILSAFE raises from every call once the cursor sits in a screen
+# corner, which turned fast swipes into exception storms, so it is off. The
+# emergency stop it provided is kept for the physical mouse: parking the
+# cursor in a corner with the mouse drops phone input and releases held
+# buttons until the cursor leaves the corner. Phone swipes that reach a corner
+# just stay there.
+POINTER_POLICY = os.environ.get('TRACKPAD_POINTER_POLICY', 'blend').lower()
+POINTER_TOLERANCE_PX = 2
+POINTER_YIELD_S = 0.5
+
+# x, y: where the server last put the cursor (None until the first check)
+# checkedAt: time of the last comparison, to tell fresh mouse motion from old
+# owner: 'phone', 'mouse' (yielding) or 'stopped' (mouse parked in a corner)
+pointer_state = {'x': None, 'y': None, 'checkedAt': 0.0, 'externalAt': 0.0, 'owner': 'phone'}
+pointer_stats = {'external': 0, 'yieldedMoves': 0, 'cornerStops': 0}
+
+
+def inject_move_to(x, y):
+    """Absolute cursor move that keeps pointer_state in step with what we injected."""
+    pointer_state['x'] = x
+    pointer_state['y'] = y
+    pyautogui.moveTo(x, y)
+
+
+def _at_corner(x, y):
+    # Corners of the monitor layout, not of its bounding box: on a layout
+    # that isn't rectangular some bounding-box corners can't be reached
+    return monitor_layout.is_corner(int(x), int(y))
+
+
+def _pointer_check(now):
+    """Compare the real cursor with our last injection. Returns the physical mouse's (dx, dy), or None."""
+    ps = pointer_state
+    since = now - ps['checkedAt']
+    ps['checkedAt'] = now
+    cx, cy = pyautogui.position()
+    moved = None
+    if ps['x'] is not None and (abs(cx - ps['x']) > POINTER_TOLERANCE_PX or abs(cy - ps['y']) > POINTER_TOLERANCE_PX):
+        moved = (cx - ps['x'], cy - ps['y'])
+        pointer_stats['external'] += 1
+        # After a long gap we can't tell when the mouse moved, so don't yield for it
+        if since <= POINTER_YIELD_S:
+            ps['externalAt'] = now
+        if _at_corner(cx, cy):
+            if ps['owner'] != 'stopped':
+                pointer_stats['cornerStops'] += 1
+                log.warning('Physical mouse parked in a corner; ignoring phone input until it leaves')
+                drag_animator.cancel()
+                force_release_all_holds()
+                # Fingers still down now would outlive the stop as stale contacts
+                for st in list(touch_state.values()):
+                    _reset_contacts(st)
+            ps['owner'] = 'stopped'
+    ps['x'] = cx
+    ps['y'] = cy
+    if ps['owner'] == 'stopped' and _at_corner(cx, cy):
+        return moved
+    if POINTER_POLICY == 'yield' and now - ps['externalAt'] < POINTER_YIELD_S:
+        ps['owner'] = 'mouse'
+    else:
+        ps['owner'] = 'phone'
+    return moved
+
+
+def pointer_base(now):
+    """Position a relative phone move starts from, or None while the physical mouse owns the cursor."""
+    ps = pointer_state
+    try:
+        _pointer_check(now)
+    except Exception as e:
+        log_error('pointer check', e)
+        if ps['x'] is None:
+            return None
+    if ps['owner'] != 'phone':
+        pointer_stats['yieldedMoves'] += 1
+        return None
+    return (ps['x'], ps['y'])
+
+
+def process_move_delta(delta_x, delta_y, smooth=False):
     """Apply a raw delta (in client pixels) to the host mouse using server-side
     multiplier and virtual-screen clamping. Always reflect any non-zero input
     immediately with at least a 1-pixel step in the appropriate direction.
+    With smooth=True (or while a drag animation runs) the cursor glides to the
+    new position through drag_animator instead of jumping.
+
+    Returns (edge, fraction) when the move was clamped because it pushed past
+    a screen edge ('left'/'right'/'top'/'bottom', position along that edge in
+    0..1), otherwise None. Relay mode uses this to hand the cursor off.
     """
     try:
         # Time sampling
@@ -432,101 +1505,440 @@ def process_move_delta(delta_x, delta_y):
                 move_accum_y -= dy_apply
 
         if dx_apply != 0 or dy_apply != 0:
-            cx, cy = pyautogui.position()
+            animating = drag_animator.active
+            if animating:
+                cx, cy = drag_animator.target()
+            else:
+                base = pointer_base(now)
+                if base is None:
+                    return None
+                cx, cy = base
             nx = cx + dx_apply
             ny = cy + dy_apply
-            # Clamp to virtual screen bounds
-            nx = max(virtual_left, min(virtual_left + screen_width - 1, nx))
-            ny = max(virtual_top, min(virtual_top + screen_height - 1, ny))
+            right = virtual_left + screen_width - 1
+            bottom = virtual_top + screen_height - 1
+            edge = None
+            if nx < virtual_left:
+                edge = 'left'
+            elif nx > right:
+                edge = 'right'
+            elif ny < virtual_top:
+                edge = 'top'
+            elif ny > bottom:
+                edge = 'bottom'
+            # Clamp onto the nearest monitor (bounding-box edges above are
+            # what relay mode cares about; gaps between monitors aren't edges)
+            nx, ny = monitor_layout.clamp(nx, ny)
             try:
-                pyautogui.moveTo(nx, ny)
+                if smooth:
+                    drag_animator.glide_to(nx, ny, DRAG_SMOOTH_S)
+                elif animating:
+                    drag_animator.glide_to(nx, ny)
+                else:
+                    inject_move_to(nx, ny)
             except Exception:
                 pass
+            if edge is not None:
+                if edge in ('left', 'right'):
+                    return edge, (ny - virtual_top) / float(max(1, screen_height - 1))
+                return edge, (nx - virtual_left) / float(max(1, screen_width - 1))
     except Exception as e:
         # Keep a minimal, non-throwing error path
-        print('process_move_delta error', e)
+        log_error('process_move_delta', e, event='move')
+
+
+# Resumable sessions. On connect the server hands each socket a session token
+# ('session' event); the client keeps it and presents it in the Socket.IO auth
+# payload when it reconnects, and in an X-Trackpad-Session header on HTTP
+# fallback posts. Per-connection state (touch_state, flow_state) is keyed by
+# the session instead of the socket sid, so a Wi-Fi flicker that produces a new
+# sid reattaches to the same contacts, holds and flow counters. A session whose
+# socket went away is kept for SESSION_GRACE_S before its holds are released.
+SESSION_GRACE_S = 15.0
+
+# token -> {'sid': attached socket sid or None, 'detachedAt': time.time() or None}
+sessions = {}
+# socket sid -> session token
+sid_sessions = {}
+
+
+def _session_key_for_sid(sid):
+    token = sid_sessions.get(sid)
+    return f'session:{token}' if token else sid
+
+
+def _session_key():
+    """State key for the socket that sent the current event."""
+    return _session_key_for_sid(request.sid)
+
+
+def _attach_session(sid, token):
+    """Bind a socket to an existing session (resume) or a new one. Returns (token, resumed)."""
+    sess = sessions.get(token) if token else None
+    resumed = sess is not None
+    if not resumed:
+        token = secrets.token_urlsafe(16)
+        sess = sessions[token] = {'sid': None, 'detachedAt': None}
+    # A resumed session may still be attached to a socket whose disconnect the
+    # server hasn't noticed yet; the newest socket wins
+    sess['sid'] = sid
+    sess['detachedAt'] = None
+    sid_sessions[sid] = token
+    return token, resumed
+
+
+def _detach_session(sid):
+    """Mark a socket's session detached. Returns False when the sid had no session."""
+    token = sid_sessions.pop(sid, None)
+    sess = sessions.get(token) if token else None
+    if sess is None:
+        return False
+    if sess['sid'] == sid:
+        sess['sid'] = None
+        sess['detachedAt'] = time.time()
+    return True
+
+
+def _end_session_state(sid_key):
+    """Release holds and drop flow state for a connection that is gone for good."""
+    st = touch_state.get(sid_key)
+    if st and st.get('doubleTapHoldActive'):
+        try:
+            pyautogui.mouseUp()
+        except Exception:
+            pass
+        st['doubleTapHoldActive'] = False
+    if st:
+        st['lastMouseDownTime'] = 0
+        st['lastMouseDownSid'] = None
+        _reset_contacts(st)
+        if st.get('tabletDown'):
+            try:
+                pyautogui.mouseUp()
+            except Exception:
+                pass
+            st['tabletDown'] = False
+    flow_state.pop(sid_key, None)
+
+
+def expire_detached_sessions(now=None):
+    now = time.time() if now is None else now
+    for token, sess in list(sessions.items()):
+        detached = sess.get('detachedAt')
+        if detached is not None and now - detached > SESSION_GRACE_S:
+            sessions.pop(token, None)
+            key = f'session:{token}'
+            _end_session_state(key)
+            touch_state.pop(key, None)
 
 
 # Raw input handlers - client emits raw.down, raw.move, raw.up (coalesced moves supported)
 def _get_sid_for_http():
     # Use client IP as a stable key for HTTP fallback clients (so successive
     # /raw posts from the same device share state). If remote_addr is unavailable
-    # fall back to a generic 'http' key.
+    # fall back to a generic 'http' key. Clients sharing one address (e.g. the
+    # load generator) can tell themselves apart with an X-Trackpad-Client header.
+    # A client that holds a session token shares its socket session's state.
     try:
+        token = request.headers.get('X-Trackpad-Session')
+        if token and token in sessions:
+            return f'session:{token}'
         addr = request.remote_addr or 'unknown'
+        client = request.headers.get('X-Trackpad-Client')
+        if client:
+            return f'http:{addr}:{client[:64]}'
         return f'http:{addr}'
     except Exception:
         return 'http:unknown'
 
 
-def process_raw_down(data, sid_key):
-    try:
-        if RAW_DEBUG:
-            try:
-                print(f"down id={data.get('id')} x={float(data.get('x', 0)):.1f} y={float(data.get('y', 0)):.1f}")
-            except Exception:
-                pass
-        st = touch_state.setdefault(sid_key, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None, 'lastTapTime': 0, 'pendingDoubleTap': False})
-        # Clear any stale pending double-tap marker
-        now_ms = time.time() * 1000
-        if st.get('pendingDoubleTap') and (now_ms - st.get('lastTapTime', 0) > DOUBLE_TAP_MAX_INTERVAL_MS):
-            st['pendingDoubleTap'] = False
-
-        # If a pending double-tap exists and this down occurs quickly after the last tap,
-        # treat this as the second tap's down; enter the "expect hold to start drag" state.
-        if st.get('pendingDoubleTap') and (now_ms - st.get('lastTapTime', 0) <= DOUBLE_TAP_MAX_INTERVAL_MS):
-            st['pendingDoubleTap'] = False
-            st['doubleTapExpectHold'] = True
-            st['doubleTapDownTime'] = now_ms
-        tid = data.get('id')
-        x = float(data.get('x', 0))
-        y = float(data.get('y', 0))
-        now = time.time() * 1000
-        # Track per-touch recent deltas so two-finger scroll can use recent
-        # movement instead of a cumulative start->last value which would
-        # otherwise be re-applied repeatedly.
-        st['touches'][tid] = {'lastX': x, 'lastY': y, 'startX': x, 'startY': y, 'startTime': now, 'hasMoved': False, 'totalDistance': 0.0, 'lastDeltaX': 0.0, 'lastDeltaY': 0.0}
-        # Record how many touches were active at down time (used to decide click type)
+# Gesture recognizer for raw events.
+#
+# Contact gestures are chosen by finger count through GESTURE_BY_COUNT and
+# dispatched through the GESTURES table of optional 'enter'/'move'/'exit'
+# handlers, so a finger-count change is a state transition rather than a
+# branch in process_raw_move. Tap / double-tap-and-hold is a separate small
+# machine on st['tapPhase'] ('idle' -> 'tapped' -> 'expectHold') driven by
+# TAP_TRANSITIONS, keyed by (phase, event) with events 'down', 'move', 'tap'
+# (an up that qualified as a tap) and 'lift' (last finger up). New gestures are
+# added by declaring handlers in these tables.
+#
+# Every handler runs in O(1): the per-connection state keeps running sums
+# that are adjusted whenever a single touch changes:
+#   deltaSumY / deltaAbsSumY: sum of unconsumed lastDeltaY (and its magnitude)
+#   lastSumY / startSumY: sum of lastY / startY across active touches
+# Consuming all per-touch deltas bumps 'deltaEpoch'; a touch's lastDeltaY only
+# counts while its own 'epoch' matches, so nothing has to be zeroed in a loop.
+
+
+def _touch_delta_y(st, touch):
+    return touch['lastDeltaY'] if touch['epoch'] == st['deltaEpoch'] else 0.0
+
+
+def _set_touch_delta_y(st, touch, dy):
+    old = _touch_delta_y(st, touch)
+    st['deltaSumY'] += dy - old
+    st['deltaAbsSumY'] += abs(dy) - abs(old)
+    touch['lastDeltaY'] = dy
+    touch['epoch'] = st['deltaEpoch']
+
+
+def _consume_touch_deltas(st):
+    st['deltaEpoch'] += 1
+    st['deltaSumY'] = 0.0
+    st['deltaAbsSumY'] = 0.0
+
+
+def _add_touch(st, tid, x, y, now_ms):
+    touches = st['touches']
+    if tid in touches:
+        _remove_touch(st, tid)
+    pool = st['touchPool']
+    touch = pool.pop() if pool else {}
+    touch['lastX'] = touch['startX'] = x
+    touch['lastY'] = touch['startY'] = y
+    touch['startTime'] = now_ms
+    touch['hasMoved'] = False
+    touch['totalDistance'] = touch['lastDeltaX'] = touch['lastDeltaY'] = 0.0
+    touch['epoch'] = st['deltaEpoch']
+    touch['touchCountAtDown'] = len(touches) + 1
+    touches[tid] = touch
+    st['lastSumY'] += y
+    st['startSumY'] += y
+
+
+def _remove_touch(st, tid):
+    touches = st['touches']
+    touch = touches.pop(tid, None)
+    if touch is None:
+        return
+    # Recycled by the next _add_touch; callers may still read it until then
+    if len(st['touchPool']) < TOUCH_POOL_SIZE:
+        st['touchPool'].append(touch)
+    if not touches:
+        # Reset the sums outright so float drift can't accumulate across gestures
+        st['lastSumY'] = st['startSumY'] = 0.0
+        _consume_touch_deltas(st)
+        return
+    st['lastSumY'] -= touch['lastY']
+    st['startSumY'] -= touch['startY']
+    old = _touch_delta_y(st, touch)
+    st['deltaSumY'] -= old
+    st['deltaAbsSumY'] -= abs(old)
+
+
+def _reset_contacts(st):
+    """Drop all touches and return the recognizer to idle."""
+    pool = st['touchPool']
+    pool.extend(list(st['touches'].values())[:TOUCH_POOL_SIZE - len(pool)])
+    st['touches'] = {}
+    st['lastSumY'] = st['startSumY'] = 0.0
+    _consume_touch_deltas(st)
+    _gesture_swipe_reset(st)
+    st['gesture'] = 'idle'
+    st['tapPhase'] = 'idle'
+
+
+def _gesture_pointer_move(st, dx, dy):
+    crossed = process_move_delta(dx, dy, smooth=st['doubleTapHoldActive'] and DRAG_SMOOTH_S > 0)
+    if crossed is not None:
+        st['edgeCrossed'] = crossed
+
+
+def _gesture_scroll_move(st, dx, dy):
+    n = len(st['touches'])
+    _scroll_by_finger(st['deltaSumY'] / n, st['deltaAbsSumY'] / n)
+    # zero out consumed per-touch deltas
+    _consume_touch_deltas(st)
+
+
+def _scroll_by_finger(avgDy, speed):
+    """Scroll for an average finger travel of avgDy moving at `speed` px per sample."""
+    accel = 1.0 + min(SCROLL_ACCEL_CAP, speed) * SCROLL_ACCEL_FACTOR
+    scroll_val = -avgDy * SCROLL_MULTIPLIER * accel
+    with scroll_lock:
+        global scroll_accum_y
+        scroll_accum_y += scroll_val
+        scroll_amount = int(scroll_accum_y)
+        if scroll_amount != 0:
+            pyautogui.scroll(scroll_amount)
+            scroll_accum_y -= scroll_amount
+        else:
+            if abs(scroll_accum_y) >= MIN_SCROLL_FRAC_TO_STEP:
+                step = int(math.copysign(1, scroll_accum_y))
+                pyautogui.scroll(step)
+                scroll_accum_y -= step
+
+
+def _gesture_swipe_move(st, dx, dy):
+    # Average displacement from the start position across all three touches
+    avg = (st['lastSumY'] - st['startSumY']) / len(st['touches'])
+    st['threeFingerAccumY'] += -avg
+    if not st['threeFingerTriggeredUp'] and st['threeFingerAccumY'] >= SWIPE_TRIGGER_DISTANCE:
+        st['threeFingerTriggeredUp'] = True
+        run_action('swipe_up')
+    if not st['threeFingerTriggeredDown'] and st['threeFingerAccumY'] <= -SWIPE_TRIGGER_DISTANCE:
+        st['threeFingerTriggeredDown'] = True
+        run_action('swipe_down')
+
+
+def _gesture_swipe_reset(st):
+    st['threeFingerAccumY'] = 0.0
+    st['threeFingerTriggeredUp'] = False
+    st['threeFingerTriggeredDown'] = False
+
+
+# Contact gesture per finger count; counts not listed map to 'none'. The swipe
+# accumulator survives a brief fourth finger and resets once fewer than three
+# fingers remain, hence the reset on entering the lower-count gestures.
+GESTURE_BY_COUNT = {0: 'idle', 1: 'pointer', 2: 'scroll', 3: 'swipe'}
+GESTURES = {
+    'idle': {'enter': _gesture_swipe_reset},
+    'none': {},
+    'pointer': {'enter': _gesture_swipe_reset, 'move': _gesture_pointer_move},
+    'scroll': {'enter': _gesture_swipe_reset, 'move': _gesture_scroll_move},
+    'swipe': {'move': _gesture_swipe_move},
+}
+
+
+def _update_gesture(st):
+    """Transition to the gesture matching the current finger count."""
+    new = GESTURE_BY_COUNT.get(len(st['touches']), 'none')
+    old = st['gesture']
+    if new == old:
+        return
+    exit_fn = GESTURES[old].get('exit')
+    if exit_fn is not None:
+        exit_fn(st)
+    st['gesture'] = new
+    enter_fn = GESTURES[new].get('enter')
+    if enter_fn is not None:
+        enter_fn(st)
+
+
+def _tap_second_down(st, sid_key, now_ms, touch):
+    # A down quickly after a single tap is the second tap's down; expect a hold
+    # to start a drag. Otherwise the pending tap has gone stale.
+    if now_ms - st['lastTapTime'] <= DOUBLE_TAP_MAX_INTERVAL_MS:
+        st['tapPhase'] = 'expectHold'
+        st['doubleTapDownTime'] = now_ms
+    else:
+        st['tapPhase'] = 'idle'
+
+
+def _tap_check_hold(st, sid_key, now_ms, touch):
+    if (now_ms - st['doubleTapDownTime']) >= DOUBLE_TAP_HOLD_TRIGGER_MS:
         try:
-            st['touches'][tid]['touchCountAtDown'] = len(st['touches'])
+            pyautogui.mouseDown()
         except Exception:
-            st['touches'][tid]['touchCountAtDown'] = 1
+            pass
+        st['doubleTapHoldActive'] = True
+        st['lastMouseDownTime'] = now_ms
+        st['lastMouseDownSid'] = sid_key
+        st['tapPhase'] = 'idle'
+
+
+def _tap_click(st, sid_key, now_ms, touch):
+    # Decide click type by number of fingers that started the touch
+    count = touch['touchCountAtDown']
+    try:
+        if count == 1:
+            pyautogui.click()
+            # mark this as a tap that could become the first half of a double-tap
+            st['lastTapTime'] = now_ms
+            st['tapPhase'] = 'tapped'
+        elif count == 2:
+            pyautogui.rightClick()
+            # suppress tiny moves after right-click to avoid closing context menu
+            st['suppressMoveUntil'] = now_ms + RIGHT_CLICK_SUPPRESS_MS
+        else:
+            pyautogui.middleClick()
+    except Exception:
+        pass
+
+
+def _tap_double_click(st, sid_key, now_ms, touch):
+    # Released before the hold threshold: treat as a double-click
+    try:
+        pyautogui.doubleClick()
+    except Exception:
+        pass
+    st['tapPhase'] = 'idle'
+    st['lastTapTime'] = 0
+
+
+def _tap_reset(st, sid_key, now_ms, touch):
+    st['tapPhase'] = 'idle'
+
+
+TAP_TRANSITIONS = {
+    ('tapped', 'down'): _tap_second_down,
+    ('idle', 'tap'): _tap_click,
+    ('tapped', 'tap'): _tap_click,
+    ('expectHold', 'move'): _tap_check_hold,
+    ('expectHold', 'tap'): _tap_double_click,
+    ('expectHold', 'lift'): _tap_reset,
+}
+
+
+def _tap_event(st, event, sid_key, now_ms, touch=None):
+    handler = TAP_TRANSITIONS.get((st['tapPhase'], event))
+    if handler is not None:
+        handler(st, sid_key, now_ms, touch)
+
+
+def process_raw_down(data, sid_key):
+    try:
+        if RAW_DEBUG:
+            try:
+                log.info('down id=%s x=%.1f y=%.1f', data.get('id'), float(data.get('x', 0)), float(data.get('y', 0)))
+            except Exception:
+                pass
+        st = _get_touch_state(sid_key)
+        now_ms = time.time() * 1000
+        tid = data.get('id')
+        # A 'handoff' down re-creates a finger that was already on the glass when
+        # the cursor moved between relay hosts; it must never count as a tap.
+        handoff = data.get('handoff')
+        if not handoff:
+            _tap_event(st, 'down', sid_key, now_ms)
+        _add_touch(st, tid, float(data.get('x', 0)), float(data.get('y', 0)), now_ms)
+        if handoff:
+            st['touches'][tid]['hasMoved'] = True
+        _update_gesture(st)
     except Exception as e:
-        print('process_raw_down error', e)
+        log_error('process_raw_down', e, session=sid_key, event='down')
 
 
 def process_raw_move(data, sid_key):
     try:
-        st = touch_state.setdefault(sid_key, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None, 'lastTapTime': 0, 'pendingDoubleTap': False})
+        st = _get_touch_state(sid_key)
         tid = data.get('id')
         x = float(data.get('x', 0))
         y = float(data.get('y', 0))
         if RAW_DEBUG:
             try:
-                print(f"move id={tid} x={x:.1f} y={y:.1f}")
+                log.info('move id=%s x=%.1f y=%.1f', tid, x, y)
             except Exception:
                 pass
 
-        touches = st['touches']
-        touch = touches.get(tid)
+        touch = st['touches'].get(tid)
         dx = dy = 0.0
         if touch is not None:
-            lx = touch['lastX']
-            ly = touch['lastY']
-            dx = x - lx
-            dy = y - ly
-            dist = math.hypot(dx, dy)
+            dx = x - touch['lastX']
+            dy = y - touch['lastY']
+            st['lastSumY'] += dy
             touch['lastX'] = x
             touch['lastY'] = y
-            touch['totalDistance'] += dist
+            touch['totalDistance'] += math.hypot(dx, dy)
             touch['lastDeltaX'] = dx
-            touch['lastDeltaY'] = dy
+            _set_touch_delta_y(st, touch, dy)
             if touch['totalDistance'] > 4:
                 touch['hasMoved'] = True
 
         # Auto-release stale double-tap-hold
-        now_check = time.time() * 1000
-        if st.get('doubleTapHoldActive') and st.get('lastMouseDownTime', 0) and (now_check - st.get('lastMouseDownTime', 0) > DOUBLE_TAP_HOLD_TIMEOUT_MS):
+        now_ms = time.time() * 1000
+        if st['doubleTapHoldActive'] and st['lastMouseDownTime'] and (now_ms - st['lastMouseDownTime'] > DOUBLE_TAP_HOLD_TIMEOUT_MS):
             try:
                 pyautogui.mouseUp()
             except Exception:
@@ -534,205 +1946,704 @@ def process_raw_move(data, sid_key):
             st['doubleTapHoldActive'] = False
             st['lastMouseDownTime'] = 0
 
-        # Handle double-tap-expect-hold
-        now_ms = now_check
-        if st.get('doubleTapExpectHold') and st.get('doubleTapDownTime', 0):
-            if (now_ms - st.get('doubleTapDownTime', 0)) >= DOUBLE_TAP_HOLD_TRIGGER_MS:
-                try:
-                    pyautogui.mouseDown()
-                except Exception:
-                    pass
-                st['doubleTapHoldActive'] = True
-                st['lastMouseDownTime'] = now_ms
-                st['lastMouseDownSid'] = sid_key
-                st['doubleTapExpectHold'] = False
+        _tap_event(st, 'move', sid_key, now_ms, touch)
 
         # Suppress tiny moves after right-click
-        if st.get('suppressMoveUntil', 0) > now_ms:
+        if st['suppressMoveUntil'] > now_ms:
             if touch is not None:
                 touch['lastDeltaX'] = 0.0
-                touch['lastDeltaY'] = 0.0
-            return
-
-        n = len(touches)
-        if n == 1:
-            process_move_delta(dx, dy)
+                _set_touch_delta_y(st, touch, 0.0)
             return
 
-        if n == 2:
-            # Aggregate lastDeltaY across touches
-            totalDelta = 0.0
-            speed_acc = 0.0
-            count = 0
-            for td in touches.values():
-                ldy = td.get('lastDeltaY', 0.0)
-                totalDelta += ldy
-                speed_acc += abs(ldy)
-                count += 1
-            if count:
-                avgDy = totalDelta / float(count)
-                speed = speed_acc / float(count)
-                accel = 1.0 + min(SCROLL_ACCEL_CAP, speed) * SCROLL_ACCEL_FACTOR
-                scroll_val = -avgDy * SCROLL_MULTIPLIER * accel
-                with scroll_lock:
-                    global scroll_accum_y
-                    scroll_accum_y += scroll_val
-                    scroll_amount = int(scroll_accum_y)
-                    if scroll_amount != 0:
-                        pyautogui.scroll(scroll_amount)
-                        scroll_accum_y -= scroll_amount
-                    else:
-                        if abs(scroll_accum_y) >= MIN_SCROLL_FRAC_TO_STEP:
-                            step = int(math.copysign(1, scroll_accum_y))
-                            pyautogui.scroll(step)
-                            scroll_accum_y -= step
-                # zero out consumed per-touch deltas
-                for td in touches.values():
-                    td['lastDeltaY'] = 0.0
-            return
-
-        if n == 3:
-            avgDeltaY = 0.0
-            count = 0
-            for td in touches.values():
-                avgDeltaY += (td['lastY'] - td['startY'])
-                count += 1
-            if count:
-                avg = avgDeltaY / count
-                st['threeFingerAccumY'] += -avg
-                if not st['threeFingerTriggeredUp'] and st['threeFingerAccumY'] >= 12:
-                    st['threeFingerTriggeredUp'] = True
-                    try:
-                        _press_key_combo(['winleft'], 'tab')
-                    except Exception:
-                        pass
-                if not st['threeFingerTriggeredDown'] and st['threeFingerAccumY'] <= -12:
-                    st['threeFingerTriggeredDown'] = True
-                    try:
-                        _press_single_key('esc')
-                    except Exception:
-                        pass
-            return
+        handler = GESTURES[st['gesture']].get('move')
+        if handler is not None:
+            handler(st, dx, dy)
     except Exception as e:
-        print('process_raw_move error', e)
+        log_error('process_raw_move', e, session=sid_key, event='move')
 
 
 def process_raw_up(data, sid_key):
     try:
         if RAW_DEBUG:
             try:
-                print(f"up   id={data.get('id')} x={float(data.get('x', 0)):.1f} y={float(data.get('y', 0)):.1f}")
+                log.info('up   id=%s x=%.1f y=%.1f', data.get('id'), float(data.get('x', 0)), float(data.get('y', 0)))
             except Exception:
                 pass
-        st = touch_state.setdefault(sid_key, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None, 'lastTapTime': 0, 'pendingDoubleTap': False})
+        st = _get_touch_state(sid_key)
         tid = data.get('id')
+        now_ms = time.time() * 1000
         # If touch exists, determine if it was a tap (short duration, little movement)
         touch = st['touches'].get(tid)
-        if touch:
-            duration = (time.time() * 1000) - float(touch.get('startTime', 0))
-            moved = touch.get('hasMoved', False)
-            total_dist = touch.get('totalDistance', 0.0)
-            # Consider it a tap if it didn't move much and was quick
-            if (not moved or total_dist <= TAP_MOVE_THRESHOLD) and duration <= TAP_TIMEOUT_MS:
-                now_ms = time.time() * 1000
-                # If we were expecting the second tap's hold but the user released before
-                # the hold threshold, treat this as a double-click and clear the expect flag.
-                if st.get('doubleTapExpectHold'):
-                    try:
-                        pyautogui.doubleClick()
-                    except Exception:
-                        pass
-                    st['doubleTapExpectHold'] = False
-                    st['pendingDoubleTap'] = False
-                    st['lastTapTime'] = 0
-                    # remove touch and return early
-                    if tid in st['touches']:
-                        del st['touches'][tid]
-                    return
-                # Decide click type by number of fingers that started the touch
-                count = int(touch.get('touchCountAtDown', 1))
+        if touch is not None:
+            duration = now_ms - touch['startTime']
+            if (not touch['hasMoved'] or touch['totalDistance'] <= TAP_MOVE_THRESHOLD) and duration <= TAP_TIMEOUT_MS:
+                _tap_event(st, 'tap', sid_key, now_ms, touch)
+            _remove_touch(st, tid)
+        _update_gesture(st)
+        if not st['touches']:
+            _tap_event(st, 'lift', sid_key, now_ms)
+            if st['doubleTapHoldActive']:
                 try:
-                    if count == 1:
-                        pyautogui.click()
-                        # mark this as a tap that could become the first half of a double-tap
-                        st['lastTapTime'] = now_ms
-                        st['pendingDoubleTap'] = True
-                    elif count == 2:
-                        pyautogui.rightClick()
-                        # suppress tiny moves after right-click to avoid closing context menu
-                        st['suppressMoveUntil'] = time.time() * 1000 + 300
-                    else:
-                        pyautogui.middleClick()
+                    # Drop where the finger ended, not partway through a glide
+                    drag_animator.settle()
+                    pyautogui.mouseUp()
                 except Exception:
                     pass
-        # Remove touch state
-        if tid in st['touches']:
-            del st['touches'][tid]
-        if len(st['touches']) < 3:
-            st['threeFingerAccumY'] = 0.0
-            st['threeFingerTriggeredUp'] = False
-            st['threeFingerTriggeredDown'] = False
-        if st.get('doubleTapHoldActive') and len(st['touches']) == 0:
-            try:
-                pyautogui.mouseUp()
-            except Exception:
-                pass
-            # clear the hold flag after releasing
-            st['doubleTapHoldActive'] = False
-            st['lastMouseDownTime'] = 0
+                # clear the hold flag after releasing
+                st['doubleTapHoldActive'] = False
+                st['lastMouseDownTime'] = 0
+    except Exception as e:
+        log_error('process_raw_up', e, session=sid_key, event='up')
+
+
+# Flow control for raw events. The client stamps every raw event with an
+# increasing 'seq' and its send 'time' (ms). The server periodically acks the
+# highest seq it processed together with the observed receive lag and handler
+# cost so the client can back off before moves pile up in the socket buffer.
+# ACK_INTERVAL_MS / ACK_INTERVAL_EVENTS: ack at most this often / after this many events
+# LAG_OFFSET_DECAY_MS: how fast the baseline clock offset is allowed to creep up
+#   (ms per second) so a one-off fast sample doesn't pin the lag estimate forever
+ACK_INTERVAL_MS = 100
+ACK_INTERVAL_EVENTS = 32
+LAG_OFFSET_DECAY_MS = 2.0
+
+# Admission control. A backgrounded tab that flushes its backlog in one message
+# (or a misbehaving client) must not hold the handler for long enough to
+# freeze every other cursor. Each connection has a token bucket refilled at
+# RAW_RATE_EVENTS_PER_S up to RAW_RATE_BURST; a message gets full processing
+# for at most RAW_MAX_BATCH events and as many as it has tokens for, and the
+# local dispatch stops after RAW_BATCH_BUDGET_MS. Whatever is left is shed down
+# to its net effect (_shed_backlog): the newest position of each finger that is
+# still down plus the downs/ups that change which fingers are down, so cursor
+# travel and held fingers survive while the intermediate samples don't.
+# RAW_MAX_CONTACTS bounds how many fingers a shed backlog may leave down, and
+# RAW_SHED_MAX_TAPS how many complete taps (down and up) it keeps: the newest
+# ones, enough for a three-finger double tap. The kept events are charged to
+# the bucket, which may go into debt, and a backlog shed because the time
+# budget ran out keeps no taps at all.
+# Intent messages are charged per op; excess ops keep clicks, holds and
+# gestures and merge the motion between them.
+RAW_RATE_EVENTS_PER_S = 2000
+RAW_RATE_BURST = 1000
+RAW_MAX_BATCH = 256
+RAW_BATCH_BUDGET_MS = 8.0
+RAW_MAX_CONTACTS = 10
+RAW_SHED_MAX_TAPS = 6
+
+# Per-connection flow state, keyed like touch_state
+flow_state = {}
+
+
+def _get_flow_state(sid_key):
+    fs = flow_state.get(sid_key)
+    if fs is None:
+        fs = {'lastSeq': -1, 'minOffset': None, 'minOffsetTime': 0.0, 'lagMs': 0.0, 'procMs': 0.0, 'received': 0, 'dropped': 0, 'sinceAck': 0, 'lastAckTime': 0.0,
+              'tokens': float(RAW_RATE_BURST), 'tokensAt': time.time(), 'shed': 0, 'throttled': 0, 'overBudget': 0, 'rejected': 0}
+        flow_state[sid_key] = fs
+    return fs
+
+
+def _flow_ack(fs):
+    return {'seq': fs['lastSeq'], 'lagMs': round(fs['lagMs'], 1), 'procMs': round(fs['procMs'], 2), 'dropped': fs['dropped'], 'shed': fs['shed'],
+            'rejected': fs['rejected']}
+
+
+def _take_tokens(fs, wanted, now):
+    """Refill the connection's bucket and take up to `wanted` tokens. Returns how many were granted."""
+    fs['tokens'] = min(float(RAW_RATE_BURST), fs['tokens'] + (now - fs['tokensAt']) * RAW_RATE_EVENTS_PER_S)
+    fs['tokensAt'] = now
+    granted = max(0, min(wanted, int(fs['tokens'])))
+    fs['tokens'] -= granted
+    if granted < wanted:
+        fs['throttled'] += 1
+    return granted
+
+
+def _live_contacts(st, events=()):
+    """Touch ids that are down once `events` have been applied to st."""
+    live = set(st['touches']) if st is not None else set()
+    for ev in events:
+        etype = ev.get('type')
+        if etype == 'down':
+            live.add(ev.get('id'))
+        elif etype == 'up':
+            live.discard(ev.get('id'))
+    return live
+
+
+def _shed_backlog(events, live, keep_types=(), max_taps=RAW_SHED_MAX_TAPS):
+    """Reduce a backlog to its net effect, given the touch ids `live` before it.
+
+    Keeps the ups of live fingers, the last down of each finger that is still
+    down at the end (as a handoff, so a finger whose samples were shed can't
+    become a spurious tap) and the newest move of each finger, so the cursor
+    still travels to where the finger is. A finger that went down and up
+    inside the backlog like a tap (within TAP_MOVE_THRESHOLD of travel and,
+    when the client sent times, TAP_TIMEOUT_MS) keeps its down and up, so
+    taps and multi-finger taps still click; only the newest `max_taps` taps
+    are kept. The last up of a tablet-mapped pen
+    (keep_types) is kept too so its button is never left pressed.
+    """
+    live = set(live)
+    final_down = {}
+    last_move = {}
+    last_pen_up = None
+    # tid -> [down index, x, y, travel] for fingers that went down in the backlog
+    pressed = {}
+    taps = []
+    for i, ev in enumerate(events):
+        etype = ev.get('type')
+        tid = ev.get('id')
+        if etype == 'down':
+            final_down[tid] = i
+            pressed[tid] = [i, ev.get('x', 0), ev.get('y', 0), 0.0]
+        elif etype == 'up':
+            final_down.pop(tid, None)
+            if keep_types and ev.get('pointerType') in keep_types:
+                last_pen_up = i
+            p = pressed.pop(tid, None)
+            if p is not None and p[3] <= TAP_MOVE_THRESHOLD:
+                t0, t1 = events[p[0]].get('time'), ev.get('time')
+                if t0 is None or t1 is None or t1 - t0 <= TAP_TIMEOUT_MS:
+                    taps.append((p[0], i))
+        elif etype == 'move':
+            last_move[tid] = i
+            p = pressed.get(tid)
+            if p is not None:
+                x, y = ev.get('x', 0), ev.get('y', 0)
+                p[3] += math.hypot(x - p[1], y - p[2])
+                p[1], p[2] = x, y
+    taps = {i for pair in (taps[-max_taps:] if max_taps > 0 else ()) for i in pair}
+    out = []
+    for i, ev in enumerate(events):
+        etype = ev.get('type')
+        tid = ev.get('id')
+        if etype == 'down':
+            if i in taps:
+                if len(live) < RAW_MAX_CONTACTS:
+                    live.add(tid)
+                    out.append(ev)
+            elif final_down.get(tid) == i and len(live) < RAW_MAX_CONTACTS:
+                live.add(tid)
+                out.append(dict(ev, handoff=True))
+        elif etype == 'up':
+            if tid in live or i == last_pen_up:
+                live.discard(tid)
+                out.append(ev)
+        elif etype == 'move' and last_move.get(tid) == i and tid in live:
+            out.append(ev)
+    return out
+
+
+def _shed_intents(ops):
+    """Merge the motion ops between state-changing ops (clicks, holds, gestures)."""
+    out = []
+    move = None
+    scroll = None
+    for op in ops:
+        try:
+            kind = op[0]
+            if kind == 'm':
+                dx, dy = _intent_delta(op[1]), _intent_delta(op[2])
+                move = [move[0] + dx, move[1] + dy] if move else [dx, dy]
+                continue
+            if kind == 's':
+                dy, speed = _intent_delta(op[1]), abs(_intent_delta(op[2]))
+                scroll = [scroll[0] + dy, max(scroll[1], speed)] if scroll else [dy, speed]
+                continue
+        except (IndexError, TypeError, ValueError):
+            continue
+        if move:
+            out.append(['m'] + move)
+            move = None
+        if scroll:
+            out.append(['s'] + scroll)
+            scroll = None
+        out.append(op)
+    if move:
+        out.append(['m'] + move)
+    if scroll:
+        out.append(['s'] + scroll)
+    return out
+
+
+def _collapse_superseded_moves(events, keep_types=()):
+    """Return events with every move dropped that a later move of the same touch
+    supersedes. Moves carry absolute positions, so only the newest one per touch
+    matters for the net delta; down/up events act as barriers for their touch.
+    Moves of pointer types in keep_types (tablet-mapped pens, whose every sample
+    is part of a stroke) are never dropped.
+    """
+    seen = set()
+    keep = []
+    for ev in reversed(events):
+        tid = ev.get('id')
+        if ev.get('type') == 'move' and ev.get('pointerType') not in keep_types:
+            if tid in seen:
+                continue
+            seen.add(tid)
+        else:
+            seen.discard(tid)
+        keep.append(ev)
+    keep.reverse()
+    return keep
+
+
+# Absolute tablet mode. A client can map a rectangle of its surface (in the same
+# scaled pixels its raw events carry) onto a rectangle of the virtual screen
+# with the 'tablet.config' socket event or POST /tablet. The mapping is reduced
+# once to an affine transform, x' = sx*x + ox and y' = sy*y + oy, clamped to the
+# target; events from the mapped pointer types (pens by default) then skip the
+# gesture recognizer, accelerators and position() reads: every sample is one
+# moveTo, and pen contact down/up press and release the left button.
+TABLET_POINTER_TYPES = ('pen',)
+
+
+def compile_tablet_mapping(surface, target=None, keep_aspect=True, pointer_types=TABLET_POINTER_TYPES):
+    """Return the (sx, ox, sy, oy, minX, maxX, minY, maxY, types) tuple mapping surface -> target.
+
+    surface and target are (left, top, width, height); target defaults to the
+    whole virtual screen and is clipped to it. keep_aspect letterboxes the
+    surface so strokes aren't stretched.
+    """
+    sl, stp, sw, sh = (float(v) for v in surface)
+    if sw <= 0 or sh <= 0:
+        raise ValueError('surface must have a positive size')
+    vl, vt, vr, vb = virtual_left, virtual_top, virtual_left + screen_width, virtual_top + screen_height
+    if target is None:
+        target = (vl, vt, screen_width, screen_height)
+    tl, tt, tw, th = (float(v) for v in target)
+    tl, tt = max(vl, tl), max(vt, tt)
+    tw, th = min(vr, tl + tw) - tl, min(vb, tt + th) - tt
+    if tw < 1 or th < 1:
+        raise ValueError('target is outside the screen')
+    sx = (tw - 1) / sw
+    sy = (th - 1) / sh
+    pad_x = pad_y = 0.0
+    if keep_aspect:
+        scale = min(sx, sy)
+        pad_x = ((tw - 1) - scale * sw) / 2.0
+        pad_y = ((th - 1) - scale * sh) / 2.0
+        sx = sy = scale
+    return (sx, tl + pad_x - sx * sl, sy, tt + pad_y - sy * stp, int(tl), int(tl + tw - 1), int(tt), int(tt + th - 1), frozenset(pointer_types))
+
+
+def _tablet_event(st, m, ev):
+    sx, ox, sy, oy, x0, x1, y0, y1, _ = m
+    x = int(sx * float(ev.get('x', 0)) + ox)
+    y = int(sy * float(ev.get('y', 0)) + oy)
+    x = x0 if x < x0 else x1 if x > x1 else x
+    y = y0 if y < y0 else y1 if y > y1 else y
+    etype = ev.get('type')
+    try:
+        inject_move_to(x, y)
+        if etype == 'down':
+            pyautogui.mouseDown()
+            st['tabletDown'] = True
+        elif etype == 'up':
+            pyautogui.mouseUp()
+            st['tabletDown'] = False
     except Exception as e:
-        print('process_raw_up error', e)
+        log_error('tablet', e, event=etype)
+
+
+def configure_tablet(sid_key, data):
+    """Apply a tablet.config request: {enabled, surface: [l, t, w, h], target? | monitor?, keepAspect?, pointerTypes?}."""
+    st = _get_touch_state(sid_key)
+    if st['tabletDown']:
+        try:
+            pyautogui.mouseUp()
+        except Exception:
+            pass
+        st['tabletDown'] = False
+    if not data.get('enabled', True):
+        st['tablet'] = None
+        return {'status': 'ok', 'enabled': False}
+    target = data.get('target')
+    if data.get('monitor') is not None:
+        # Monitors are numbered left to right (then top to bottom)
+        target = monitor_layout.monitors[int(data['monitor'])]
+    m = compile_tablet_mapping(data['surface'], target, bool(data.get('keepAspect', True)), data.get('pointerTypes') or TABLET_POINTER_TYPES)
+    st['tablet'] = m
+    return {'status': 'ok', 'enabled': True, 'target': [m[4], m[6], m[5] - m[4] + 1, m[7] - m[6] + 1]}
+
+
+@socketio.on('tablet.config')
+def on_tablet_config(data):
+    try:
+        return configure_tablet(_session_key(), data or {})
+    except Exception as e:
+        log_error('on_tablet_config', e, event='tablet.config')
+        return {'status': 'error', 'message': str(e)}
+
+
+@app.route('/tablet', methods=['POST'])
+def tablet_http():
+    try:
+        return jsonify(configure_tablet(_get_sid_for_http(), request.json or {}))
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+
+def dispatch_raw_events(events, sid_key, deadline=None):
+    """Apply events in order. Stops once time.time() passes `deadline` and returns how many were applied."""
+    st = touch_state.get(sid_key)
+    tablet = st['tablet'] if st is not None else None
+    for i, ev in enumerate(events):
+        if deadline is not None and (i & 15) == 15 and time.time() > deadline:
+            return i
+        if tablet is not None and ev.get('pointerType') in tablet[8]:
+            _tablet_event(st, tablet, ev)
+            continue
+        etype = ev.get('type')
+        if etype == 'down':
+            process_raw_down(ev, sid_key)
+        elif etype == 'move':
+            process_raw_move(ev, sid_key)
+        elif etype == 'up':
+            process_raw_up(ev, sid_key)
+    return len(events)
+
+
+def _dispatch_within_budget(events, sid_key, fs, deadline, keep_types):
+    done = dispatch_raw_events(events, sid_key, deadline)
+    if done < len(events):
+        fs['overBudget'] += 1
+        # Out of time: keep only what leaves the contacts right, no taps
+        rest = _shed_backlog(events[done:], _live_contacts(touch_state.get(sid_key)), keep_types, max_taps=0)
+        fs['shed'] += len(events) - done - len(rest)
+        dispatch_raw_events(rest, sid_key)
+
+
+def _lift_while_stopped(events, sid_key):
+    """Drop a batch during a corner stop, but still forget fingers that lifted."""
+    st = touch_state.get(sid_key)
+    if st is None or not st['touches']:
+        return
+    for ev in events:
+        if type(ev) is dict and ev.get('type') == 'up':
+            _remove_touch(st, ev.get('id'))
+    _update_gesture(st)
+    if not st['touches']:
+        st['tapPhase'] = 'idle'
+
+
+def process_raw_events(events, sid_key):
+    """Process a list of raw events for one connection with flow control.
+
+    Events that don't match RAW_EVENT_SCHEMA are rejected. Moves that are
+    older than the newest seq already processed, or that are superseded by a
+    newer move for the same touch in the same batch, are dropped. Returns an
+    ack dict when one is due, otherwise None.
+    """
+    if handoff_state['draining']:
+        # A successor already has our state; input now would be lost with us
+        return None
+    fs = _get_flow_state(sid_key)
+    t0 = time.time()
+    note_input(t0)
+    _get_touch_state(sid_key)['lastInput'] = t0
+    if pointer_state['owner'] == 'stopped' and pointer_base(t0) is None:
+        _lift_while_stopped(events, sid_key)
+        return None
+
+    fresh = []
+    last_seq = fs['lastSeq']
+    newest_seq = last_seq
+    newest_time = None
+    rejected = 0
+    for ev in events:
+        if not valid_message(RAW_EVENT_SCHEMA, ev):
+            rejected += 1
+            continue
+        seq = ev.get('seq')
+        if seq is not None:
+            if seq <= last_seq:
+                if ev.get('type') == 'move':
+                    continue
+                # A down/up numbered below what we've seen means the client
+                # restarted its counter (page reload on the same HTTP key)
+                last_seq = newest_seq = -1
+            if seq > newest_seq:
+                newest_seq = seq
+                newest_time = ev.get('time')
+        fresh.append(ev)
+    if rejected:
+        fs['rejected'] += rejected
+        reject_message('raw', rejected)
+    received = len(fresh)
+    st = touch_state.get(sid_key)
+    tablet = st['tablet'] if st is not None else None
+    keep_types = tablet[8] if tablet is not None else ()
+    if len(fresh) > 1:
+        fresh = _collapse_superseded_moves(fresh, keep_types)
+    kept = len(fresh)
+
+    # Admission: events beyond the batch cap or the token bucket are shed to their net effect
+    allowed = _take_tokens(fs, min(kept, RAW_MAX_BATCH), t0)
+    if allowed < kept:
+        head = fresh[:allowed]
+        tail = _shed_backlog(fresh[allowed:], _live_contacts(st, head), keep_types)
+        fs['shed'] += kept - allowed - len(tail)
+        # What survives shedding still costs tokens, paid off by later messages
+        fs['tokens'] -= len(tail)
+        fresh = head + tail
+    deadline = t0 + RAW_BATCH_BUDGET_MS / 1000.0
+
+    if relay_peers:
+        if relay_state['handback'] is not None:
+            _relay_resume()
+        if relay_state['peer'] is not None:
+            _relay_forward(fresh, sid_key)
+        else:
+            _dispatch_within_budget(fresh, sid_key, fs, deadline, keep_types)
+            _relay_check_edge(sid_key)
+    else:
+        _dispatch_within_budget(fresh, sid_key, fs, deadline, keep_types)
+
+    return _flow_update(fs, t0, received, kept, newest_seq, newest_time)
+
+
+def _flow_update(fs, t0, received, kept, newest_seq, newest_time):
+    """Account for one processed message (started at t0) and return an ack when due."""
+    t1 = time.time()
+    fs['lastSeq'] = newest_seq
+    fs['received'] += received
+    fs['dropped'] += received - kept
+    fs['sinceAck'] += received
+    # Smoothed handler cost per message
+    fs['procMs'] += (((t1 - t0) * 1000) - fs['procMs']) * 0.2
+
+    # Receive lag: client and server clocks differ, so track the smallest
+    # observed (server - client) offset as the zero-lag baseline and report
+    # how far the newest sample sits above it.
+    if newest_time is not None:
+        try:
+            offset = t0 * 1000 - float(newest_time)
+            base = fs['minOffset']
+            if base is not None:
+                base += (t0 - fs['minOffsetTime']) * LAG_OFFSET_DECAY_MS
+            if base is None or offset < base:
+                base = offset
+            fs['minOffset'] = base
+            fs['minOffsetTime'] = t0
+            fs['lagMs'] = offset - base
+        except (TypeError, ValueError):
+            pass
+
+    if fs['sinceAck'] >= ACK_INTERVAL_EVENTS or (t1 - fs['lastAckTime']) * 1000 >= ACK_INTERVAL_MS:
+        fs['sinceAck'] = 0
+        fs['lastAckTime'] = t1
+        return _flow_ack(fs)
+    return None
+
+
+def _emit_raw_ack(ack, sid):
+    if ack is None:
+        return
+    try:
+        socketio.emit('raw.ack', ack, to=sid)
+    except Exception:
+        pass
 
 
 @socketio.on('raw.down')
 def on_raw_down_socket(data):
     try:
-        sid = request.sid
-        process_raw_down(data, sid)
+        _emit_raw_ack(process_raw_events([data], _session_key()), request.sid)
     except Exception as e:
-        print('on_raw_down error', e)
+        log_error('on_raw_down', e, session=request.sid, event='raw.down')
 
 
 @socketio.on('raw.move')
 def on_raw_move_socket(data):
     try:
-        sid = request.sid
-        process_raw_move(data, sid)
+        _emit_raw_ack(process_raw_events([data], _session_key()), request.sid)
     except Exception as e:
-        print('on_raw_move error', e)
+        log_error('on_raw_move', e, session=request.sid, event='raw.move')
 
 
 @socketio.on('raw.up')
 def on_raw_up_socket(data):
     try:
-        sid = request.sid
-        process_raw_up(data, sid)
+        _emit_raw_ack(process_raw_events([data], _session_key()), request.sid)
     except Exception as e:
-        print('on_raw_up error', e)
+        log_error('on_raw_up', e, session=request.sid, event='raw.up')
 
 
 @socketio.on('raw.batch')
 def on_raw_batch_socket(events):
     """Efficiently handle a batch of raw events sent in one socket message."""
     try:
-        sid = request.sid
         if not isinstance(events, list):
             events = [events]
-        for ev in events:
-            etype = ev.get('type')
-            if etype == 'down':
-                process_raw_down(ev, sid)
-            elif etype == 'move':
-                process_raw_move(ev, sid)
-            elif etype == 'up':
-                process_raw_up(ev, sid)
+        _emit_raw_ack(process_raw_events(events, _session_key()), request.sid)
+    except Exception as e:
+        log_error('on_raw_batch', e, session=request.sid, event='raw.batch')
+
+
+# Intent protocol. Instead of streaming every finger sample for the server to
+# recognize, the client can run the gesture recognizer itself and send one
+# compact 'intent' message per animation frame: {seq, time, ops}, where ops is
+# a list of short arrays
+#   ['m', dx, dy]        net one-finger travel since the last message
+#   ['s', dy, speed]     two-finger scroll: average travel and its magnitude
+#   ['c', button, n]     click (n=2 double-click for the left button)
+#   ['h', 1] / ['h', 0]  start / end a double-tap-and-hold drag
+#   ['g', name]          gesture fired (one of INTENT_GESTURES)
+# The server only validates and injects, so acceleration, scroll scaling and
+# the hold watchdog still apply. Tap and swipe thresholds are sent to the client
+# with its 'session' event so both recognizers agree. Deltas aren't absolute, so
+# unlike raw moves no intent is ever dropped as stale. Raw events keep working;
+# pens in tablet mode always use them. TRACKPAD_PROTOCOL=raw stops offering the
+# intent protocol, and relay mode doesn't offer it because peers speak raw.
+# INTENT_MAX_OPS: ops beyond this in one message are rejected, like malformed ops
+# INTENT_MAX_DELTA: largest accepted |dx|, |dy| or scroll travel per op (client px)
+INTENT_GESTURES = ('swipe_up', 'swipe_down')
+INTENT_MAX_OPS = 64
+INTENT_MAX_DELTA = 2000.0
+INTENT_ENABLED = os.environ.get('TRACKPAD_PROTOCOL', 'intent').lower() != 'raw'
+
+
+def intent_config():
+    """Recognizer settings for intent clients, or None when raw events are required."""
+    if not INTENT_ENABLED or relay_peers:
+        return None
+    return {'tapTimeoutMs': TAP_TIMEOUT_MS, 'tapMoveThreshold': TAP_MOVE_THRESHOLD,
+            'doubleTapMaxIntervalMs': DOUBLE_TAP_MAX_INTERVAL_MS, 'doubleTapHoldTriggerMs': DOUBLE_TAP_HOLD_TRIGGER_MS,
+            'swipeTriggerDistance': SWIPE_TRIGGER_DISTANCE, 'rightClickSuppressMs': RIGHT_CLICK_SUPPRESS_MS,
+            'maxDelta': INTENT_MAX_DELTA}
+
+
+def _intent_delta(value):
+    v = float(value)
+    if not math.isfinite(v) or abs(v) > INTENT_MAX_DELTA:
+        raise ValueError(f'delta out of range: {value!r}')
+    return v
+
+
+def _intent_move(st, sid_key, dx, dy):
+    _gesture_pointer_move(st, _intent_delta(dx), _intent_delta(dy))
+
+
+def _intent_scroll(st, sid_key, dy, speed):
+    _scroll_by_finger(_intent_delta(dy), abs(_intent_delta(speed)))
+
+
+def _intent_click(st, sid_key, button, clicks=1):
+    if button == 'left':
+        if clicks == 2:
+            pyautogui.doubleClick()
+        elif clicks == 1:
+            pyautogui.click()
+        else:
+            raise ValueError(f'bad click count: {clicks!r}')
+    elif button == 'right':
+        pyautogui.rightClick()
+    elif button == 'middle':
+        pyautogui.middleClick()
+    else:
+        raise ValueError(f'bad button: {button!r}')
+
+
+def _intent_hold(st, sid_key, down):
+    if down:
+        if not st['doubleTapHoldActive']:
+            pyautogui.mouseDown()
+        st['doubleTapHoldActive'] = True
+        st['lastMouseDownTime'] = time.time() * 1000
+        st['lastMouseDownSid'] = sid_key
+    elif st['doubleTapHoldActive']:
+        st['doubleTapHoldActive'] = False
+        st['lastMouseDownTime'] = 0
+        drag_animator.settle()
+        pyautogui.mouseUp()
+
+
+def _intent_gesture(st, sid_key, name):
+    if name not in INTENT_GESTURES:
+        raise ValueError(f'unknown gesture: {name!r}')
+    run_action(name)
+
+
+INTENT_OPS = {'m': _intent_move, 's': _intent_scroll, 'c': _intent_click, 'h': _intent_hold, 'g': _intent_gesture}
+
+
+def process_intents(msg, sid_key):
+    """Validate and inject one intent message. Returns an ack dict when one is due."""
+    if handoff_state['draining']:
+        return None
+    fs = _get_flow_state(sid_key)
+    t0 = time.time()
+    note_input(t0)
+    if pointer_state['owner'] == 'stopped' and pointer_base(t0) is None:
+        return None
+    ops = msg.get('ops') if isinstance(msg, dict) else None
+    if not isinstance(ops, list):
+        ops = []
+    st = _get_touch_state(sid_key)
+    batch = ops[:INTENT_MAX_OPS]
+    rejected = len(ops) - len(batch)
+    allowed = _take_tokens(fs, len(batch), t0)
+    if allowed < len(batch):
+        merged = _shed_intents(batch)
+        fs['shed'] += len(batch) - len(merged)
+        batch = merged
+    kept = 0
+    for op in batch:
+        try:
+            INTENT_OPS[op[0]](st, sid_key, *op[1:])
+            kept += 1
+        except (KeyError, IndexError, TypeError, ValueError):
+            # Malformed op; reject it and carry on with the rest
+            rejected += 1
+        except Exception as e:
+            kept += 1
+            log_error('process_intents', e, session=sid_key, event='intent')
+    newest_seq = fs['lastSeq']
+    newest_time = None
+    seq = msg.get('seq') if isinstance(msg, dict) else None
+    # Same checks as the message schemas: True/False are not sequence numbers
+    if MESSAGE_FIELD_KINDS['int'](seq):
+        # A lower seq means the client restarted its counter
+        newest_seq = seq
+        newest_time = msg.get('time')
+        if newest_time is not None and not MESSAGE_FIELD_KINDS['time'](newest_time):
+            newest_time = None
+    if rejected:
+        fs['rejected'] += rejected
+        reject_message('intent', rejected)
+    # Ops merged away by shedding are counted as shed, not dropped
+    received = len(ops) - rejected
+    return _flow_update(fs, t0, received, received, newest_seq, newest_time)
+
+
+@socketio.on('intent')
+def on_intent_socket(msg):
+    try:
+        _emit_raw_ack(process_intents(msg, _session_key()), request.sid)
     except Exception as e:
-        print('on_raw_batch error', e)
+        log_error('on_intent', e, session=request.sid, event='intent')
+
+
+@app.route('/intent', methods=['POST'])
+def intent_http():
+    try:
+        sid_key = _get_sid_for_http()
+        ack = process_intents(request.json or {}, sid_key)
+        if ack is None:
+            ack = _flow_ack(_get_flow_state(sid_key))
+        return jsonify({'status': 'ok', 'ack': ack})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
 
 
 # Log socket connections for debugging
 @socketio.on('connect')
-def on_client_connect():
+def on_client_connect(auth=None):
+    if handoff_state['draining']:
+        # Make the client retry; the successor is accepting on the same port
+        return False
     try:
         sid = request.sid
         transport = None
@@ -740,35 +2651,29 @@ def on_client_connect():
             transport = request.environ.get('wsgi.websocket') is not None and 'websocket' or None
         except Exception:
             transport = None
-        print(f"Socket connected: sid={sid}")
+        token = auth.get('token') if isinstance(auth, dict) else None
+        token, resumed = _attach_session(sid, token)
+        log.info('Socket connected: sid=%s resumed=%s', sid, resumed)
+        socketio.emit('session', {'token': token, 'resumed': resumed, 'intent': intent_config()}, to=sid)
     except Exception as e:
-        print('connect handler error', e)
+        log_error('connect handler', e)
 
 
 @socketio.on('disconnect')
 def on_client_disconnect():
     try:
         sid = request.sid
-        print(f"Socket disconnected: sid={sid}")
-        # Clear any hold state for this client and release mouse if needed
+        log.info('Socket disconnected: sid=%s', sid)
         try:
-            st = touch_state.get(sid)
-            if st and st.get('doubleTapHoldActive'):
-                try:
-                    pyautogui.mouseUp()
-                except Exception:
-                    pass
-                st['doubleTapHoldActive'] = False
-            if st:
-                st['lastMouseDownTime'] = 0
-                st['lastMouseDownSid'] = None
-                st['doubleTapExpectHold'] = False
-                st['pendingDoubleTap'] = False
-                st['touches'] = {}
+            stop_preview(sid)
+            # Sessions keep their holds and contacts for SESSION_GRACE_S so a
+            # quick reconnect can pick them up; sockets without one clean up now
+            if not _detach_session(sid):
+                _end_session_state(sid)
         except Exception:
             pass
     except Exception as e:
-        print('disconnect handler error', e)
+        log_error('disconnect handler', e)
 
 
 def force_release_all_holds():
@@ -793,18 +2698,123 @@ def force_release_all_holds():
                     st['doubleTapHoldActive'] = False
                 st['lastMouseDownTime'] = 0
                 st['lastMouseDownSid'] = None
-                st['doubleTapExpectHold'] = False
-                st['pendingDoubleTap'] = False
+                st['tapPhase'] = 'idle'
             except Exception:
                 pass
     except Exception as e:
-        print('force_release_all_holds error', e)
+        log_error('force_release_all_holds', e)
+
+
+# Runtime tuning. The constants in TUNABLES are read on every event, so they can
+# change while clients stay connected. TRACKPAD_TUNING names a JSON file of
+# {"CONSTANT": number} overrides that is applied at startup and re-applied
+# whenever it changes (checked on the watchdog tick); POST /admin/tuning
+# (localhost only) applies overrides directly and GET returns current values.
+# Intent clients are sent the new recognizer settings.
+# name -> (type, min, max): values are coerced to the declared type (an int
+# constant only takes whole numbers) and must lie within [min, max].
+TUNABLES = {
+    'MOVE_MULTIPLIER': (float, 0.001, 100.0),
+    'BASE_SPEED_SCALE': (float, 0.0, 100.0),
+    'ACCEL_EXPONENT': (float, 0.1, 5.0),
+    'ACCELERATION_FACTOR': (float, 0.0, 10.0),
+    'ACCEL_CAP': (float, 0.01, 1000.0),
+    'SCROLL_MULTIPLIER': (float, 0.001, 100.0),
+    'SCROLL_ACCEL_FACTOR': (float, 0.0, 100.0),
+    'SCROLL_ACCEL_CAP': (float, 0.0, 100000.0),
+    'MIN_SCROLL_FRAC_TO_STEP': (float, 0.001, 1.0),
+    'MIN_MOVE_FRAC_TO_STEP': (float, 0.001, 1.0),
+    'TAP_TIMEOUT_MS': (int, 1, 5000),
+    'TAP_MOVE_THRESHOLD': (float, 0.0, 1000.0),
+    'DOUBLE_TAP_HOLD_TIMEOUT_MS': (int, 100, 600000),
+    'DOUBLE_TAP_MAX_INTERVAL_MS': (int, 1, 5000),
+    'DOUBLE_TAP_HOLD_TRIGGER_MS': (int, 0, 5000),
+    'SWIPE_TRIGGER_DISTANCE': (float, 1.0, 10000.0),
+    'RIGHT_CLICK_SUPPRESS_MS': (int, 0, 5000),
+    'DRAG_DURATION_S': (float, 0.0, DRAG_MAX_DURATION_S),
+    'DRAG_SMOOTH_S': (float, 0.0, 1.0),
+    'RAW_RATE_EVENTS_PER_S': (int, 1, 1000000),
+    'RAW_RATE_BURST': (int, 1, 1000000),
+    'RAW_MAX_BATCH': (int, 1, 100000),
+    'RAW_BATCH_BUDGET_MS': (float, 0.1, 1000.0),
+}
+TUNING_FILE = os.environ.get('TRACKPAD_TUNING')
+# mtime of TUNING_FILE when it was last applied
+tuning_state = {'mtime': None}
+
+
+def apply_tuning(values):
+    """Set tunable constants from a {name: number} dict. Returns the names changed.
+
+    Nothing is applied unless every entry is valid.
+    """
+    if not isinstance(values, dict):
+        raise ValueError('tuning must be a JSON object')
+    updates = {}
+    for name, value in values.items():
+        spec = TUNABLES.get(name)
+        if spec is None:
+            raise ValueError(f'{name} is not tunable')
+        kind, low, high = spec
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f'{name} must be a number')
+        if kind is int:
+            if value != int(value):
+                raise ValueError(f'{name} must be a whole number')
+            value = int(value)
+        else:
+            value = float(value)
+        if not low <= value <= high:
+            raise ValueError(f'{name} must be between {low} and {high}')
+        updates[name] = value
+    changed = sorted(name for name, value in updates.items() if globals()[name] != value)
+    globals().update(updates)
+    if changed:
+        log.info('Tuning applied: %s', ', '.join(f'{name}={updates[name]}' for name in changed))
+        try:
+            socketio.emit('intent.config', intent_config())
+        except Exception:
+            pass
+    return changed
+
+
+def check_tuning_file():
+    """Apply TUNING_FILE if it changed since it was last applied."""
+    if not TUNING_FILE:
+        return
+    try:
+        mtime = os.path.getmtime(TUNING_FILE)
+    except OSError:
+        return
+    if mtime == tuning_state['mtime']:
+        return
+    tuning_state['mtime'] = mtime
+    try:
+        with open(TUNING_FILE, encoding='utf-8') as f:
+            apply_tuning(json.load(f))
+    except Exception as e:
+        log.warning('Ignoring tuning file %s: %s', TUNING_FILE, e)
+
+
+@app.route('/admin/tuning', methods=['GET', 'POST'])
+def admin_tuning():
+    if not _is_local_request():
+        return jsonify({'status': 'error', 'message': 'tuning is only available from localhost'}), 403
+    try:
+        changed = apply_tuning(request.json or {}) if request.method == 'POST' else []
+        return jsonify({'status': 'ok', 'changed': changed, 'values': {name: globals()[name] for name in TUNABLES}})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+
+check_tuning_file()
 
 
 # Watchdog thread to auto-release stale holds in case clients disconnect or
 # fail to send mouseup events. Runs every 0.5s and releases holds that
 # exceeded DOUBLE_TAP_HOLD_TIMEOUT_MS.
 def _hold_watchdog_loop(interval=0.5):
+    next_monitor_check = time.time() + MONITOR_REFRESH_S
     while True:
         try:
             now_ms = time.time() * 1000
@@ -821,6 +2831,18 @@ def _hold_watchdog_loop(interval=0.5):
                             st['lastMouseDownSid'] = None
                 except Exception:
                     pass
+            # Piggyback on the watchdog tick to report rate-limited log summaries
+            # and to end sessions whose grace window ran out
+            flush_suppressed_logs()
+            expire_detached_sessions()
+            gc_idle_tick()
+            # Pick up monitors being plugged in, removed or rearranged
+            if time.time() >= next_monitor_check:
+                next_monitor_check = time.time() + MONITOR_REFRESH_S
+                if detect_screen_bounds():
+                    log.info('Monitor layout changed: %s', monitor_layout.monitors)
+                check_tuning_file()
+                check_source_changed()
         except Exception:
             pass
         try:
@@ -831,7 +2853,7 @@ def _hold_watchdog_loop(interval=0.5):
 
 # Start watchdog thread as a daemon so it doesn't block shutdown
 try:
-    watchdog_thread = threading.Thread(target=_hold_watchdog_loop, args=(), daemon=True)
+    watchdog_thread = threading.Thread(target=_hold_watchdog_loop, args=(), name='hold-watchdog', daemon=True)
     watchdog_thread.start()
 except Exception:
     pass
@@ -843,15 +2865,11 @@ def raw_http():
         data = request.json
         events = data if isinstance(data, list) else [data]
         sid_key = _get_sid_for_http()
-        for ev in events:
-            etype = ev.get('type')
-            if etype == 'down':
-                process_raw_down(ev, sid_key)
-            elif etype == 'move':
-                process_raw_move(ev, sid_key)
-            elif etype == 'up':
-                process_raw_up(ev, sid_key)
-        return jsonify({'status': 'ok'})
+        ack = process_raw_events(events, sid_key)
+        # HTTP clients get an ack on every response since there is no push channel
+        if ack is None:
+            ack = _flow_ack(_get_flow_state(sid_key))
+        return jsonify({'status': 'ok', 'ack': ack})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
@@ -860,42 +2878,17 @@ def raw_http():
 @socketio.on('taskview')
 def on_taskview(data):
     try:
-        # On Windows send Win+Tab; pyautogui.hotkey('winleft', 'tab') works
-        if platform.system() == 'Windows':
-            try:
-                _press_key_combo(['winleft'], 'tab')
-            except Exception:
-                try:
-                    _press_key_combo(['winleft'], 'tab')
-                except Exception as e:
-                    print('taskview fallback failed', e)
-        else:
-            # Non-Windows: attempt Alt+Tab as a reasonable default
-            try:
-                _press_key_combo(['alt'], 'tab')
-            except Exception:
-                pass
+        # Win+Tab on Windows, Alt+Tab elsewhere (see ACTIONS)
+        run_action('taskview')
     except Exception as e:
-        print('on_taskview error', e)
+        log_error('on_taskview', e, event='taskview')
 
 
 @app.route('/taskview', methods=['POST'])
 def taskview():
     try:
         # Mirror socket behavior for HTTP fallback
-        if platform.system() == 'Windows':
-            try:
-                _press_key_combo(['winleft'], 'tab')
-            except Exception:
-                try:
-                    _press_key_combo(['winleft'], 'tab')
-                except Exception as e:
-                    print('taskview fallback failed', e)
-        else:
-            try:
-                _press_key_combo(['alt'], 'tab')
-            except Exception:
-                pass
+        run_action('taskview')
         return jsonify({'status': 'ok'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -905,28 +2898,38 @@ def taskview():
 @socketio.on('taskview_exit')
 def on_taskview_exit(data):
     try:
-        # Send Escape to exit Task View; also ensure modifier keys are released
-        try:
-            _press_single_key('esc')
-        except Exception:
-            try:
-                _press_single_key('esc')
-            except Exception as e:
-                print('taskview_exit fallback failed', e)
+        # Send Escape to exit Task View
+        run_action('taskview_exit')
     except Exception as e:
-        print('on_taskview_exit error', e)
+        log_error('on_taskview_exit', e, event='taskview_exit')
 
 
 @app.route('/taskview_exit', methods=['POST'])
 def taskview_exit():
     try:
-        try:
-            _press_single_key('esc')
-        except Exception:
-            try:
-                _press_single_key('esc')
-            except Exception as e:
-                print('taskview_exit fallback failed', e)
+        run_action('taskview_exit')
+        return jsonify({'status': 'ok'})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+
+# Run any named action (built-in or from TRACKPAD_MACROS)
+@socketio.on('action')
+def on_action(data):
+    try:
+        name = (data or {}).get('name')
+        if not run_action(name):
+            log.info('Unknown action %r', name)
+    except Exception as e:
+        log_error('on_action', e, event='action')
+
+
+@app.route('/action', methods=['POST'])
+def action_http():
+    try:
+        name = (request.json or {}).get('name')
+        if not run_action(name):
+            return jsonify({'status': 'error', 'message': f'unknown action {name!r}'})
         return jsonify({'status': 'ok'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -939,31 +2942,32 @@ def on_mousedown(data):
         pyautogui.mouseDown()
         # mark server-side hold state for this socket so we can auto-release if needed
         try:
-            sid = request.sid
-            st = touch_state.setdefault(sid, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None})
+            sid = _session_key()
+            st = _get_touch_state(sid)
             st['doubleTapHoldActive'] = True
             st['lastMouseDownTime'] = time.time() * 1000
             st['lastMouseDownSid'] = sid
         except Exception:
             pass
     except Exception as e:
-        print('on_mousedown error', e)
+        log_error('on_mousedown', e, event='mousedown')
 
 
 @socketio.on('mouseup')
 def on_mouseup(data):
     try:
+        drag_animator.settle()
         pyautogui.mouseUp()
         try:
-            sid = request.sid
-            st = touch_state.setdefault(sid, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None})
+            sid = _session_key()
+            st = _get_touch_state(sid)
             st['doubleTapHoldActive'] = False
             st['lastMouseDownTime'] = 0
             st['lastMouseDownSid'] = None
         except Exception:
             pass
     except Exception as e:
-        print('on_mouseup error', e)
+        log_error('on_mouseup', e, event='mouseup')
 
 
 # Receive key events via socket
@@ -971,7 +2975,8 @@ def on_mouseup(data):
 def on_key(data):
     try:
         # data expected: { type: 'char'|'key', value: 'a' } or for key: {type:'key', key:'Enter'...}
-        if not data:
+        if not valid_message(KEY_SCHEMA, data):
+            reject_message('key')
             return
         if data.get('type') == 'char':
             ch = data.get('value')
@@ -1004,13 +3009,16 @@ def on_key(data):
             except Exception:
                 pass
     except Exception as e:
-        print('on_key error', e)
+        log_error('on_key', e, event='key')
 
 
 @app.route('/key', methods=['POST'])
 def http_key():
     try:
-        data = request.json or {}
+        data = request.json
+        if not valid_message(KEY_SCHEMA, data):
+            reject_message('key')
+            return jsonify({'status': 'error', 'message': 'invalid key message'}), 400
         # Mirror socket handler behavior
         if data.get('type') == 'char':
             ch = data.get('value')
@@ -1051,7 +3059,7 @@ def http_mousedown():
         pyautogui.mouseDown()
         try:
             sid_key = _get_sid_for_http()
-            st = touch_state.setdefault(sid_key, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None})
+            st = _get_touch_state(sid_key)
             st['doubleTapHoldActive'] = True
             st['lastMouseDownTime'] = time.time() * 1000
             st['lastMouseDownSid'] = sid_key
@@ -1065,10 +3073,11 @@ def http_mousedown():
 @app.route('/mouseup', methods=['POST'])
 def http_mouseup():
     try:
+        drag_animator.settle()
         pyautogui.mouseUp()
         try:
             sid_key = _get_sid_for_http()
-            st = touch_state.setdefault(sid_key, {'touches': {}, 'threeFingerAccumY': 0.0, 'threeFingerTriggeredUp': False, 'threeFingerTriggeredDown': False, 'doubleTapHoldActive': False, 'suppressMoveUntil': 0, 'lastMouseDownTime': 0, 'lastMouseDownSid': None})
+            st = _get_touch_state(sid_key)
             st['doubleTapHoldActive'] = False
             st['lastMouseDownTime'] = 0
             st['lastMouseDownSid'] = None
@@ -1082,39 +3091,977 @@ def http_mouseup():
 def drag_mouse():
     try:
         data = request.json
+        if not valid_message(DRAG_SCHEMA, data):
+            reject_message('drag')
+            return jsonify({'status': 'error', 'message': 'invalid drag message'}), 400
+        if data.get('cancel'):
+            drag_animator.cancel()
+            return jsonify({'status': 'success'})
         start_x = float(data.get('startX', 0))
         start_y = float(data.get('startY', 0))
         end_x = float(data.get('endX', 0))
         end_y = float(data.get('endY', 0))
+        duration = max(0.0, min(DRAG_MAX_DURATION_S, float(data.get('duration', DRAG_DURATION_S))))
         
-        # Get current mouse position
-        current_x, current_y = pyautogui.position()
-        
-        # Client should send already-scaled coordinates (or deltas). Apply raw drag delta.
-        pyautogui.drag(end_x - start_x, end_y - start_y, duration=0.1)
+        # Client should send already-scaled coordinates (or deltas). Apply raw drag
+        # delta; the animator runs it in the background so we return right away.
+        drag_animator.drag_by(end_x - start_x, end_y - start_y, duration)
         
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
-if __name__ == '__main__':
-    # Get the local IP address to display to user
+def _is_local_request():
+    try:
+        return request.remote_addr in ('127.0.0.1', '::1')
+    except Exception:
+        return False
+
+
+def _injector_stats():
+    if INJECTOR_MODE != 'process' or not hasattr(pyautogui, 'restarts'):
+        return {'mode': 'inline'}
+    ring = pyautogui._ring
+    return {'mode': 'process', 'alive': pyautogui.alive(), 'restarts': pyautogui.restarts, 'dropped': pyautogui.dropped,
+            'pending': ring.pending() if ring is not None else 0, 'heartbeatAgeS': round(time.time() - ring.heartbeat(), 3) if ring is not None else None}
+
+
+@app.route('/admin/stats')
+def admin_stats():
+    """Server-side view of per-connection flow control (localhost only)."""
+    if not _is_local_request():
+        return jsonify({'status': 'error', 'message': 'stats are only available from localhost'}), 403
+    try:
+        connections = {}
+        for sid_key, fs in list(flow_state.items()):
+            connections[sid_key] = {'received': fs['received'], 'dropped': fs['dropped'], 'shed': fs['shed'], 'throttled': fs['throttled'], 'overBudget': fs['overBudget'],
+                                    'rejected': fs['rejected'], 'lastSeq': fs['lastSeq'], 'lagMs': round(fs['lagMs'], 1), 'procMs': round(fs['procMs'], 3)}
+        return jsonify({
+            'status': 'ok',
+            'backend': INPUT_BACKEND,
+            'asyncMode': getattr(socketio, 'async_mode', None),
+            'connections': connections,
+            'received': sum(c['received'] for c in connections.values()),
+            'dropped': sum(c['dropped'] for c in connections.values()),
+            'shed': sum(c['shed'] for c in connections.values()),
+            'rejected': dict(rejected_messages),
+            'jsonCodec': 'orjson' if orjson is not None else 'json',
+            'gc': gc_report(),
+            'pointer': dict(pointer_stats, policy=POINTER_POLICY, owner=pointer_state['owner']),
+            'injected': dict(getattr(pyautogui, 'calls', {})),
+            'injector': _injector_stats(),
+            'monitors': [list(r) for r in monitor_layout.monitors],
+            'sessions': {'attached': sum(1 for v in sessions.values() if v['sid']), 'detached': sum(1 for v in sessions.values() if not v['sid'])},
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+
+# On-demand sampling profiler (localhost only). GET/POST /admin/profile?seconds=N
+# samples every OS thread's Python stack (request handlers, the hold watchdog,
+# the injection path) from a separate real thread via sys._current_frames(),
+# so nothing has to be restarted or instrumented. Under eventlet/gevent a
+# heartbeat task also runs on the hub; if it can't get scheduled for longer than
+# LOOP_STALL_THRESHOLD_MS, some handler blocked the hub, and the hub thread's
+# stack at that moment is reported as a stall event.
+# ?format=json (default) returns a summary with collapsed stacks and stalls,
+# ?format=collapsed returns flamegraph.pl-style collapsed stacks as text and
+# ?format=speedscope returns a file that https://www.speedscope.app/ opens.
+PROFILE_SAMPLE_INTERVAL_MS = 5
+PROFILE_MAX_SECONDS = 60
+LOOP_HEARTBEAT_MS = 10
+LOOP_STALL_THRESHOLD_MS = 50
+_profile_lock = threading.Lock()
+
+
+def _cooperative_sleep(seconds):
+    # Yield to the hub under eventlet/gevent instead of blocking every client
+    sleep = getattr(socketio, 'sleep', None)
+    if sleep is not None:
+        sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def _native_thread_class():
+    """Return an unpatched Thread class; the sampler must not be a greenlet."""
+    try:
+        import eventlet.patcher
+        return eventlet.patcher.original('threading').Thread
+    except Exception:
+        pass
+    try:
+        import gevent.monkey
+        return gevent.monkey.get_original('threading', 'Thread')
+    except Exception:
+        return threading.Thread
+
+
+def _frame_label(frame):
+    return f"{frame['name']} ({os.path.basename(frame['file'])}:{frame['line']})"
+
+
+def _sample_stacks(prof):
+    """Sampler thread body: fill prof['samples'] and prof['stalls']."""
+    me = threading.get_ident()
+    interval = prof['intervalMs'] / 1000.0
+    stall_threshold = (LOOP_HEARTBEAT_MS + LOOP_STALL_THRESHOLD_MS) / 1000.0
+    frame_index = prof['frameIndex']
+    frames = prof['frames']
+    samples = prof['samples']
+    hub_ident = prof['hubIdent']
+    start = time.perf_counter()
+    end = start + prof['seconds']
+    names = {}
+    names_refresh = 0.0
+    stall = None
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        if now >= names_refresh:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            names_refresh = now + 0.25
+        hub_stack = None
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            f = frame
+            while f is not None:
+                code = f.f_code
+                idx = frame_index.get(code)
+                if idx is None:
+                    idx = len(frames)
+                    frame_index[code] = idx
+                    frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+                stack.append(idx)
+                f = f.f_back
+            stack.reverse()
+            stack = tuple(stack)
+            samples.setdefault(names.get(ident, f'thread-{ident}'), []).append(stack)
+            if ident == hub_ident:
+                hub_stack = stack
+
+        beat = prof['beat']
+        if beat is not None:
+            if now - beat > stall_threshold:
+                if stall is None:
+                    stall = {'startMs': round((beat - start) * 1000, 1), 'durationMs': 0.0, 'stack': ';'.join(_frame_label(frames[i]) for i in hub_stack or ())}
+                    prof['stalls'].append(stall)
+                stall['durationMs'] = round((now - beat) * 1000, 1)
+            else:
+                stall = None
+        time.sleep(interval)
+    prof['elapsedMs'] = (time.perf_counter() - start) * 1000
+
+
+def _loop_heartbeat(prof):
+    while prof['running']:
+        prof['beat'] = time.perf_counter()
+        socketio.sleep(LOOP_HEARTBEAT_MS / 1000.0)
+
+
+def run_profile(seconds, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+    """Sample all threads for `seconds` and return the raw profile dict.
+
+    Must be called from a request handler: under eventlet/gevent that handler's
+    OS thread is the hub whose stalls we want to see.
+    """
+    prof = {'seconds': seconds, 'intervalMs': interval_ms, 'hubIdent': None, 'beat': None, 'running': True,
+            'frameIndex': {}, 'frames': [], 'samples': {}, 'stalls': [], 'elapsedMs': 0.0}
+    if getattr(socketio, 'async_mode', None) in ('eventlet', 'gevent'):
+        prof['hubIdent'] = threading.get_ident()
+        prof['beat'] = time.perf_counter()
+        socketio.start_background_task(_loop_heartbeat, prof)
+    sampler = _native_thread_class()(target=_sample_stacks, args=(prof,), name='profiler', daemon=True)
+    sampler.start()
+    try:
+        while sampler.is_alive():
+            _cooperative_sleep(0.05)
+    finally:
+        prof['running'] = False
+    return prof
+
+
+def profile_collapsed(prof):
+    """Collapsed stacks: one 'thread;outer;...;inner count' line per unique stack."""
+    frames = prof['frames']
+    counts = {}
+    for thread_name, stacks in prof['samples'].items():
+        for stack in stacks:
+            key = (thread_name, stack)
+            counts[key] = counts.get(key, 0) + 1
+    lines = []
+    for (thread_name, stack), count in counts.items():
+        lines.append(';'.join([thread_name] + [_frame_label(frames[i]) for i in stack]) + f' {count}')
+    lines.sort()
+    return '\n'.join(lines) + '\n'
+
+
+def profile_speedscope(prof):
+    """Speedscope 'sampled' profile document, one profile per thread."""
+    interval = prof['intervalMs']
+    profiles = []
+    for thread_name, stacks in sorted(prof['samples'].items()):
+        profiles.append({'type': 'sampled', 'name': thread_name, 'unit': 'milliseconds', 'startValue': 0, 'endValue': round(prof['elapsedMs'], 3),
+                         'samples': [list(s) for s in stacks], 'weights': [interval] * len(stacks)})
+    return {'$schema': 'https://www.speedscope.app/file-format-schema.json', 'name': 'Digital-Trackpad profile', 'exporter': 'Digital-Trackpad',
+            'activeProfileIndex': 0, 'shared': {'frames': prof['frames']}, 'profiles': profiles}
+
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    if not _is_local_request():
+        return jsonify({'status': 'error', 'message': 'profiling is only available from localhost'}), 403
+    try:
+        seconds = max(0.1, min(PROFILE_MAX_SECONDS, float(request.args.get('seconds', 5))))
+        interval_ms = max(1.0, float(request.args.get('interval_ms', PROFILE_SAMPLE_INTERVAL_MS)))
+        fmt = request.args.get('format', 'json')
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({'status': 'error', 'message': 'a profile is already running'}), 409
+    try:
+        prof = run_profile(seconds, interval_ms)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+    finally:
+        _profile_lock.release()
+
+    if fmt == 'collapsed':
+        return Response(profile_collapsed(prof), mimetype='text/plain')
+    if fmt == 'speedscope':
+        return Response(json.dumps(profile_speedscope(prof)), mimetype='application/json',
+                        headers={'Content-Disposition': 'attachment; filename=trackpad.speedscope.json'})
+    return jsonify({'status': 'ok', 'seconds': seconds, 'samples': sum(len(s) for s in prof['samples'].values()),
+                    'threads': sorted(prof['samples']), 'stalls': prof['stalls'], 'collapsed': profile_collapsed(prof)})
+
+
+# Relay mode: drive several host machines from one phone. This instance acts
+# as a hub; peers are other instances of this app placed around its screen,
+# configured as edge=url pairs, e.g.
+#   TRACKPAD_RELAY_PEERS="right=http://192.168.1.20:51273,left=http://192.168.1.21:51273"
+# When a one-finger move pushes the cursor past an edge that has a peer, the
+# hub stops injecting locally and forwards the raw event stream to that peer's
+# /relay endpoint; the peer's cursor enters from the facing edge at the same
+# relative position. When the peer's cursor is pushed back out of that facing
+# edge it answers with a handback and control returns to the hub.
+# Each peer has one persistent keep-alive connection and a sender thread;
+# events that arrive while a request is in flight are merged into the next one,
+# so the hub path only appends to a list and the wire sees one request per frame.
+# RELAY_EDGE_INSET: pixels inside the edge where a handed-off cursor appears
+# RELAY_TIMEOUT_S: a peer that doesn't answer within this hands control back
+RELAY_EDGE_INSET = 2
+RELAY_TIMEOUT_S = 2.0
+OPPOSITE_EDGE = {'left': 'right', 'right': 'left', 'top': 'bottom', 'bottom': 'top'}
+
+# peer: RelayPeer currently receiving input (None = local)
+# handback: (edge, fraction) set by a sender thread, applied on the next event
+# touches: sid_key -> {touch id: (x, y)} for fingers down while forwarding
+relay_state = {'peer': None, 'handback': None, 'touches': {}}
+
+
+class RelayPeer:
+    """Persistent, batching connection to one peer instance's /relay endpoint."""
+
+    def __init__(self, edge, url):
+        parts = urllib.parse.urlsplit(url)
+        self.edge = edge
+        self.return_edge = OPPOSITE_EDGE[edge]
+        self.url = url
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self._conn = None
+        self._pending = []
+        self._enter = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = _native_thread_class()(target=self._run, name=f'relay-{edge}', daemon=True)
+        self._thread.start()
+
+    def forward(self, events, enter=None):
+        with self._lock:
+            self._pending.extend(events)
+            if enter is not None:
+                self._enter = enter
+        self._wake.set()
+
+    def _post(self, body):
+        payload = json.dumps(body, separators=(',', ':'))
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=RELAY_TIMEOUT_S)
+            try:
+                self._conn.request('POST', '/relay', payload, {'Content-Type': 'application/json'})
+                resp = self._conn.getresponse()
+                return json.loads(resp.read() or b'{}')
+            except Exception:
+                # Keep-alive connections go stale; reconnect once before giving up
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                events, self._pending = self._pending, []
+                enter, self._enter = self._enter, None
+            if not events and enter is None:
+                continue
+            body = {'events': events, 'returnEdge': self.return_edge}
+            if enter is not None:
+                body['enter'] = enter
+            try:
+                res = self._post(body)
+            except Exception as e:
+                log_error('relay', e, peer=self.url)
+                # Don't strand the cursor on a host we can't reach
+                res = {'handback': {'frac': 0.5}}
+            handback = res.get('handback')
+            if handback is not None and relay_state['peer'] is self:
+                relay_state['peer'] = None
+                relay_state['handback'] = (self.edge, float(handback.get('frac', 0.5)))
+
+
+def _parse_relay_peers(spec):
+    peers = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            edge, url = item.split('=', 1)
+            edge = edge.strip().lower()
+            if edge not in OPPOSITE_EDGE:
+                raise ValueError(f'unknown edge {edge!r}')
+            peers[edge] = RelayPeer(edge, url.strip())
+        except Exception as e:
+            log.warning('Ignoring relay peer %r: %s', item, e)
+    return peers
+
+
+def _warp_to_edge(edge, frac):
+    """Place the cursor just inside `edge` at relative position `frac`."""
+    frac = max(0.0, min(1.0, frac))
+    if edge in ('left', 'right'):
+        x = virtual_left + RELAY_EDGE_INSET if edge == 'left' else virtual_left + screen_width - 1 - RELAY_EDGE_INSET
+        y = virtual_top + frac * (screen_height - 1)
+    else:
+        x = virtual_left + frac * (screen_width - 1)
+        y = virtual_top + RELAY_EDGE_INSET if edge == 'top' else virtual_top + screen_height - 1 - RELAY_EDGE_INSET
+    try:
+        inject_move_to(int(x), int(y))
+    except Exception:
+        pass
+
+
+def _release_session_hold(st):
+    if st.get('doubleTapHoldActive'):
+        try:
+            pyautogui.mouseUp()
+        except Exception:
+            pass
+        st['doubleTapHoldActive'] = False
+        st['lastMouseDownTime'] = 0
+        st['lastMouseDownSid'] = None
+
+
+def _relay_check_edge(sid_key):
+    st = touch_state.get(sid_key)
+    crossed = st.pop('edgeCrossed', None) if st is not None else None
+    if crossed is None:
+        return
+    peer = relay_peers.get(crossed[0])
+    if peer is None:
+        return
+    # Hand off: a drag can't span machines, so drop any hold, and re-create the
+    # fingers that are still down on the peer without letting them count as taps
+    _release_session_hold(st)
+    positions = {tid: (t['lastX'], t['lastY']) for tid, t in st['touches'].items()}
+    entry = [{'type': 'down', 'id': tid, 'x': x, 'y': y, 'handoff': True} for tid, (x, y) in positions.items()]
+    relay_state['touches'] = {sid_key: positions}
+    relay_state['peer'] = peer
+    _reset_contacts(st)
+    peer.forward(entry, enter={'edge': peer.return_edge, 'frac': crossed[1]})
+
+
+def _relay_forward(events, sid_key):
+    positions = relay_state['touches'].setdefault(sid_key, {})
+    for ev in events:
+        if ev.get('type') == 'up':
+            positions.pop(ev.get('id'), None)
+        else:
+            positions[ev.get('id')] = (ev.get('x', 0), ev.get('y', 0))
+    peer = relay_state['peer']
+    if peer is not None:
+        peer.forward(events)
+
+
+def _relay_resume():
+    """Take control back after a peer handed the cursor back to us."""
+    edge, frac = relay_state['handback']
+    relay_state['handback'] = None
+    _warp_to_edge(edge, frac)
+    touches, relay_state['touches'] = relay_state['touches'], {}
+    for sid_key, positions in touches.items():
+        st = _get_touch_state(sid_key)
+        _reset_contacts(st)
+        for tid, (x, y) in positions.items():
+            process_raw_down({'id': tid, 'x': x, 'y': y, 'handoff': True}, sid_key)
+
+
+@app.route('/relay', methods=['POST'])
+def relay_http():
+    """Peer side of relay mode: inject events forwarded by a hub."""
+    try:
+        data = request.json or {}
+        sid_key = f'relay:{request.remote_addr}'
+        st = _get_touch_state(sid_key)
+        enter = data.get('enter')
+        if enter:
+            _reset_contacts(st)
+            st.pop('edgeCrossed', None)
+            _warp_to_edge(enter.get('edge', 'left'), float(enter.get('frac', 0.5)))
+        dispatch_raw_events(data.get('events') or [], sid_key)
+        crossed = st.pop('edgeCrossed', None)
+        if crossed is not None and crossed[0] == data.get('returnEdge'):
+            _release_session_hold(st)
+            _reset_contacts(st)
+            return jsonify({'status': 'ok', 'handback': {'frac': crossed[1]}})
+        return jsonify({'status': 'ok'})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+
+relay_peers = _parse_relay_peers(os.environ.get('TRACKPAD_RELAY_PEERS', ''))
+
+
+# Live desktop preview. A client emits 'preview.start' {mode: 'desktop'|'cursor'}
+# and receives 'preview.frame' messages over its socket until 'preview.stop'.
+# Each captured frame is cut into PREVIEW_TILE-sized tiles and only tiles whose
+# pixels changed since the previous frame are re-encoded (WebP when Pillow has
+# it, JPEG otherwise) and sent. The client acks every frame; the round trip of
+# those acks drives adaptation: a slow link first lowers the frame rate, then
+# the resolution, and both recover once acks come back quickly again. At most
+# PREVIEW_MAX_INFLIGHT unacked frames are outstanding so frames never queue up.
+# Capture goes through a small interface (grab(bbox) -> PIL image) so
+# TRACKPAD_PREVIEW_SOURCE=synthetic can stand in for the screen on a headless box.
+PREVIEW_TILE = 64
+PREVIEW_MAX_FPS = 5.0
+PREVIEW_MIN_FPS = 0.5
+PREVIEW_MAX_WIDTH = 960      # full-desktop frames are scaled down to this width
+PREVIEW_MIN_SCALE = 0.25
+PREVIEW_REGION = (640, 400)  # capture size around the cursor in 'cursor' mode
+PREVIEW_QUALITY = 60
+PREVIEW_MAX_INFLIGHT = 2
+PREVIEW_ACK_TIMEOUT_S = 3.0  # give up on acks older than this
+PREVIEW_SOURCE = os.environ.get('TRACKPAD_PREVIEW_SOURCE', 'screen')
+
+# sid -> preview session dict
+preview_sessions = {}
+
+
+class ScreenCapture:
+    """Grab regions of the host desktop with Pillow's ImageGrab."""
+
+    def __init__(self):
+        from PIL import ImageGrab
+        self._grab = ImageGrab.grab
+        # Windows needs all_screens to see monitors beyond the primary one
+        self._all_screens = platform.system() == 'Windows'
+
+    def grab(self, bbox):
+        if self._all_screens:
+            return self._grab(bbox=bbox, all_screens=True)
+        return self._grab(bbox=bbox)
+
+
+class SyntheticCapture:
+    """Deterministic frames (a box sliding across a flat background) for headless testing."""
+
+    def __init__(self):
+        self.frame = 0
+
+    def grab(self, bbox):
+        from PIL import Image, ImageDraw
+        w = max(1, bbox[2] - bbox[0])
+        h = max(1, bbox[3] - bbox[1])
+        img = Image.new('RGB', (w, h), (32, 32, 48))
+        x = (self.frame * 8) % max(1, w - 40)
+        ImageDraw.Draw(img).rectangle([x, h // 3, x + 40, h // 3 + 40], fill=(220, 80, 60))
+        self.frame += 1
+        return img
+
+
+PREVIEW_CAPTURES = {'screen': ScreenCapture, 'synthetic': SyntheticCapture}
+
+
+class TileEncoder:
+    """Encode only the tiles of a frame that changed since the previous frame."""
+
+    def __init__(self, tile=PREVIEW_TILE, quality=PREVIEW_QUALITY):
+        self.tile = tile
+        self.quality = quality
+        self.size = None
+        self.digests = {}
+        try:
+            from PIL import features
+            self.format = 'WEBP' if features.check('webp') else 'JPEG'
+        except Exception:
+            self.format = 'JPEG'
+
+    def reset(self):
+        self.size = None
+        self.digests = {}
+
+    def encode(self, img):
+        """Return [(x, y, encoded bytes), ...] for dirty tiles; all tiles after a size change."""
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        if img.size != self.size:
+            self.size = img.size
+            self.digests = {}
+        w, h = img.size
+        tile = self.tile
+        digests = self.digests
+        out = []
+        for ty in range(0, h, tile):
+            for tx in range(0, w, tile):
+                crop = img.crop((tx, ty, min(tx + tile, w), min(ty + tile, h)))
+                digest = zlib.crc32(crop.tobytes())
+                if digests.get((tx, ty)) == digest:
+                    continue
+                digests[(tx, ty)] = digest
+                buf = io.BytesIO()
+                crop.save(buf, self.format, quality=self.quality)
+                out.append((tx, ty, buf.getvalue()))
+        return out
+
+
+def _run_blocking(fn, *args):
+    """Run a CPU/IO-heavy call without stalling the eventlet/gevent hub."""
+    mode = getattr(socketio, 'async_mode', None)
+    if mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(fn, *args)
+    if mode == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
+
+def _preview_bbox(ps):
+    if ps['mode'] == 'cursor':
+        rw = min(PREVIEW_REGION[0], screen_width)
+        rh = min(PREVIEW_REGION[1], screen_height)
+        cx, cy = pyautogui.position()
+        left = max(virtual_left, min(virtual_left + screen_width - rw, int(cx - rw // 2)))
+        top = max(virtual_top, min(virtual_top + screen_height - rh, int(cy - rh // 2)))
+        return (left, top, left + rw, top + rh)
+    return (virtual_left, virtual_top, virtual_left + screen_width, virtual_top + screen_height)
+
+
+def _preview_capture_frame(ps, capture):
+    bbox = _preview_bbox(ps)
+    img = capture.grab(bbox)
+    w, h = img.size
+    scale = ps['scale']
+    if ps['mode'] == 'desktop':
+        scale *= min(1.0, PREVIEW_MAX_WIDTH / float(max(1, w)))
+    if scale < 1.0:
+        img = img.resize((max(1, int(w * scale)), max(1, int(h * scale))))
+    return bbox, img, ps['encoder'].encode(img)
+
+
+def _preview_loop(sid, ps):
+    try:
+        capture = PREVIEW_CAPTURES.get(PREVIEW_SOURCE, ScreenCapture)()
+    except Exception as e:
+        log_error('preview capture', e, session=sid)
+        socketio.emit('preview.error', {'message': str(e)}, to=sid)
+        return
+    while ps['running']:
+        t0 = time.time()
+        if ps['frame'] - ps['acked'] >= PREVIEW_MAX_INFLIGHT:
+            oldest = min(ps['sentAt'].values(), default=0)
+            if t0 - oldest > PREVIEW_ACK_TIMEOUT_S:
+                ps['acked'] = ps['frame']
+                ps['sentAt'].clear()
+                ps['sentBytes'].clear()
+        if ps['frame'] - ps['acked'] < PREVIEW_MAX_INFLIGHT:
+            try:
+                bbox, img, tiles = _run_blocking(_preview_capture_frame, ps, capture)
+                if tiles:
+                    ps['frame'] += 1
+                    ps['sentAt'][ps['frame']] = time.time()
+                    ps['sentBytes'][ps['frame']] = sum(len(t[2]) for t in tiles)
+                    socketio.emit('preview.frame', {
+                        'frame': ps['frame'], 'width': img.size[0], 'height': img.size[1], 'bbox': list(bbox),
+                        'format': ps['encoder'].format.lower(), 'kbps': round(ps['bps'] * 8 / 1000, 1), 'tiles': [{'x': x, 'y': y, 'data': data} for x, y, data in tiles],
+                    }, to=sid)
+            except Exception as e:
+                log_error('preview', e, session=sid)
+        socketio.sleep(max(0.0, 1.0 / ps['fps'] - (time.time() - t0)))
+
+
+def _preview_adapt(ps, rtt):
+    """Adjust frame rate and scale from one frame's ack round trip."""
+    interval = 1.0 / ps['fps']
+    if rtt > interval * 1.5:
+        ps['fastAcks'] = 0
+        if ps['fps'] > PREVIEW_MIN_FPS:
+            ps['fps'] = max(PREVIEW_MIN_FPS, ps['fps'] * 0.7)
+        elif ps['scale'] > PREVIEW_MIN_SCALE:
+            ps['scale'] = max(PREVIEW_MIN_SCALE, ps['scale'] * 0.8)
+            ps['encoder'].reset()
+    elif rtt < interval * 0.5:
+        ps['fastAcks'] += 1
+        if ps['fastAcks'] >= 5:
+            ps['fastAcks'] = 0
+            if ps['scale'] < 1.0:
+                ps['scale'] = min(1.0, ps['scale'] * 1.25)
+                ps['encoder'].reset()
+            elif ps['fps'] < ps['maxFps']:
+                ps['fps'] = min(ps['maxFps'], ps['fps'] * 1.25)
+
+
+def stop_preview(sid):
+    ps = preview_sessions.pop(sid, None)
+    if ps is not None:
+        ps['running'] = False
+
+
+@socketio.on('preview.start')
+def on_preview_start(data):
+    try:
+        sid = request.sid
+        data = data or {}
+        stop_preview(sid)
+        max_fps = max(PREVIEW_MIN_FPS, min(PREVIEW_MAX_FPS, float(data.get('maxFps', PREVIEW_MAX_FPS))))
+        ps = {'mode': 'cursor' if data.get('mode') == 'cursor' else 'desktop', 'running': True, 'fps': max_fps, 'maxFps': max_fps,
+              'scale': 1.0, 'frame': 0, 'acked': 0, 'sentAt': {}, 'sentBytes': {}, 'fastAcks': 0, 'bps': 0.0, 'encoder': TileEncoder()}
+        preview_sessions[sid] = ps
+        socketio.start_background_task(_preview_loop, sid, ps)
+    except Exception as e:
+        log_error('on_preview_start', e, session=request.sid, event='preview.start')
+
+
+@socketio.on('preview.ack')
+def on_preview_ack(data):
+    try:
+        ps = preview_sessions.get(request.sid)
+        if ps is None:
+            return
+        frame = int((data or {}).get('frame', 0))
+        sent = ps['sentAt'].pop(frame, None)
+        nbytes = ps['sentBytes'].pop(frame, 0)
+        if frame > ps['acked']:
+            ps['acked'] = frame
+        if sent is not None:
+            rtt = max(1e-3, time.time() - sent)
+            ps['bps'] += (nbytes / rtt - ps['bps']) * 0.3
+            _preview_adapt(ps, rtt)
+        # Frames older than the newest ack will never be acked individually
+        for stale in [f for f in ps['sentAt'] if f < ps['acked']]:
+            ps['sentAt'].pop(stale, None)
+            ps['sentBytes'].pop(stale, None)
+    except Exception as e:
+        log_error('on_preview_ack', e, session=request.sid, event='preview.ack')
+
+
+@socketio.on('preview.stop')
+def on_preview_stop(data=None):
+    try:
+        stop_preview(request.sid)
+    except Exception as e:
+        log_error('on_preview_stop', e, session=request.sid, event='preview.stop')
+
+
+
+# Hot restart. With TRACKPAD_HOT_RESTART=1 the server binds its own listening
+# socket and can hand it, together with its session state, to a fresh copy of
+# itself, so a restart costs clients one quick reconnect instead of their held
+# buttons and drags. A restart is triggered by POST /admin/restart (localhost
+# only), by SIGHUP on POSIX, or, when running from source, by saving app.py or
+# injector.py (this replaces the debug reloader, which restarts cold).
+# Handoff over an authenticated loopback connection:
+#   1. the old server starts the successor with TRACKPAD_HANDOFF=host:port and
+#      TRACKPAD_HANDOFF_KEY set; it keeps serving while the successor imports
+#   2. the successor connects back and sends its pid
+#   3. the old server sends the listening socket (inherited on POSIX,
+#      socket.share() on Windows), stops accepting and taking input, and sends
+#      a snapshot of the sessions and per-connection touch state
+#   4. the successor restores the state, answers 'ready' and accepts on the same
+#      socket; connections that queued in its backlog meanwhile are kept
+#   5. the old server gives requests in flight HANDOFF_DRAIN_S to finish and
+#      exits; clients reconnect and resume
+# Only the threading (werkzeug) server can stop accepting from outside; under
+# eventlet/gevent the old server keeps accepting until it exits and refuses
+# what it gets (503, rejected socket connects), which clients retry.
+# If the successor fails to start or answer within HANDOFF_TIMEOUT_S, the old
+# server carries on.
+HOT_RESTART = os.environ.get('TRACKPAD_HOT_RESTART', '').lower() in ('1', 'true', 'yes')
+HANDOFF_TIMEOUT_S = 60.0
+HANDOFF_DRAIN_S = 0.2
+
+# listener: the socket we accept on in hot-restart mode
+# server: the werkzeug server accepting on it, so a handoff can stop it
+# restarting: a handoff is in progress
+# draining: state went to the successor; input and new connections are refused
+# sources: {path: mtime} of the source files watched for changes
+handoff_state = {'listener': None, 'server': None, 'restarting': False, 'draining': False, 'sources': None}
+
+
+def bind_listener(host, port):
     import socket
-    hostname = socket.gethostname()
-    local_ip = socket.gethostbyname(hostname)
-    
-    print(f"Starting trackpad server...")
-    print(f"Access from your phone at: http://{local_ip}:51273")
-    print(f"Or access locally at: http://localhost:51273")
-    print(f"Virtual screen detected: left={virtual_left}, top={virtual_top}, size={screen_width}x{screen_height}")
-    
-    # Run with SocketIO so WebSocket support is enabled. If eventlet/gevent isn't installed
-    # this will still work with the default development server for HTTP fallback.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if platform.system() != 'Windows':
+        # On Windows SO_REUSEADDR would let another process take over the port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    return sock
+
+
+def serve_on(sock):
+    """Serve the app on an already listening socket with the active async mode.
+
+    With the werkzeug server this returns once a handoff stopped accepting.
+    """
+    mode = getattr(socketio, 'async_mode', None)
+    if mode == 'eventlet':
+        import eventlet.greenio
+        import eventlet.wsgi
+        eventlet.wsgi.server(eventlet.greenio.GreenSocket(sock), app, log_output=False)
+    elif mode == 'gevent':
+        import gevent.socket
+        from gevent import pywsgi
+        try:
+            from geventwebsocket.handler import WebSocketHandler
+            kwargs = {'handler_class': WebSocketHandler}
+        except ImportError:
+            kwargs = {}
+        pywsgi.WSGIServer(gevent.socket.socket(fileno=sock.detach()), app, log=None, **kwargs).serve_forever()
+    else:
+        from werkzeug.serving import make_server
+        host, port = sock.getsockname()[:2]
+        server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+        handoff_state['server'] = server
+        try:
+            # Short poll so a handoff stops accepting promptly
+            server.serve_forever(poll_interval=0.05)
+        finally:
+            handoff_state['server'] = None
+            server.server_close()
+
+
+def export_session_state():
+    """Snapshot of what a successor needs to resume every session."""
+    # Socket-only connections (keyed by a bare sid) can't be resumed elsewhere
+    touch = {}
+    for key, st in list(touch_state.items()):
+        if ':' in key:
+            st = dict(st)
+            st.pop('edgeCrossed', None)
+            touch[key] = st
+    return {'sessions': list(sessions), 'touch': touch, 'scroll': (scroll_accum_x, scroll_accum_y), 'move': (move_accum_x, move_accum_y)}
+
+
+def import_session_state(state):
+    """Restore a predecessor's snapshot. Sessions start detached and get SESSION_GRACE_S to come back."""
+    global scroll_accum_x, scroll_accum_y, move_accum_x, move_accum_y
+    now = time.time()
+    for token in state.get('sessions', ()):
+        sessions[token] = {'sid': None, 'detachedAt': now}
+    for key, old in state.get('touch', {}).items():
+        # Keys added by a newer version keep their defaults
+        st = _new_touch_state()
+        st.update((k, v) for k, v in old.items() if k in st)
+        if st['doubleTapHoldActive']:
+            # The button is still physically down; restart the hold timeout
+            st['lastMouseDownTime'] = now * 1000
+        touch_state[key] = st
+    scroll_accum_x, scroll_accum_y = state.get('scroll', (0.0, 0.0))
+    move_accum_x, move_accum_y = state.get('move', (0.0, 0.0))
+
+
+def _successor_command():
+    if getattr(sys, 'frozen', False):
+        return [sys.executable] + sys.argv[1:]
+    return [sys.executable] + sys.argv
+
+
+def _send_listener(conn, sock, pid):
+    # POSIX successors inherit the descriptor (Popen pass_fds) and only need its number
+    conn.send(sock.share(pid) if platform.system() == 'Windows' else sock.fileno())
+
+
+def _recv_listener(conn):
+    import socket
+    if platform.system() == 'Windows':
+        return socket.fromshare(conn.recv())
+    return socket.socket(fileno=conn.recv())
+
+
+def _recv_within(conn, timeout):
+    if not conn.poll(timeout):
+        raise RuntimeError('no answer within %gs' % timeout)
+    return conn.recv()
+
+
+def _handoff_to_successor():
+    import socket
+    import subprocess
+    from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+    key = secrets.token_bytes(32)
+    control = socket.create_server(('127.0.0.1', 0))
+    control.settimeout(0.5)
+    proc = None
     try:
-        socketio.run(app, host='0.0.0.0', port=51273, debug=True, log_output=False)
+        env = dict(os.environ, TRACKPAD_HANDOFF='%s:%d' % control.getsockname()[:2], TRACKPAD_HANDOFF_KEY=key.hex())
+        inherit = () if platform.system() == 'Windows' else (handoff_state['listener'].fileno(),)
+        proc = subprocess.Popen(_successor_command(), env=env, pass_fds=inherit)
+        deadline = time.time() + HANDOFF_TIMEOUT_S
+        while True:
+            try:
+                csock, _ = control.accept()
+                break
+            except socket.timeout:
+                if proc.poll() is not None or time.time() > deadline:
+                    raise RuntimeError('successor did not start')
+        # Connection needs a blocking descriptor; timeouts come from _recv_within
+        csock.setblocking(True)
+        conn = Connection(csock.detach())
+        try:
+            deliver_challenge(conn, key)
+            answer_challenge(conn, key)
+            _send_listener(conn, handoff_state['listener'], _recv_within(conn, HANDOFF_TIMEOUT_S))
+            # New connections wait in the shared backlog for the successor
+            server = handoff_state['server']
+            if server is not None:
+                server.shutdown()
+            # Freeze input from here on so the snapshot stays exact
+            handoff_state['draining'] = True
+            try:
+                drag_animator.settle()
+            except Exception:
+                pass
+            conn.send(export_session_state())
+            if _recv_within(conn, HANDOFF_TIMEOUT_S) != 'ready':
+                raise RuntimeError('successor rejected the handoff')
+        finally:
+            conn.close()
+        return True
+    except Exception as e:
+        handoff_state['draining'] = False
+        log_error('hot restart', e)
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+        return False
+    finally:
+        control.close()
+
+
+def _exit_after_handoff():
+    time.sleep(HANDOFF_DRAIN_S)
+    log.info('Handed over to the new server; exiting')
+    # The successor owns held buttons now, so skip anything that would release
+    # them; only stop our injector process and flush the log
+    try:
+        if hasattr(pyautogui, 'close'):
+            pyautogui.close()
     except Exception:
-        # request_handler can't be passed through here reliably, rely on the monkey-patch above
-        app.run(host='0.0.0.0', port=51273, debug=True)
+        pass
+    try:
+        if _log_listener is not None:
+            _log_listener.stop()
+    except Exception:
+        pass
+    os._exit(0)
+
+
+def _hot_restart_worker():
+    try:
+        if _handoff_to_successor():
+            _exit_after_handoff()
+    finally:
+        handoff_state['restarting'] = False
+
+
+def hot_restart():
+    """Start handing this server over to a fresh process. Returns False if that isn't possible now."""
+    if handoff_state['listener'] is None or handoff_state['restarting']:
+        return False
+    handoff_state['restarting'] = True
+    log.info('Hot restart: starting a new server process')
+    # A real thread: the handshake blocks, which must not stall the eventlet/gevent hub
+    _native_thread_class()(target=_hot_restart_worker, name='hot-restart', daemon=True).start()
+    return True
+
+
+def take_over_from_predecessor(address, key):
+    """Successor side of the handoff. Returns the inherited listening socket."""
+    import socket
+    from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+    host, port = address.rsplit(':', 1)
+    csock = socket.create_connection((host, int(port)), timeout=HANDOFF_TIMEOUT_S)
+    csock.setblocking(True)
+    conn = Connection(csock.detach())
+    try:
+        key = bytes.fromhex(key)
+        answer_challenge(conn, key)
+        deliver_challenge(conn, key)
+        conn.send(os.getpid())
+        sock = _recv_listener(conn)
+        import_session_state(conn.recv())
+        conn.send('ready')
+    finally:
+        conn.close()
+    return sock
+
+
+def _source_mtimes():
+    here = os.path.dirname(os.path.abspath(__file__))
+    mtimes = {}
+    for name in ('app.py', 'injector.py'):
+        try:
+            mtimes[name] = os.path.getmtime(os.path.join(here, name))
+        except OSError:
+            pass
+    return mtimes
+
+
+def check_source_changed():
+    """In hot-restart mode, hand over to a new process when the source was edited."""
+    if handoff_state['listener'] is None or getattr(sys, 'frozen', False):
+        return
+    mtimes = _source_mtimes()
+    if handoff_state['sources'] is None:
+        handoff_state['sources'] = mtimes
+    elif mtimes != handoff_state['sources']:
+        handoff_state['sources'] = mtimes
+        hot_restart()
+
+
+@app.before_request
+def _refuse_while_draining():
+    if handoff_state['draining']:
+        return jsonify({'status': 'error', 'message': 'server is restarting'}), 503
+
+
+@app.route('/admin/restart', methods=['POST'])
+def admin_restart():
+    if not _is_local_request():
+        return jsonify({'status': 'error', 'message': 'restart is only available from localhost'}), 403
+    if not HOT_RESTART:
+        return jsonify({'status': 'error', 'message': 'start the server with TRACKPAD_HOT_RESTART=1'}), 400
+    if not hot_restart():
+        return jsonify({'status': 'error', 'message': 'a restart is already in progress'}), 409
+    return jsonify({'status': 'ok'})
 
 
 @app.route('/versions')
@@ -1127,7 +4074,52 @@ def versions():
         return jsonify({
             'python-socketio': getattr(pysocketio, '__version__', 'unknown'),
             'python-engineio': getattr(pyengineio, '__version__', 'unknown'),
-            'flask-socketio': getattr(flasksocketio, '__version__', 'unknown')
+            'flask-socketio': getattr(flasksocketio, '__version__', 'unknown'),
+            'asyncMode': getattr(socketio, 'async_mode', None),
+            'asyncBench': async_bench,
         })
     except Exception as e:
-        return jsonify({'error': str(e)})
\ No newline at end of file
+        return jsonify({'error': str(e)})
+
+
+if __name__ == '__main__':
+    import signal
+
+    # Get the local IP address to display to user
+    import socket
+    hostname = socket.gethostname()
+    local_ip = socket.gethostbyname(hostname)
+    
+    print(f"Starting trackpad server...")
+    print(f"Access from your phone at: http://{local_ip}:{PORT}")
+    print(f"Or access locally at: http://localhost:{PORT}")
+    print(f"Virtual screen detected: left={virtual_left}, top={virtual_top}, size={screen_width}x{screen_height}")
+    print('Monitors: ' + ', '.join(f'{w}x{h}+{x}+{y}' for x, y, w, h in monitor_layout.monitors))
+    if relay_peers:
+        print('Relay peers: ' + ', '.join(f'{edge}={peer.url}' for edge, peer in relay_peers.items()))
+    freeze_startup_objects()
+    
+    if HOT_RESTART:
+        handoff = os.environ.pop('TRACKPAD_HANDOFF', None)
+        if handoff:
+            listener = take_over_from_predecessor(handoff, os.environ.pop('TRACKPAD_HANDOFF_KEY', ''))
+            print(f'Took over from the previous server with {len(sessions)} session(s)')
+        else:
+            listener = bind_listener('0.0.0.0', PORT)
+        handoff_state['listener'] = listener
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: hot_restart())
+        while True:
+            serve_on(listener)
+            # Stopped for a handoff: it either exits this process or fails,
+            # in which case we take connections again
+            while handoff_state['restarting']:
+                time.sleep(0.05)
+
+    # Run with SocketIO so WebSocket support is enabled. If eventlet/gevent isn't installed
+    # this will still work with the default development server for HTTP fallback.
+    try:
+        socketio.run(app, host='0.0.0.0', port=PORT, debug=True, log_output=False)
+    except Exception:
+        # request_handler can't be passed through here reliably, rely on the monkey-patch above
+        app.run(host='0.0.0.0', port=PORT, debug=True)
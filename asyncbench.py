@@ -0,0 +1,276 @@
+"""Startup micro-benchmark of the Socket.IO async backends.
+
+With TRACKPAD_ASYNC_BENCH=1 the server doesn't take the first async mode that
+imports. It runs each candidate in its own short-lived child process, so one
+backend's hub and threads can't skew the next one. It then starts with the
+fastest backend. Each child:
+
+    1. starts a Flask-SocketIO server with that async_mode on a loopback
+       port, the way app.py does. app.py doesn't monkey-patch, and neither
+       does the child. Modes the installed Flask-SocketIO rejects fail here
+       and drop out.
+    2. connects a minimal Socket.IO client over a real websocket from a plain
+       OS thread and emits small 'bench' events with acks, like the phone does
+    3. message round trip: emit until the ack arrives
+       dispatch latency: emit until the event handler starts running
+
+and prints one JSON line with the medians and p99s in microseconds. The
+score is the median round trip. The choice is cached per environment:
+interpreter, platform, frozen build and library versions. It only runs
+again after one of those changes, or with TRACKPAD_ASYNC_BENCH=rerun.
+"""
+import base64
+import hashlib
+import json
+import os
+import platform
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_ROUNDS = 1000
+BENCH_WARMUP = 100
+# A child that hasn't reported by then is treated as failed
+BENCH_TIMEOUT_S = 20.0
+CHILD_ENV = 'TRACKPAD_ASYNC_BENCH_CHILD'
+# Bump when the measurement changes so older cached choices are re-measured
+BENCH_METHOD = 'socketio-websocket-ack'
+# Libraries whose versions decide which backend wins
+VERSIONED = ('eventlet', 'gevent', 'greenlet', 'python-engineio', 'python-socketio', 'flask-socketio', 'simple-websocket', 'werkzeug')
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return round(samples[len(samples) // 2] * 1e6, 1), round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1)
+
+
+class _WebSocketClient:
+    """Just enough of a websocket client (RFC 6455 text frames) to talk Engine.IO."""
+
+    def __init__(self, port):
+        deadline = time.time() + BENCH_TIMEOUT_S / 2
+        while True:
+            try:
+                self.sock = socket.create_connection(('127.0.0.1', port), timeout=BENCH_TIMEOUT_S)
+                break
+            except OSError:
+                # The server may still be starting
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        self.sock.sendall((f'GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'
+                           f'Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n').encode('ascii'))
+        self.buf = b''
+        while b'\r\n\r\n' not in self.buf:
+            self._fill()
+        head, self.buf = self.buf.split(b'\r\n\r\n', 1)
+        if b' 101 ' not in head.split(b'\r\n', 1)[0]:
+            raise RuntimeError('websocket upgrade refused: ' + head.split(b'\r\n', 1)[0].decode('latin-1'))
+
+    def _fill(self):
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError('server closed the connection')
+        self.buf += data
+
+    def _take(self, n):
+        while len(self.buf) < n:
+            self._fill()
+        out, self.buf = self.buf[:n], self.buf[n:]
+        return out
+
+    def _send_frame(self, opcode, payload):
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            head = struct.pack('!BB', 0x80 | opcode, 0x80 | n)
+        elif n < 65536:
+            head = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, n)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, n)
+        self.sock.sendall(head + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    def send(self, text):
+        self._send_frame(0x1, text.encode('utf-8'))
+
+    def recv(self):
+        while True:
+            b0, b1 = self._take(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack('!H', self._take(2))[0]
+            elif n == 127:
+                n = struct.unpack('!Q', self._take(8))[0]
+            payload = self._take(n)
+            opcode = b0 & 0x0F
+            if opcode == 0x1:
+                return payload.decode('utf-8')
+            if opcode == 0x8:
+                raise ConnectionError('server closed the websocket')
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+
+    def recv_packet(self):
+        """Next Engine.IO packet, answering server pings along the way."""
+        while True:
+            packet = self.recv()
+            if packet == '2':
+                self.send('3')
+                continue
+            return packet
+
+    def close(self):
+        self.sock.close()
+
+
+def _bench_client(port, arrivals):
+    ws = _WebSocketClient(port)
+    try:
+        if not ws.recv_packet().startswith('0'):
+            raise RuntimeError('no Engine.IO open packet')
+        ws.send('40')
+        if not ws.recv_packet().startswith('40'):
+            raise RuntimeError('Socket.IO connect refused')
+        rtts = []
+        dispatch = []
+        for i in range(BENCH_WARMUP + BENCH_ROUNDS):
+            t0 = time.perf_counter()
+            ws.send(f'42{i}["bench",{i}]')
+            ack = f'43{i}'
+            while not ws.recv_packet().startswith(ack):
+                pass
+            t1 = time.perf_counter()
+            if i >= BENCH_WARMUP:
+                rtts.append(t1 - t0)
+                dispatch.append(arrivals.pop(i) - t0)
+        return rtts, dispatch
+    finally:
+        ws.close()
+
+
+def run_benchmark(mode):
+    # Set the server up exactly like app.py: same async_mode, no monkey-patching
+    from flask import Flask
+    from flask_socketio import SocketIO
+    flask_app = Flask('asyncbench')
+    sio = SocketIO(flask_app, async_mode=mode, logger=False, engineio_logger=False)
+    arrivals = {}
+
+    @sio.on('bench')
+    def on_bench(n):
+        arrivals[n] = time.perf_counter()
+        return n
+
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    result = {}
+
+    def client():
+        try:
+            rtts, dispatch = _bench_client(port, arrivals)
+            rtt, rtt_p99 = _percentiles(rtts)
+            disp, disp_p99 = _percentiles(dispatch)
+            result.update({'mode': mode, 'rttUs': rtt, 'rttP99Us': rtt_p99, 'dispatchUs': disp, 'dispatchP99Us': disp_p99, 'score': rtt})
+        except Exception as e:
+            result.update({'mode': mode, 'error': repr(e)})
+        _report(result)
+        # The server has no stop call that works for every backend
+        os._exit(0)
+
+    threading.Thread(target=client, name='bench-client', daemon=True).start()
+    sio.run(flask_app, host='127.0.0.1', port=port, log_output=False, allow_unsafe_werkzeug=True)
+    return result or {'mode': mode, 'error': 'server stopped'}
+
+
+def _report(result):
+    sys.stdout.write(json.dumps(result) + '\n')
+    sys.stdout.flush()
+
+
+def child_main(mode):
+    """Benchmark one backend and print the result as a single JSON line."""
+    try:
+        result = run_benchmark(mode)
+    except Exception as e:
+        result = {'mode': mode, 'error': repr(e)}
+    _report(result)
+    return 0
+
+
+def _child_command(mode):
+    # Frozen builds have no separate script; the executable itself checks CHILD_ENV
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(__file__), mode]
+
+
+def _run_child(mode):
+    env = dict(os.environ)
+    env.pop('TRACKPAD_ASYNC_BENCH', None)
+    env[CHILD_ENV] = mode
+    # The child must not need a display
+    env['TRACKPAD_BACKEND'] = 'null'
+    try:
+        proc = subprocess.run(_child_command(mode), env=env, capture_output=True, text=True, timeout=BENCH_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        return {'mode': mode, 'error': 'timed out'}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    return {'mode': mode, 'error': f'exit status {proc.returncode}'}
+
+
+def environment_key():
+    """Fingerprint of everything that can change which backend is fastest."""
+    from importlib import metadata
+    parts = [BENCH_METHOD, sys.version, sys.executable, platform.platform(), str(getattr(sys, 'frozen', False))]
+    for name in VERSIONED:
+        try:
+            parts.append(f'{name}={metadata.version(name)}')
+        except Exception:
+            parts.append(f'{name}=-')
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _load_cache(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def choose_async_mode(candidates, cache_path, rerun=False):
+    """Return the benchmark report for `candidates`; report['mode'] is the winner or None."""
+    key = environment_key()
+    cache = _load_cache(cache_path)
+    cached = cache.get(key)
+    if not rerun and isinstance(cached, dict) and cached.get('candidates') == list(candidates):
+        return dict(cached, cached=True)
+    results = [_run_child(mode) for mode in candidates]
+    usable = [r for r in results if 'score' in r]
+    best = min(usable, key=lambda r: r['score']) if usable else None
+    report = {'mode': best['mode'] if best else None, 'candidates': list(candidates), 'results': results, 'measuredAt': time.time()}
+    if best is not None:
+        cache[key] = report
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=1)
+        except OSError:
+            pass
+    return dict(report, cached=False)
+
+
+if __name__ == '__main__':
+    sys.exit(child_main(sys.argv[1] if len(sys.argv) > 1 else os.environ.get(CHILD_ENV, 'threading')))
@@ -0,0 +1,420 @@
+"""Out-of-process input injection for the trackpad server.
+
+With TRACKPAD_INJECTOR=process the web process doesn't call pyautogui itself.
+It writes fixed-size commands into a single-producer / single-consumer ring in
+multiprocessing.shared_memory, and a separate injector process drains the ring
+at its own pace. JSON decoding and socket handling then never wait on the
+same GIL as the OS input calls, and the reverse holds too.
+
+Ring layout (little endian):
+    0   write index (uint64, written by the web process)
+    64  read index (uint64, written by the injector)
+    72  cursor x, y (int32 each, written by the injector)
+    80  injector heartbeat (float64, time.time())
+    128 records: op uint8, 3 pad bytes, then three int32 arguments
+
+Indices only ever grow; a slot is (index % capacity). Each side writes only
+its own index, so no cross-process lock is needed.
+
+The injector is started as `python injector.py` (frozen builds re-launch the
+executable, and app.py hands over to child_main() before doing anything
+else), never through multiprocessing's spawn: that would re-import app.py in
+the child and run the whole server start-up there. Its arguments travel in
+CHILD_ENV. The parent keeps the child's stdin open, so the child sees EOF and
+exits however the parent dies.
+"""
+import atexit
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+HEADER_SIZE = 128
+RECORD = struct.Struct('<B3xiii')
+_U64 = struct.Struct('<Q')
+_POS = struct.Struct('<ii')
+_F64 = struct.Struct('<d')
+_WRITE_OFF = 0
+_READ_OFF = 64
+_POS_OFF = 72
+_BEAT_OFF = 80
+
+OP_MOVE_TO = 1
+OP_MOUSE_DOWN = 2
+OP_MOUSE_UP = 3
+OP_CLICK = 4
+OP_SCROLL = 5
+OP_HSCROLL = 6
+OP_KEY_DOWN = 7
+OP_KEY_UP = 8
+OP_PRESS = 9
+OP_TYPE_CHAR = 10
+OP_RELEASE_ALL = 11
+
+BUTTONS = ('left', 'right', 'middle')
+MODIFIER_KEYS = ('shift', 'shiftleft', 'shiftright', 'ctrl', 'ctrlleft', 'ctrlright', 'alt', 'altleft', 'altright', 'winleft', 'winright', 'command', 'option')
+
+# How often an idle injector re-reads the real cursor position (seconds)
+POSITION_POLL_S = 0.05
+CHILD_ENV = 'TRACKPAD_INJECTOR_CHILD'
+
+
+class EventRing:
+    """Fixed-size command ring in shared memory."""
+
+    def __init__(self, shm, capacity, owner=False):
+        self.shm = shm
+        self.buf = shm.buf
+        self.capacity = capacity
+        self.owner = owner
+
+    @classmethod
+    def create(cls, capacity=4096):
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity * RECORD.size)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, capacity):
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            # The ring belongs to the web process. Without this, the injector's own
+            # resource tracker would unlink it when the injector exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, capacity)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _get(self, off):
+        return _U64.unpack_from(self.buf, off)[0]
+
+    def pending(self):
+        return self._get(_WRITE_OFF) - self._get(_READ_OFF)
+
+    def push(self, op, a=0, b=0, c=0):
+        """Producer side. Returns False (and writes nothing) when the ring is full."""
+        w = self._get(_WRITE_OFF)
+        if w - self._get(_READ_OFF) >= self.capacity:
+            return False
+        RECORD.pack_into(self.buf, HEADER_SIZE + (w % self.capacity) * RECORD.size, op, a, b, c)
+        # Publish the record only after it has been written
+        _U64.pack_into(self.buf, _WRITE_OFF, w + 1)
+        return True
+
+    def read(self):
+        """Consumer side: return (records, end index) for everything queued."""
+        r = self._get(_READ_OFF)
+        w = self._get(_WRITE_OFF)
+        cap = self.capacity
+        return [RECORD.unpack_from(self.buf, HEADER_SIZE + (i % cap) * RECORD.size) for i in range(r, w)], w
+
+    def commit(self, index):
+        _U64.pack_into(self.buf, _READ_OFF, index)
+
+    def discard(self):
+        """Drop everything queued (used when an injector is replaced)."""
+        self.commit(self._get(_WRITE_OFF))
+
+    def position(self):
+        return _POS.unpack_from(self.buf, _POS_OFF)
+
+    def set_position(self, x, y):
+        _POS.pack_into(self.buf, _POS_OFF, int(x), int(y))
+
+    def heartbeat(self):
+        return _F64.unpack_from(self.buf, _BEAT_OFF)[0]
+
+    def beat(self):
+        _F64.pack_into(self.buf, _BEAT_OFF, time.time())
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+
+def _release_all(pyautogui):
+    for button in BUTTONS:
+        try:
+            pyautogui.mouseUp(button=button)
+        except Exception:
+            pass
+    for key in MODIFIER_KEYS:
+        try:
+            pyautogui.keyUp(key)
+        except Exception:
+            pass
+
+
+def _watch_parent(gone):
+    # Unbuffered reads: a daemon thread must not hold the stdin buffer lock at exit
+    try:
+        while os.read(0, 4096):
+            pass
+    except OSError:
+        pass
+    gone.set()
+
+
+def run(shm_name, capacity, failsafe, pause, recovering, parent_gone=None):
+    """Injector loop; returns once `parent_gone` is set."""
+    import pyautogui
+    pyautogui.FAILSAFE = failsafe
+    pyautogui.PAUSE = pause
+    keys = pyautogui.KEYBOARD_KEYS
+    ring = EventRing.attach(shm_name, capacity)
+    if recovering:
+        # The previous injector died; it may have left buttons or modifiers down
+        _release_all(pyautogui)
+    try:
+        ring.set_position(*pyautogui.position())
+    except Exception:
+        pass
+    idle_since = time.time()
+    last_poll = 0.0
+    while True:
+        records, end = ring.read()
+        now = time.time()
+        ring.beat()
+        if not records:
+            if parent_gone is not None and parent_gone.is_set():
+                return
+            if now - last_poll >= POSITION_POLL_S:
+                # Pick up physical mouse movement while we're idle
+                last_poll = now
+                try:
+                    ring.set_position(*pyautogui.position())
+                except Exception:
+                    pass
+            # Spin briefly after activity, then back off to save CPU
+            time.sleep(0.0005 if now - idle_since < 0.5 else 0.005)
+            continue
+        idle_since = now
+        last = len(records) - 1
+        for i, (op, a, b, c) in enumerate(records):
+            try:
+                if op == OP_MOVE_TO:
+                    # Only the newest of consecutive absolute moves matters
+                    if i < last and records[i + 1][0] == OP_MOVE_TO:
+                        continue
+                    pyautogui.moveTo(a, b)
+                    ring.set_position(a, b)
+                elif op == OP_MOUSE_DOWN:
+                    pyautogui.mouseDown(button=BUTTONS[a])
+                elif op == OP_MOUSE_UP:
+                    pyautogui.mouseUp(button=BUTTONS[a])
+                elif op == OP_CLICK:
+                    pyautogui.click(button=BUTTONS[a], clicks=max(1, b))
+                elif op == OP_SCROLL:
+                    pyautogui.scroll(a)
+                elif op == OP_HSCROLL:
+                    pyautogui.hscroll(a)
+                elif op == OP_KEY_DOWN:
+                    pyautogui.keyDown(keys[a])
+                elif op == OP_KEY_UP:
+                    pyautogui.keyUp(keys[a])
+                elif op == OP_PRESS:
+                    pyautogui.press(keys[a])
+                elif op == OP_TYPE_CHAR:
+                    pyautogui.typewrite(chr(a))
+                elif op == OP_RELEASE_ALL:
+                    _release_all(pyautogui)
+            except Exception:
+                pass
+        ring.commit(end)
+
+
+def child_main():
+    """Injector process entry point; arguments come from CHILD_ENV."""
+    shm_name, capacity, failsafe, pause, recovering = os.environ[CHILD_ENV].split(',')
+    gone = threading.Event()
+    threading.Thread(target=_watch_parent, args=(gone,), name='parent-watch', daemon=True).start()
+    run(shm_name, int(capacity), failsafe == '1', float(pause), recovering == '1', gone)
+    return 0
+
+
+def _child_command():
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+class InjectorClient:
+    """pyautogui-compatible facade that queues commands for the injector process.
+
+    Queries that don't inject (size, KEYBOARD_KEYS, ...) are answered by the
+    wrapped pyautogui module. position() returns the injector's last reported
+    cursor position, or the newest commanded target while moves are still
+    queued, so relative motion never builds on a stale position.
+    """
+
+    def __init__(self, backend, capacity=4096, on_restart=None):
+        self._backend = backend
+        self._capacity = capacity
+        self._on_restart = on_restart
+        self._key_index = {k: i for i, k in enumerate(backend.KEYBOARD_KEYS)}
+        self._lock = threading.Lock()
+        self._ring = None
+        self._proc = None
+        self._last_target = None
+        self._closing = False
+        self.FAILSAFE = getattr(backend, 'FAILSAFE', True)
+        self.PAUSE = getattr(backend, 'PAUSE', 0.0)
+        self.dropped = 0
+        self.restarts = 0
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    # process management
+    def _spawn(self, recovering):
+        env = dict(os.environ)
+        env[CHILD_ENV] = ','.join((self._ring.name, str(self._capacity), '1' if self.FAILSAFE else '0', repr(float(self.PAUSE)), '1' if recovering else '0'))
+        self._proc = subprocess.Popen(_child_command(), env=env, stdin=subprocess.PIPE)
+
+    def start(self):
+        with self._lock:
+            if self._proc is None:
+                self._ring = EventRing.create(self._capacity)
+                self._spawn(False)
+                threading.Thread(target=self._supervise, name='injector-supervisor', daemon=True).start()
+                atexit.register(self.close)
+
+    def close(self):
+        """Stop the injector for good (at interpreter exit) and free the ring."""
+        with self._lock:
+            if self._closing or self._proc is None:
+                return
+            self._closing = True
+            proc = self._proc
+        proc.terminate()
+        try:
+            proc.wait(1.0)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        self._ring.close()
+
+    def _supervise(self):
+        backoff = 0.2
+        while True:
+            proc = self._proc
+            proc.wait()
+            started = time.time()
+            with self._lock:
+                if self._closing:
+                    return
+                # Don't replay a backlog into the new injector; it starts by
+                # releasing any buttons/modifiers the dead one left held
+                self._ring.discard()
+                self._last_target = None
+                self._spawn(True)
+                self.restarts += 1
+            if self._on_restart is not None:
+                try:
+                    self._on_restart()
+                except Exception:
+                    pass
+            # Back off if injectors keep dying immediately
+            try:
+                self._proc.wait(backoff)
+            except subprocess.TimeoutExpired:
+                pass
+            if self._proc.poll() is not None or time.time() - started < backoff:
+                time.sleep(backoff)
+                backoff = min(5.0, backoff * 2)
+            else:
+                backoff = 0.2
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _put(self, op, a=0, b=0, c=0):
+        if self._proc is None:
+            self.start()
+        with self._lock:
+            if self._closing or not self._ring.push(op, a, b, c):
+                self.dropped += 1
+
+    # queries
+    def position(self):
+        if self._ring is None:
+            return self._backend.position()
+        if self._last_target is not None and self._ring.pending():
+            return self._last_target
+        return self._ring.position()
+
+    def size(self):
+        return self._backend.size()
+
+    # injection
+    def moveTo(self, x, y, *args, **kwargs):
+        x = int(x)
+        y = int(y)
+        self._last_target = (x, y)
+        self._put(OP_MOVE_TO, x, y)
+
+    def mouseDown(self, *args, button='left', **kwargs):
+        self._put(OP_MOUSE_DOWN, BUTTONS.index(button))
+
+    def mouseUp(self, *args, button='left', **kwargs):
+        self._put(OP_MOUSE_UP, BUTTONS.index(button))
+
+    def click(self, *args, button='left', clicks=1, **kwargs):
+        self._put(OP_CLICK, BUTTONS.index(button), clicks)
+
+    def rightClick(self, *args, **kwargs):
+        self._put(OP_CLICK, 1, 1)
+
+    def middleClick(self, *args, **kwargs):
+        self._put(OP_CLICK, 2, 1)
+
+    def doubleClick(self, *args, **kwargs):
+        self._put(OP_CLICK, 0, 2)
+
+    def scroll(self, clicks, *args, **kwargs):
+        self._put(OP_SCROLL, int(clicks))
+
+    def hscroll(self, clicks, *args, **kwargs):
+        self._put(OP_HSCROLL, int(clicks))
+
+    def _key_op(self, op, key):
+        idx = self._key_index.get(key.lower() if len(key) > 1 else key)
+        if idx is not None:
+            self._put(op, idx)
+
+    def keyDown(self, key, *args, **kwargs):
+        self._key_op(OP_KEY_DOWN, key)
+
+    def keyUp(self, key, *args, **kwargs):
+        self._key_op(OP_KEY_UP, key)
+
+    def press(self, keys, *args, **kwargs):
+        for key in ([keys] if isinstance(keys, str) else keys):
+            self._key_op(OP_PRESS, key)
+
+    def typewrite(self, message, *args, **kwargs):
+        for ch in message:
+            self._put(OP_TYPE_CHAR, ord(ch))
+
+    def drag(self, dx, dy, *args, button='left', **kwargs):
+        x, y = self.position()
+        self.mouseDown(button=button)
+        self.moveTo(x + dx, y + dy)
+        self.mouseUp(button=button)
+
+    def release_all(self):
+        self._put(OP_RELEASE_ALL)
+
+
+if __name__ == '__main__':
+    sys.exit(child_main())
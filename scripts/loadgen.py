@@ -0,0 +1,310 @@
+"""Headless multi-client load generator for the trackpad server.
+
+Opens N connections and streams synthetic (or recorded) raw touch gestures at a
+fixed rate, then reports client-observed round trip latency (from the server's
+raw.ack messages, or HTTP response time), server-observed lag, drops and
+throughput. Start the server without a display using the null backend:
+
+    TRACKPAD_BACKEND=null python app.py
+    python scripts/loadgen.py --clients 4 --rate 240 --duration 20 --mode ws
+
+Modes:
+  socketio  python-socketio client (pip install "python-socketio[client]")
+  ws        Socket.IO spoken directly over a raw websocket (pip install websocket-client)
+  http      POST batches to /raw (standard library only)
+
+Recorded gestures are JSON lines with a millisecond offset 't' plus the raw
+event fields, e.g. {"t": 16, "type": "move", "id": 1, "x": 120.5, "y": 300}.
+"""
+import abc
+import argparse
+import json
+import math
+import threading
+import time
+import urllib.request
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round((pct / 100.0) * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def synthetic_frames(rate, duration, fingers, stroke_s=1.5):
+    """Yield (t_seconds, [events]) frames: strokes of circular motion separated by lifts."""
+    dt = 1.0 / rate
+    frames_per_stroke = max(2, int(stroke_s * rate))
+    t = 0.0
+    frame = 0
+    while t < duration:
+        phase = frame % frames_per_stroke
+        angle = (frame / float(rate)) * math.pi
+        events = []
+        for f in range(fingers):
+            x = 200 + f * 60 + 80 * math.cos(angle)
+            y = 400 + 80 * math.sin(angle)
+            if phase == 0:
+                events.append({'type': 'down', 'id': f, 'x': x, 'y': y, 'pointerType': 'touch'})
+            elif phase == frames_per_stroke - 1:
+                events.append({'type': 'up', 'id': f, 'x': x, 'y': y, 'pointerType': 'touch'})
+            else:
+                events.append({'type': 'move', 'id': f, 'x': x, 'y': y, 'pointerType': 'touch'})
+        yield t, events
+        frame += 1
+        t += dt
+
+
+def recorded_frames(path, rate, duration, speed=1.0):
+    """Group a recorded JSONL trace into frames of 1/rate seconds, looping until duration."""
+    with open(path) as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    if not records:
+        return
+    span = max(r.get('t', 0) for r in records) / 1000.0 / speed
+    dt = 1.0 / rate
+    offset = 0.0
+    while offset < duration:
+        frame_start = 0.0
+        frame = []
+        for r in records:
+            t = r.get('t', 0) / 1000.0 / speed
+            if t >= frame_start + dt and frame:
+                yield offset + frame_start, frame
+                frame = []
+                frame_start = t
+            ev = dict(r)
+            ev.pop('t', None)
+            frame.append(ev)
+        if frame:
+            yield offset + frame_start, frame
+        offset += span + dt
+
+
+class LoadClient(abc.ABC):
+    def __init__(self, index, args):
+        self.index = index
+        self.args = args
+        self.seq = 0
+        self.sent_events = 0
+        self.sent_messages = 0
+        self.errors = 0
+        self.send_times = {}   # seq -> perf_counter of the message carrying it
+        self.rtts = []
+        self.server_lags = []
+        self.server_dropped = 0
+        self.server_shed = 0
+        self.late_frames = 0
+        self.lock = threading.Lock()
+
+    # transport hooks
+    def connect(self):
+        pass
+
+    @abc.abstractmethod
+    def send(self, events):
+        """Deliver one frame of raw events to the server."""
+
+    def close(self):
+        pass
+
+    def on_ack(self, ack):
+        if not ack:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            sent = self.send_times.pop(ack.get('seq'), None)
+            if sent is not None:
+                self.rtts.append((now - sent) * 1000)
+            self.server_lags.append(float(ack.get('lagMs', 0)))
+            self.server_dropped = int(ack.get('dropped', 0))
+            self.server_shed = int(ack.get('shed', 0))
+            # forget seqs the server will never ack individually
+            if len(self.send_times) > 4096:
+                for seq in sorted(self.send_times)[:2048]:
+                    del self.send_times[seq]
+
+    def run(self, frames):
+        start = time.perf_counter() + self.index * 0.001
+        for t, events in frames:
+            target = start + t
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -(1.0 / self.args.rate):
+                self.late_frames += 1
+            now_ms = time.time() * 1000
+            batch = []
+            for ev in events:
+                self.seq += 1
+                batch.append(dict(ev, seq=self.seq, time=now_ms))
+            with self.lock:
+                self.send_times[self.seq] = time.perf_counter()
+            try:
+                self.send(batch)
+                self.sent_messages += 1
+                self.sent_events += len(batch)
+            except Exception:
+                self.errors += 1
+
+
+class SocketIOClient(LoadClient):
+    def connect(self):
+        import socketio
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('raw.ack', self.on_ack)
+        self.sio.connect(self.args.url, transports=['websocket'])
+
+    def send(self, events):
+        self.sio.emit('raw.batch', events)
+
+    def close(self):
+        self.sio.disconnect()
+
+
+class RawWebSocketClient(LoadClient):
+    """Minimal Engine.IO v4 / Socket.IO v5 client over a plain websocket."""
+
+    def connect(self):
+        import websocket
+        url = self.args.url.replace('http://', 'ws://').replace('https://', 'wss://').rstrip('/')
+        self.ws = websocket.create_connection(url + '/socket.io/?EIO=4&transport=websocket', timeout=5)
+        self.send_lock = threading.Lock()
+        opened = self.ws.recv()
+        if not opened.startswith('0'):
+            raise RuntimeError('unexpected engine.io open packet: %r' % opened)
+        self.ws.send('40')
+        self.running = True
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader.start()
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                msg = self.ws.recv()
+            except Exception:
+                break
+            if msg == '2':
+                with self.send_lock:
+                    self.ws.send('3')
+            elif msg.startswith('42'):
+                try:
+                    name, payload = json.loads(msg[2:])[:2]
+                except Exception:
+                    continue
+                if name == 'raw.ack':
+                    self.on_ack(payload)
+
+    def send(self, events):
+        packet = '42' + json.dumps(['raw.batch', events], separators=(',', ':'))
+        with self.send_lock:
+            self.ws.send(packet)
+
+    def close(self):
+        self.running = False
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+class HttpClient(LoadClient):
+    def send(self, events):
+        body = json.dumps(events).encode('utf-8')
+        req = urllib.request.Request(self.args.url.rstrip('/') + '/raw', data=body, headers={'Content-Type': 'application/json', 'X-Trackpad-Client': f'loadgen-{self.index}'})
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            res = json.loads(resp.read() or b'{}')
+        self.on_ack(res.get('ack'))
+
+
+CLIENTS = {'socketio': SocketIOClient, 'ws': RawWebSocketClient, 'http': HttpClient}
+
+
+def fetch_server_stats(url):
+    try:
+        with urllib.request.urlopen(url.rstrip('/') + '/admin/stats', timeout=5) as resp:
+            return json.loads(resp.read())
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:51273')
+    parser.add_argument('--mode', choices=sorted(CLIENTS), default='socketio')
+    parser.add_argument('--clients', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=120.0, help='frames per second per client')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    parser.add_argument('--fingers', type=int, default=1, help='contacts per synthetic gesture')
+    parser.add_argument('--replay', help='JSONL gesture recording to replay instead of synthetic strokes')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+
+    clients = [CLIENTS[args.mode](i, args) for i in range(args.clients)]
+    for c in clients:
+        c.connect()
+
+    def frames():
+        if args.replay:
+            return recorded_frames(args.replay, args.rate, args.duration, args.speed)
+        return synthetic_frames(args.rate, args.duration, args.fingers)
+
+    threads = [threading.Thread(target=c.run, args=(frames(),), daemon=True) for c in clients]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    # let trailing acks arrive, then snapshot server stats before disconnecting
+    time.sleep(0.5)
+    server = fetch_server_stats(args.url)
+    for c in clients:
+        c.close()
+
+    rtts = [v for c in clients for v in c.rtts]
+    lags = [v for c in clients for v in c.server_lags]
+    report = {
+        'mode': args.mode,
+        'clients': args.clients,
+        'rate': args.rate,
+        'elapsedS': round(elapsed, 2),
+        'sentEvents': sum(c.sent_events for c in clients),
+        'sentMessages': sum(c.sent_messages for c in clients),
+        'eventsPerS': round(sum(c.sent_events for c in clients) / elapsed, 1) if elapsed else 0.0,
+        'sendErrors': sum(c.errors for c in clients),
+        'lateFrames': sum(c.late_frames for c in clients),
+        'acks': len(lags),
+        'rttMs': {'p50': round(percentile(rtts, 50), 2), 'p95': round(percentile(rtts, 95), 2), 'p99': round(percentile(rtts, 99), 2), 'max': round(max(rtts), 2) if rtts else 0.0},
+        'serverLagMs': {'p50': round(percentile(lags, 50), 2), 'p95': round(percentile(lags, 95), 2), 'max': round(max(lags), 2) if lags else 0.0},
+        'serverDropped': sum(c.server_dropped for c in clients),
+        'serverShed': sum(c.server_shed for c in clients),
+        'server': server,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['mode']}: {report['clients']} client(s) x {report['rate']:g} Hz for {report['elapsedS']} s")
+        print(f"  sent {report['sentEvents']} events in {report['sentMessages']} messages ({report['eventsPerS']} events/s), "
+              f"{report['sendErrors']} send errors, {report['lateFrames']} late frames")
+        r = report['rttMs']
+        print(f"  client rtt ms: p50={r['p50']} p95={r['p95']} p99={r['p99']} max={r['max']} ({report['acks']} acks)")
+        lg = report['serverLagMs']
+        print(f"  server lag ms: p50={lg['p50']} p95={lg['p95']} max={lg['max']}, dropped {report['serverDropped']} stale moves, "
+              f"shed {report['serverShed']} over the admission limits")
+        if server.get('status') == 'ok':
+            print(f"  server: backend={server.get('backend')} async={server.get('asyncMode')} received={server.get('received')} injected={server.get('injected')}")
+            gcr = server.get('gc')
+            if gcr:
+                print(f"  server gc ({gcr['mode']}): {gcr['gesturePauses']} pauses during input, {gcr['gesturePauseMs']:.1f} ms total, "
+                      f"max {gcr['gestureMaxPauseMs']:.1f} ms; {gcr['idleCollections']} idle collections")
+        else:
+            print(f"  server stats unavailable: {server.get('message')}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
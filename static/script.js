@@ -16,9 +16,38 @@ class PhoneTrackpad {
         this.activeContacts = new Map(); // id -> { id, x, y, pointerType, time }
         this.streaming = false;
         this._rafId = null;
+        // Flow control: every raw event carries an increasing seq and the server
+        // periodically acks the newest seq it processed along with its receive lag.
+        // When the server falls behind we stream on fewer frames and stop sending
+        // every coalesced sample so moves can't pile up in the socket buffer.
+        this.seq = 0;
+        this.ackedSeq = 0;
+        this.lastAckTime = 0;
+        this.serverLagMs = 0;
+        this.frameSkip = 1;       // stream on every Nth animation frame
+        this._frameCount = 0;
+        this.lagHighMs = 60;      // back off above this server-reported lag
+        this.lagLowMs = 20;       // recover below this lag
+        this.maxFrameSkip = 8;
+        this.maxInflight = 120;   // unacked events before we pause move streaming
+        this.ackTimeoutMs = 500;  // assume lost acks after this long
+        // Resumable session: the server issues a token on connect; presenting it
+        // again after a reconnect (or on HTTP fallback posts) reattaches to the
+        // same server-side state, including an in-progress drag hold.
+        this.sessionToken = null;
+        try { this.sessionToken = sessionStorage.getItem('trackpadSession'); } catch (e) {}
+        // Intent protocol: when the server offers it (with its 'session' event) we
+        // recognize taps, holds, scrolls and swipes here and send one compact
+        // 'intent' message per frame instead of every finger sample. Set
+        // preferIntent = false to stream raw events for the server to recognize.
+        this.preferIntent = true;
+        this.intentCfg = null;
+        this._resetIntent();
         this.initSocket();
         this.initEventListeners();
         this.initKeyboardUI();
+        this.initPreview();
+        this.initTablet();
     }
 
     initSocket() {
@@ -26,7 +55,18 @@ class PhoneTrackpad {
             if (typeof io === 'function') {
                 // Prefer WebSocket transport; Socket.IO will fall back if websocket isn't available.
                 try {
-                    this.socket = io({ transports: ['websocket'], reconnectionAttempts: 5, timeout: 2000 });
+                    // Retry quickly and forever: a Wi-Fi flicker should hand control
+                    // back within a round trip, and the session survives on the server
+                    this.socket = io({
+                        transports: ['websocket'],
+                        auth: (cb) => cb({ token: this.sessionToken }),
+                        reconnection: true,
+                        reconnectionAttempts: Infinity,
+                        reconnectionDelay: 50,
+                        reconnectionDelayMax: 1000,
+                        randomizationFactor: 0.2,
+                        timeout: 2000
+                    });
                 } catch (e) {
                     // Fallback to default initialization
                     this.socket = io();
@@ -42,6 +82,24 @@ class PhoneTrackpad {
                 this.socket.on('disconnect', (reason) => {
                     console.debug && console.debug('socket disconnected', reason);
                 });
+                this.socket.on('raw.ack', (ack) => { this._onAck(ack); });
+                // Tuning changed on the server while we stay connected
+                this.socket.on('intent.config', (cfg) => { this.intentCfg = cfg || null; });
+                this.socket.on('session', (msg) => {
+                    if (!msg || !msg.token) return;
+                    this.sessionToken = msg.token;
+                    this.intentCfg = msg.intent || null;
+                    try { sessionStorage.setItem('trackpadSession', msg.token); } catch (e) {}
+                });
+                // Don't wait out the backoff timer when the network or the page comes back
+                const reconnectNow = () => {
+                    if (this.socket && !this.socket.connected) this.socket.connect();
+                };
+                window.addEventListener('online', reconnectNow);
+                document.addEventListener('visibilitychange', () => {
+                    if (document.visibilityState === 'visible') reconnectNow();
+                });
+                this._reconnectNow = reconnectNow;
             }
         } catch (e) {
             this.socket = null;
@@ -85,6 +143,98 @@ class PhoneTrackpad {
         });
     }
 
+    // Live desktop preview: the server pushes only changed tiles of the host
+    // screen; we draw them in order and ack each frame so it can adapt its rate.
+    initPreview() {
+        this.preview = document.getElementById('preview');
+        this.previewToggle = document.getElementById('previewToggle');
+        this.previewOn = false;
+        this.previewMode = 'desktop'; // or 'cursor' for a region around the host cursor
+        this._previewChain = Promise.resolve();
+        if (!this.preview || !this.previewToggle) return;
+        if (!this.socket) {
+            // Preview frames are pushed over the socket; nothing to show without one
+            this.previewToggle.style.display = 'none';
+            return;
+        }
+        this.previewCtx = this.preview.getContext('2d');
+        this.previewToggle.addEventListener('click', (e) => {
+            e.preventDefault();
+            this.setPreview(!this.previewOn);
+        });
+        this.socket.on('preview.frame', (msg) => { this._drawPreviewFrame(msg); });
+        this.socket.on('preview.error', () => { this.setPreview(false); });
+        this.socket.on('connect', () => {
+            if (this.previewOn) this.socket.emit('preview.start', { mode: this.previewMode });
+        });
+    }
+
+    setPreview(on) {
+        this.previewOn = on;
+        this.preview.hidden = !on;
+        this.previewToggle.classList.toggle('active', on);
+        if (this.socket && this.socket.connected) {
+            this.socket.emit(on ? 'preview.start' : 'preview.stop', { mode: this.previewMode });
+        }
+    }
+
+    // Absolute tablet mode: the trackpad area is mapped onto the host screen and
+    // pen samples place the cursor directly instead of moving it relatively.
+    initTablet() {
+        this.tabletToggle = document.getElementById('tabletToggle');
+        this.tabletOn = false;
+        this.tabletPointerTypes = ['pen'];
+        if (!this.tabletToggle) return;
+        this.tabletToggle.addEventListener('click', (e) => {
+            e.preventDefault();
+            this.setTablet(!this.tabletOn);
+        });
+        // The mapped surface changes with rotation / resizing
+        window.addEventListener('resize', () => { if (this.tabletOn) this._sendTabletConfig(); });
+        if (this.socket) {
+            this.socket.on('connect', () => { if (this.tabletOn) this._sendTabletConfig(); });
+        }
+    }
+
+    setTablet(on) {
+        this.tabletOn = on;
+        this.tabletToggle.classList.toggle('active', on);
+        this._sendTabletConfig();
+    }
+
+    _sendTabletConfig() {
+        const rect = this.trackpad.getBoundingClientRect();
+        const tl = this._scaleXY(rect.left + window.scrollX, rect.top + window.scrollY);
+        const br = this._scaleXY(rect.right + window.scrollX, rect.bottom + window.scrollY);
+        const cfg = { enabled: this.tabletOn, surface: [tl.x, tl.y, br.x - tl.x, br.y - tl.y], pointerTypes: this.tabletPointerTypes };
+        if (this.socket && this.socket.connected) {
+            this.socket.emit('tablet.config', cfg);
+            return;
+        }
+        const headers = { 'Content-Type': 'application/json' };
+        if (this.sessionToken) headers['X-Trackpad-Session'] = this.sessionToken;
+        fetch('/tablet', { method: 'POST', headers, body: JSON.stringify(cfg) }).catch(() => {});
+    }
+
+    _drawPreviewFrame(msg) {
+        if (!this.previewOn || !msg) return;
+        const type = 'image/' + (msg.format || 'jpeg');
+        // Chain frames so tiles of a newer frame never get painted under older ones
+        this._previewChain = this._previewChain.then(() => {
+            if (this.preview.width !== msg.width || this.preview.height !== msg.height) {
+                this.preview.width = msg.width;
+                this.preview.height = msg.height;
+            }
+            const draws = (msg.tiles || []).map((t) => createImageBitmap(new Blob([t.data], { type })).then((bmp) => {
+                this.previewCtx.drawImage(bmp, t.x, t.y);
+                if (bmp.close) bmp.close();
+            }));
+            return Promise.all(draws);
+        }).catch(() => {}).then(() => {
+            if (this.socket && this.socket.connected) this.socket.emit('preview.ack', { frame: msg.frame });
+        });
+    }
+
     sendKey(keyObj) {
         // Attempt socket first
         if (this.socket && this.socket.connected) {
@@ -138,8 +288,12 @@ class PhoneTrackpad {
         const scaled = this._scaleXY(e.pageX, e.pageY);
         const pt = { id, x: scaled.x, y: scaled.y, pointerType: e.pointerType, time: now };
         this.activeContacts.set(id, pt);
-        // Send down immediately
-        this._sendRaw({ type: 'down', ...pt });
+        if (this._usesIntent(e.pointerType)) {
+            this._intentDown(pt);
+        } else {
+            // Send down immediately
+            this._sendRaw({ type: 'down', ...pt });
+        }
         this._ensureStreaming();
     }
 
@@ -150,6 +304,21 @@ class PhoneTrackpad {
         const now = Date.now();
         // Prefer coalesced events for more samples in a single frame
         const events = (typeof e.getCoalescedEvents === 'function') ? e.getCoalescedEvents() : [e];
+        const prev = this.activeContacts.get(id);
+        if (prev && prev.intent) {
+            // Only the net travel matters to the recognizer
+            const last = events[events.length - 1] || e;
+            const scaled = this._scaleXY(last.pageX != null ? last.pageX : last.clientX, last.pageY != null ? last.pageY : last.clientY);
+            this._intentMove(prev, scaled.x, scaled.y);
+            return;
+        }
+        if (this._congested()) {
+            // Only remember the newest position; the streaming loop sends it
+            const last = events[events.length - 1] || e;
+            const scaled = this._scaleXY(last.pageX != null ? last.pageX : last.clientX, last.pageY != null ? last.pageY : last.clientY);
+            this.activeContacts.set(id, { id, x: scaled.x, y: scaled.y, pointerType: e.pointerType, time: now });
+            return;
+        }
         const batch = [];
         for (const ev of events) {
             const ex = (ev.pageX != null ? ev.pageX : ev.clientX);
@@ -168,6 +337,21 @@ class PhoneTrackpad {
         const id = e.pointerId;
         const now = Date.now();
         const events = (typeof e.getCoalescedEvents === 'function') ? e.getCoalescedEvents() : [e];
+        const prev = this.activeContacts.get(id);
+        if (prev && prev.intent) {
+            // Only the net travel matters to the recognizer
+            const last = events[events.length - 1] || e;
+            const scaled = this._scaleXY(last.pageX != null ? last.pageX : last.clientX, last.pageY != null ? last.pageY : last.clientY);
+            this._intentMove(prev, scaled.x, scaled.y);
+            return;
+        }
+        if (this._congested()) {
+            // Only remember the newest position; the streaming loop sends it
+            const last = events[events.length - 1] || e;
+            const scaled = this._scaleXY(last.pageX != null ? last.pageX : last.clientX, last.pageY != null ? last.pageY : last.clientY);
+            this.activeContacts.set(id, { id, x: scaled.x, y: scaled.y, pointerType: e.pointerType, time: now });
+            return;
+        }
         const batch = [];
         for (const ev of events) {
             const ex = (ev.pageX != null ? ev.pageX : ev.clientX);
@@ -187,8 +371,13 @@ class PhoneTrackpad {
         const id = e.pointerId;
         const scaled = this._scaleXY(e.pageX, e.pageY);
         const pt = { id, x: scaled.x, y: scaled.y, pointerType: e.pointerType, time: now };
-        // Send up immediately
-        this._sendRaw({ type: 'up', ...pt });
+        const prev = this.activeContacts.get(id);
+        if (prev && prev.intent) {
+            this._intentUp(prev);
+        } else {
+            // Send up immediately
+            this._sendRaw({ type: 'up', ...pt });
+        }
         this.activeContacts.delete(id);
         this._maybeStopStreaming();
     }
@@ -203,7 +392,8 @@ class PhoneTrackpad {
             const scaled = this._scaleXY(t.pageX, t.pageY);
             const pt = { id, x: scaled.x, y: scaled.y, pointerType: 'touch', time: now };
             this.activeContacts.set(id, pt);
-            batch.push({ type: 'down', ...pt });
+            if (this._usesIntent('touch')) this._intentDown(pt);
+            else batch.push({ type: 'down', ...pt });
         }
         if (batch.length) this._sendRaw(batch);
         this._ensureStreaming();
@@ -212,13 +402,19 @@ class PhoneTrackpad {
     onTouchMove(e) {
         e.preventDefault();
         const now = Date.now();
+        const congested = this._congested();
         const batch = [];
         for (const t of e.changedTouches) {
             const id = t.identifier;
             const scaled = this._scaleXY(t.pageX, t.pageY);
+            const prev = this.activeContacts.get(id);
+            if (prev && prev.intent) {
+                this._intentMove(prev, scaled.x, scaled.y);
+                continue;
+            }
             const pt = { id, x: scaled.x, y: scaled.y, pointerType: 'touch', time: now };
             this.activeContacts.set(id, pt);
-            batch.push({ type: 'move', ...pt });
+            if (!congested) batch.push({ type: 'move', ...pt });
         }
         if (batch.length) this._sendRaw(batch);
     }
@@ -231,7 +427,9 @@ class PhoneTrackpad {
             const id = t.identifier;
             const scaled = this._scaleXY(t.pageX, t.pageY);
             const pt = { id, x: scaled.x, y: scaled.y, pointerType: 'touch', time: now };
-            batch.push({ type: 'up', ...pt });
+            const prev = this.activeContacts.get(id);
+            if (prev && prev.intent) this._intentUp(prev);
+            else batch.push({ type: 'up', ...pt });
             this.activeContacts.delete(id);
         }
         if (batch.length) this._sendRaw(batch);
@@ -240,6 +438,11 @@ class PhoneTrackpad {
 
     // Core: send raw events via socket if available, otherwise POST to /raw
     _sendRaw(eventOrArray) {
+        if (Array.isArray(eventOrArray)) {
+            for (const ev of eventOrArray) ev.seq = ++this.seq;
+        } else {
+            eventOrArray.seq = ++this.seq;
+        }
         if (this.socket && this.socket.connected) {
             try {
                 if (Array.isArray(eventOrArray)) {
@@ -256,8 +459,234 @@ class PhoneTrackpad {
         }
 
         // HTTP fallback: send array for efficiency
+        if (this._reconnectNow) this._reconnectNow();
         const body = Array.isArray(eventOrArray) ? eventOrArray : [eventOrArray];
-        fetch('/raw', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) }).catch(() => {});
+        const headers = { 'Content-Type': 'application/json' };
+        if (this.sessionToken) headers['X-Trackpad-Session'] = this.sessionToken;
+        fetch('/raw', { method: 'POST', headers, body: JSON.stringify(body) })
+            .then((resp) => resp.json())
+            .then((res) => { if (res) this._onAck(res.ack); })
+            .catch(() => {});
+    }
+
+    // Client-side gesture recognizer for the intent protocol. It mirrors the
+    // server's raw recognizer (finger count picks pointer / scroll / swipe; a tap
+    // followed quickly by a hold starts a drag) using the thresholds the server
+    // sent, and turns its results into ops for _flushIntents.
+    _usesIntent(pointerType) {
+        if (!this.preferIntent || !this.intentCfg) return false;
+        // Tablet-mapped pens need absolute positions, which only raw events carry
+        return !(this.tabletOn && this.tabletPointerTypes.includes(pointerType));
+    }
+
+    _resetIntent() {
+        this.intent = {
+            cfg: null, touches: new Map(), gesture: 'idle', tapPhase: 'idle', lastTapTime: 0, doubleTapDownTime: 0,
+            holding: false, suppressUntil: 0, swipeAccum: 0, swipeUp: false, swipeDown: false,
+            dx: 0, dy: 0, scrollDy: 0, scrollSpeed: 0, ops: []
+        };
+    }
+
+    _intentDown(contact) {
+        const g = this.intent;
+        const now = Date.now();
+        // Keep one configuration for a whole gesture even if the server changes it
+        if (g.touches.size === 0) g.cfg = this.intentCfg;
+        contact.intent = true;
+        if (g.tapPhase === 'tapped') {
+            if (now - g.lastTapTime <= g.cfg.doubleTapMaxIntervalMs) {
+                g.tapPhase = 'expectHold';
+                g.doubleTapDownTime = now;
+            } else {
+                g.tapPhase = 'idle';
+            }
+        }
+        g.touches.set(contact.id, { lastX: contact.x, lastY: contact.y, startY: contact.y, startTime: now, totalDistance: 0, countAtDown: g.touches.size + 1 });
+        this._intentUpdateGesture();
+    }
+
+    _intentMove(contact, x, y) {
+        const g = this.intent;
+        contact.x = x;
+        contact.y = y;
+        const t = g.touches.get(contact.id);
+        if (!t) return;
+        const dx = x - t.lastX;
+        const dy = y - t.lastY;
+        if (!dx && !dy) return;
+        t.lastX = x;
+        t.lastY = y;
+        t.totalDistance += Math.hypot(dx, dy);
+        this._intentCheckHold();
+        if (Date.now() < g.suppressUntil) return;
+        const n = g.touches.size;
+        if (g.gesture === 'pointer') {
+            g.dx += dx;
+            g.dy += dy;
+        } else if (g.gesture === 'scroll') {
+            g.scrollDy += dy / n;
+            g.scrollSpeed += Math.abs(dy) / n;
+        }
+    }
+
+    _intentUp(contact) {
+        const g = this.intent;
+        const now = Date.now();
+        const t = g.touches.get(contact.id);
+        if (t) {
+            if (t.totalDistance <= g.cfg.tapMoveThreshold && now - t.startTime <= g.cfg.tapTimeoutMs) this._intentTap(t, now);
+            g.touches.delete(contact.id);
+        }
+        this._intentUpdateGesture();
+        if (g.touches.size === 0) {
+            if (g.tapPhase === 'expectHold') g.tapPhase = 'idle';
+            if (g.holding) {
+                g.holding = false;
+                this._queueIntent(['h', 0]);
+            }
+        }
+    }
+
+    _intentTap(t, now) {
+        const g = this.intent;
+        if (g.tapPhase === 'expectHold') {
+            // Released before the hold threshold: a double-click
+            g.tapPhase = 'idle';
+            g.lastTapTime = 0;
+            this._queueIntent(['c', 'left', 2]);
+        } else if (t.countAtDown === 1) {
+            g.lastTapTime = now;
+            g.tapPhase = 'tapped';
+            this._queueIntent(['c', 'left', 1]);
+        } else if (t.countAtDown === 2) {
+            g.suppressUntil = now + g.cfg.rightClickSuppressMs;
+            this._queueIntent(['c', 'right', 1]);
+        } else {
+            this._queueIntent(['c', 'middle', 1]);
+        }
+    }
+
+    _intentCheckHold() {
+        const g = this.intent;
+        if (g.tapPhase === 'expectHold' && Date.now() - g.doubleTapDownTime >= g.cfg.doubleTapHoldTriggerMs) {
+            g.tapPhase = 'idle';
+            g.holding = true;
+            this._queueIntent(['h', 1]);
+        }
+    }
+
+    _intentUpdateGesture() {
+        const g = this.intent;
+        const gesture = ['idle', 'pointer', 'scroll', 'swipe'][g.touches.size] || 'none';
+        if (gesture === g.gesture) return;
+        g.gesture = gesture;
+        // The swipe accumulator survives a brief fourth finger
+        if (gesture !== 'swipe' && gesture !== 'none') {
+            g.swipeAccum = 0;
+            g.swipeUp = g.swipeDown = false;
+        }
+    }
+
+    // Per-frame work: holds trigger while the finger rests, and the swipe
+    // accumulates displacement once per contact per frame like the raw recognizer
+    _intentFrame() {
+        const g = this.intent;
+        if (g.touches.size === 0) return;
+        this._intentCheckHold();
+        if (g.gesture !== 'swipe') return;
+        let sum = 0;
+        for (const t of g.touches.values()) sum += t.lastY - t.startY;
+        g.swipeAccum -= sum;
+        const trigger = g.cfg.swipeTriggerDistance;
+        if (!g.swipeUp && g.swipeAccum >= trigger) {
+            g.swipeUp = true;
+            this._queueIntent(['g', 'swipe_up']);
+        }
+        if (!g.swipeDown && g.swipeAccum <= -trigger) {
+            g.swipeDown = true;
+            this._queueIntent(['g', 'swipe_down']);
+        }
+    }
+
+    // Discrete ops go out right away, after any travel collected before them
+    _queueIntent(op) {
+        this._takeIntentMotion();
+        this.intent.ops.push(op);
+        this._flushIntents();
+    }
+
+    _takeIntentMotion() {
+        const g = this.intent;
+        const max = (g.cfg && g.cfg.maxDelta) || 1000;
+        const round = (v) => Math.round(v * 100) / 100;
+        // Split long travel (a flick during congestion) into ops the server accepts
+        while (g.dx || g.dy) {
+            const dx = round(Math.max(-max, Math.min(max, g.dx)));
+            const dy = round(Math.max(-max, Math.min(max, g.dy)));
+            if (!dx && !dy) break;
+            g.ops.push(['m', dx, dy]);
+            g.dx -= dx;
+            g.dy -= dy;
+        }
+        while (g.scrollDy || g.scrollSpeed) {
+            const dy = round(Math.max(-max, Math.min(max, g.scrollDy)));
+            const speed = round(Math.min(max, g.scrollSpeed));
+            if (!dy && !speed) break;
+            g.ops.push(['s', dy, speed]);
+            g.scrollDy -= dy;
+            g.scrollSpeed -= speed;
+        }
+    }
+
+    _flushIntents() {
+        this._takeIntentMotion();
+        const g = this.intent;
+        if (!g.ops.length) return;
+        const msg = { seq: ++this.seq, time: Date.now(), ops: g.ops };
+        g.ops = [];
+        if (this.socket && this.socket.connected) {
+            try {
+                this.socket.emit('intent', msg);
+                return;
+            } catch (e) {
+                // fall through to HTTP fallback
+            }
+        }
+        if (this._reconnectNow) this._reconnectNow();
+        const headers = { 'Content-Type': 'application/json' };
+        if (this.sessionToken) headers['X-Trackpad-Session'] = this.sessionToken;
+        fetch('/intent', { method: 'POST', headers, body: JSON.stringify(msg) })
+            .then((resp) => resp.json())
+            .then((res) => { if (res) this._onAck(res.ack); })
+            .catch(() => {});
+    }
+
+    // Server ack: { seq, lagMs, procMs, dropped }. Back off multiplicatively when
+    // the server lags and recover one step at a time once it has caught up.
+    _onAck(ack) {
+        if (!ack || typeof ack.seq !== 'number') return;
+        if (ack.seq > this.ackedSeq) this.ackedSeq = ack.seq;
+        this.lastAckTime = Date.now();
+        this.serverLagMs = ack.lagMs || 0;
+        if (this.serverLagMs > this.lagHighMs) {
+            this.frameSkip = Math.min(this.maxFrameSkip, this.frameSkip * 2);
+        } else if (this.serverLagMs < this.lagLowMs && this.frameSkip > 1) {
+            this.frameSkip -= 1;
+        }
+    }
+
+    _tooManyInflight() {
+        if (this.seq - this.ackedSeq <= this.maxInflight) return false;
+        // Acks can be lost (or never sent once we go quiet); don't stall forever
+        if (Date.now() - this.lastAckTime > this.ackTimeoutMs) {
+            this.ackedSeq = this.seq;
+            return false;
+        }
+        return true;
+    }
+
+    _congested() {
+        return this.frameSkip > 1 || this._tooManyInflight();
     }
 
     // Ensure the streaming loop is running when we have one or more active contacts
@@ -271,13 +700,18 @@ class PhoneTrackpad {
                 this._rafId = null;
                 return;
             }
-            const now = Date.now();
-            const batch = [];
-            for (const pt of this.activeContacts.values()) {
-                // Always send latest known positions while touching
-                batch.push({ type: 'move', id: pt.id, x: pt.x, y: pt.y, pointerType: pt.pointerType, time: now });
+            this._frameCount++;
+            this._intentFrame();
+            if (this._frameCount % this.frameSkip === 0 && !this._tooManyInflight()) {
+                const now = Date.now();
+                const batch = [];
+                for (const pt of this.activeContacts.values()) {
+                    // Always send latest known positions while touching
+                    if (!pt.intent) batch.push({ type: 'move', id: pt.id, x: pt.x, y: pt.y, pointerType: pt.pointerType, time: now });
+                }
+                if (batch.length) this._sendRaw(batch);
+                this._flushIntents();
             }
-            if (batch.length) this._sendRaw(batch);
             this._rafId = (window.requestAnimationFrame || function (cb) { return setTimeout(cb, 16); })(tick);
         };
         tick();
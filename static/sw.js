@@ -1,5 +1,5 @@
 // Minimal service worker: cache app shell for offline/startup. Expand as needed.
-const CACHE_NAME = 'trackpad-v1';
+const CACHE_NAME = 'trackpad-v7';
 const ASSETS = [
   '/',
   '/static/manifest.json',
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+from traces import FakeClock, RecordingBackend
+
+# Tests never touch a real display: the null backend only counts calls
+os.environ['TRACKPAD_BACKEND'] = 'null'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as trackpad  # noqa: E402
+
+
+class Trace:
+    """Feed raw events for one connection through process_raw_events."""
+
+    def __init__(self, clock, sid_key='test'):
+        self.clock = clock
+        self.sid_key = sid_key
+        self.seq = 0
+
+    def send(self, *events):
+        batch = []
+        for etype, tid, x, y in events:
+            self.seq += 1
+            batch.append({'type': etype, 'id': tid, 'x': x, 'y': y, 'seq': self.seq, 'time': self.clock.now * 1000, 'pointerType': 'touch'})
+        trackpad.process_raw_events(batch, self.sid_key)
+
+    def down(self, tid, x, y):
+        self.send(('down', tid, x, y))
+
+    def move(self, tid, x, y):
+        self.send(('move', tid, x, y))
+
+    def up(self, tid, x, y):
+        self.send(('up', tid, x, y))
+
+    def drag(self, tid, x, y, dx, dy, steps, step_ms=16):
+        """Move finger `tid` from (x, y) by (dx, dy) in `steps` samples; returns the end point."""
+        for i in range(1, steps + 1):
+            self.clock.advance(step_ms)
+            self.move(tid, x + dx * i / steps, y + dy * i / steps)
+        return x + dx, y + dy
+
+
+@pytest.fixture
+def app(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(trackpad, 'time', clock)
+    # Glides would run on the animator thread against the frozen clock
+    monkeypatch.setattr(trackpad, 'DRAG_SMOOTH_S', 0)
+    monkeypatch.setattr(trackpad, 'run_action', lambda name: trackpad.pyautogui._count(f'action:{name}'))
+    trackpad.touch_state.clear()
+    trackpad.flow_state.clear()
+    trackpad.pointer_state.update(x=None, y=None, checkedAt=0.0, externalAt=0.0, owner='phone')
+    trackpad.scroll_accum_x = trackpad.scroll_accum_y = 0.0
+    trackpad.move_accum_x = trackpad.move_accum_y = 0.0
+    if hasattr(trackpad.process_move_delta, '_last_time'):
+        del trackpad.process_move_delta._last_time
+    pg = trackpad.pyautogui
+    pg.calls.clear()
+    pg._x, pg._y = 960, 540
+    trackpad.clock = clock
+    yield trackpad
+    del trackpad.clock
+
+
+@pytest.fixture
+def pg(app, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(app, 'pyautogui', backend)
+    monkeypatch.setattr(app, 'run_action', lambda name: backend.log.append(('action', (name,))))
+    return backend
+
+
+@pytest.fixture
+def trace(app):
+    return Trace(app.clock)
@@ -0,0 +1,57 @@
+"""Record what the baseline recognizer injects for every trace in traces.py.
+
+The expectations in gesture_baseline.json come from app.py as it was before
+the table-driven recognizer (the parent of the user-027 commit):
+
+    git show 8de91b9:app.py > /tmp/baseline_app.py
+    python tests/record_gesture_baseline.py /tmp/baseline_app.py
+
+That version sent swipes straight to _press_key_combo/_press_single_key;
+those are recorded as the 'action' calls the current run_action hook gives.
+"""
+import importlib.util
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from traces import FakeClock, RecordingBackend, all_traces, calls, replay  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gesture_baseline.json')
+CLOCK_START = 1_000_000.0
+
+
+def load_baseline(path, backend):
+    sys.modules['pyautogui'] = backend
+    spec = importlib.util.spec_from_file_location('baseline_app', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module._press_key_combo = lambda mods, key: backend.log.append(('action', ('swipe_up',)))
+    module._press_single_key = lambda key: backend.log.append(('action', ('swipe_down',)))
+    return module
+
+
+def main(path):
+    backend = RecordingBackend()
+    module = load_baseline(path, backend)
+    expected = {}
+    for name, steps in all_traces().items():
+        backend.log.clear()
+        backend._x, backend._y = 960, 540
+        module.time = FakeClock(CLOCK_START)
+        for attr in ('scroll_accum_x', 'scroll_accum_y', 'move_accum_x', 'move_accum_y'):
+            if hasattr(module, attr):
+                setattr(module, attr, 0.0)
+        if hasattr(module.process_move_delta, '_last_time'):
+            del module.process_move_delta._last_time
+        replay(module, module.time, steps, sid_key=name)
+        expected[name] = {'steps': steps, 'calls': calls(backend)}
+    # One trace per line keeps re-recordings readable in a diff
+    with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+        f.write('{\n' + ',\n'.join(f'{json.dumps(name)}: {json.dumps(entry, separators=(",", ":"))}' for name, entry in expected.items()) + '\n}\n')
+    print(f'Recorded {len(expected)} traces to {BASELINE_PATH}')
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1]))
@@ -0,0 +1,20 @@
+def test_stale_contacts_stop_counting_after_session_grace(app, trace):
+    trace.down(1, 100, 100)
+    assert app._contacts_down(app.clock.time())
+    # The client vanished without sending its up
+    app.clock.advance(app.SESSION_GRACE_S * 1000 + 1)
+    assert app.touch_state['test']['touches']
+    assert not app._contacts_down(app.clock.time())
+
+
+def test_idle_collection_runs_past_a_stale_contact(app, trace, monkeypatch):
+    monkeypatch.setattr(app, 'gc_state', dict(app.gc_state, deferred=True, suspended=False))
+    collected = []
+    monkeypatch.setattr(app.gc, 'collect', lambda generation=2: collected.append(generation))
+    trace.down(1, 100, 100)
+    app.clock.advance(app.GC_IDLE_DELAY_S * 1000 + 1)
+    app.gc_idle_tick()
+    assert collected == []
+    app.clock.advance(app.SESSION_GRACE_S * 1000)
+    app.gc_idle_tick()
+    assert collected == [app.GC_IDLE_GENERATION]
@@ -0,0 +1,57 @@
+"""Replay every trace in gesture_baseline.json and compare with the baseline recognizer.
+
+The expectations were recorded from the recognizer before the table-driven
+rewrite (see record_gesture_baseline.py), so they check that the rewrite kept
+its behaviour. Deliberate changes are listed in CHANGED with what the
+recognizer does now instead.
+"""
+import json
+
+import pytest
+
+from record_gesture_baseline import BASELINE_PATH, CLOCK_START
+from traces import calls, replay
+
+with open(BASELINE_PATH, encoding='utf-8') as f:
+    BASELINE = json.load(f)
+
+# Lifting the last finger clears a pending 'expect hold'. Before, a second
+# tap that slid and lifted early left it set, so a later move pressed the
+# button, or a later tap came out as a double-click.
+CLEARS_EXPECT_HOLD = 'lifting the last finger clears a pending expect-hold'
+
+# Traces whose outcome changed on purpose: name -> (why, non-move calls now).
+# The cursor path still has to match the baseline.
+CHANGED = {
+    'second_tap_slides_then_drag': (CLEARS_EXPECT_HOLD, [['click', []]]),
+    'random_028': (CLEARS_EXPECT_HOLD, [['click', []], ['click', []], ['doubleClick', []]]),
+    'random_043': (CLEARS_EXPECT_HOLD, [['click', []], ['click', []], ['doubleClick', []]]),
+    'random_068': (CLEARS_EXPECT_HOLD, [['click', []]]),
+    'random_096': (CLEARS_EXPECT_HOLD, [['click', []], ['click', []], ['scroll', [20]], ['scroll', [-6]], ['doubleClick', []]]),
+    'random_097': (CLEARS_EXPECT_HOLD, [['click', []], ['rightClick', []]]),
+}
+
+
+def _split(recorded):
+    moves = [c for c in recorded if c[0] == 'moveTo']
+    return moves, [c for c in recorded if c[0] != 'moveTo']
+
+
+def _run(app, pg, name):
+    app.clock.now = CLOCK_START
+    replay(app, app.clock, BASELINE[name]['steps'], sid_key=name)
+    return calls(pg)
+
+
+@pytest.mark.parametrize('name', sorted(n for n in BASELINE if n not in CHANGED))
+def test_matches_baseline(app, pg, name):
+    assert _run(app, pg, name) == BASELINE[name]['calls']
+
+
+@pytest.mark.parametrize('name', sorted(CHANGED))
+def test_deliberate_changes(app, pg, name):
+    moves, others = _split(_run(app, pg, name))
+    base_moves, base_others = _split(BASELINE[name]['calls'])
+    assert moves == base_moves
+    assert others == CHANGED[name][1]
+    assert others != base_others
@@ -0,0 +1,116 @@
+"""Replay raw down/move/up traces through the recognizer and pin what gets injected."""
+
+
+def tap(trace, clock, tid=1, x=100, y=100, hold_ms=80):
+    trace.down(tid, x, y)
+    clock.advance(hold_ms)
+    trace.up(tid, x, y)
+
+
+def test_tap_clicks(app, pg, trace):
+    tap(trace, app.clock)
+    assert pg.names() == ['click']
+
+
+def test_long_press_does_not_click(app, pg, trace):
+    tap(trace, app.clock, hold_ms=app.TAP_TIMEOUT_MS + 50)
+    assert pg.names() == []
+
+
+def test_one_finger_drag_moves_without_clicking(app, pg, trace):
+    trace.down(1, 100, 100)
+    x, y = trace.drag(1, 100, 100, 60, 30, 6)
+    trace.up(1, x, y)
+    assert pg.names() == []
+    assert pg.count('moveTo') > 0
+    assert pg._x > 960 and pg._y > 540
+
+
+def test_double_tap_double_clicks(app, pg, trace):
+    tap(trace, app.clock)
+    app.clock.advance(60)
+    tap(trace, app.clock, tid=2, hold_ms=60)
+    assert pg.names() == ['click', 'doubleClick']
+
+
+def test_second_tap_after_interval_is_a_new_click(app, pg, trace):
+    tap(trace, app.clock)
+    app.clock.advance(app.DOUBLE_TAP_MAX_INTERVAL_MS + 100)
+    tap(trace, app.clock, tid=2)
+    assert pg.names() == ['click', 'click']
+
+
+def test_double_tap_hold_drags(app, pg, trace):
+    tap(trace, app.clock)
+    app.clock.advance(60)
+    trace.down(2, 100, 100)
+    app.clock.advance(app.DOUBLE_TAP_HOLD_TRIGGER_MS + 20)
+    x, y = trace.drag(2, 100, 100, 80, 0, 8)
+    assert pg.names() == ['click', 'mouseDown']
+    assert app.touch_state['test']['doubleTapHoldActive']
+    moves_while_held = pg.count('moveTo')
+    trace.up(2, x, y)
+    assert pg.names() == ['click', 'mouseDown', 'mouseUp']
+    assert moves_while_held > 0
+    assert not app.touch_state['test']['doubleTapHoldActive']
+
+
+def test_two_finger_tap_right_clicks(app, pg, trace):
+    trace.down(1, 100, 100)
+    trace.down(2, 150, 100)
+    app.clock.advance(80)
+    trace.up(1, 100, 100)
+    trace.up(2, 150, 100)
+    # The first finger's own tap also counts as a one-finger tap
+    assert pg.names() == ['click', 'rightClick']
+
+
+def test_moves_right_after_a_right_click_are_suppressed(app, pg, trace):
+    trace.down(1, 100, 100)
+    trace.down(2, 150, 100)
+    app.clock.advance(80)
+    trace.up(2, 150, 100)
+    trace.drag(1, 100, 100, 30, 0, 3)
+    assert pg.names() == ['rightClick']
+    assert pg.count('moveTo') == 0
+
+
+def test_three_finger_tap_middle_clicks(app, pg, trace):
+    for tid, x in ((1, 100), (2, 150), (3, 200)):
+        trace.down(tid, x, 100)
+    app.clock.advance(80)
+    for tid, x in ((3, 200), (2, 150), (1, 100)):
+        trace.up(tid, x, 100)
+    assert pg.names() == ['middleClick', 'rightClick', 'click']
+
+
+def test_two_finger_drag_scrolls(app, pg, trace):
+    trace.send(('down', 1, 100, 300), ('down', 2, 160, 300))
+    for i in range(1, 9):
+        app.clock.advance(16)
+        trace.send(('move', 1, 100, 300 - 10 * i), ('move', 2, 160, 300 - 10 * i))
+    app.clock.advance(16)
+    trace.send(('up', 1, 100, 220), ('up', 2, 160, 220))
+    scrolls = [args[0] for name, args in pg.log if name == 'scroll']
+    assert scrolls and all(amount > 0 for amount in scrolls)
+    assert pg.count('moveTo') == 0
+    assert 'click' not in pg.names() and 'rightClick' not in pg.names()
+
+
+def _three_finger_swipe(app, trace, dy):
+    trace.send(*[('down', tid, 100 + 50 * tid, 300) for tid in (1, 2, 3)])
+    for i in range(1, 7):
+        app.clock.advance(16)
+        trace.send(*[('move', tid, 100 + 50 * tid, 300 + dy * i) for tid in (1, 2, 3)])
+    trace.send(*[('up', tid, 100 + 50 * tid, 300 + dy * 6) for tid in (1, 2, 3)])
+
+
+def test_three_finger_swipe_up_fires_once(app, pg, trace):
+    _three_finger_swipe(app, trace, -15)
+    assert [args for name, args in pg.log if name == 'action'] == [('swipe_up',)]
+    assert pg.count('scroll') == 0
+
+
+def test_three_finger_swipe_down_fires_once(app, pg, trace):
+    _three_finger_swipe(app, trace, 15)
+    assert [args for name, args in pg.log if name == 'action'] == [('swipe_down',)]
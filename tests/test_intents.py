@@ -0,0 +1,26 @@
+def test_ops_past_the_cap_are_rejected_not_dropped(app, pg):
+    ops = [['m', 1, 0]] * (app.INTENT_MAX_OPS + 6)
+    app.process_intents({'seq': 1, 'ops': ops}, 'test')
+    fs = app.flow_state['test']
+    assert fs['rejected'] == 6
+    assert fs['dropped'] == 0
+    assert fs['received'] == app.INTENT_MAX_OPS
+    ack = app._flow_ack(fs)
+    assert ack['rejected'] == 6 and ack['dropped'] == 0
+
+
+def test_malformed_ops_are_rejected(app, pg):
+    before = app.rejected_messages.get('intent', 0)
+    app.process_intents({'seq': 1, 'ops': [['m', 1, 0], ['x'], ['c', 'left', 3], ['c', 'left']]}, 'test')
+    fs = app.flow_state['test']
+    assert fs['rejected'] == 2 and fs['dropped'] == 0
+    assert app.rejected_messages['intent'] - before == 2
+    assert pg.count('click') == 1
+
+
+def test_bool_seq_is_not_a_sequence_number(app, pg):
+    app.process_intents({'seq': 5, 'ops': [['m', 1, 0]]}, 'test')
+    app.process_intents({'seq': True, 'ops': [['m', 1, 0]]}, 'test')
+    assert app.flow_state['test']['lastSeq'] == 5
+    app.process_intents({'seq': False, 'time': 'soon', 'ops': [['m', 1, 0]]}, 'test')
+    assert app.flow_state['test']['lastSeq'] == 5
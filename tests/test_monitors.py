@@ -0,0 +1,105 @@
+import subprocess
+
+import pytest
+
+LISTING = 'Monitors: 1\n 0: +*HDMI-1 1920/510x1080/290+0+0  HDMI-1\n'
+
+
+@pytest.fixture
+def xrandr(app, monkeypatch):
+    runs = []
+    reply = {'out': LISTING}
+
+    def fake_run(cmd, **kwargs):
+        runs.append(cmd)
+        if isinstance(reply['out'], Exception):
+            raise reply['out']
+        return subprocess.CompletedProcess(cmd, 0, stdout=reply['out'], stderr='')
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+    monkeypatch.setattr(app, 'xrandr_poll', {'rects': None, 'interval': app.MONITOR_REFRESH_S, 'next': 0.0})
+    reply['runs'] = runs
+    return reply
+
+
+def test_xrandr_polling_backs_off_while_unchanged(app, xrandr):
+    assert app._monitors_xrandr_tool() == [(0, 0, 1920, 1080)]
+    intervals = []
+    for _ in range(8):
+        app.clock.advance(app.xrandr_poll['interval'] * 1000)
+        app._monitors_xrandr_tool()
+        intervals.append(app.xrandr_poll['interval'])
+    assert intervals[0] == app.MONITOR_REFRESH_S * 2
+    assert max(intervals) == intervals[-1] == app.MONITOR_XRANDR_MAX_S
+    assert len(xrandr['runs']) == 9
+    # Between polls the cached layout is returned without running xrandr
+    app.clock.advance(1000)
+    app._monitors_xrandr_tool()
+    assert len(xrandr['runs']) == 9
+
+
+def test_xrandr_change_resets_interval(app, xrandr):
+    app._monitors_xrandr_tool()
+    app.clock.advance(2000)
+    app._monitors_xrandr_tool()
+    assert app.xrandr_poll['interval'] == 4.0
+    xrandr['out'] = LISTING + ' 1: +DP-1 1280/340x1024/270+1920+0  DP-1\n'
+    app.clock.advance(4000)
+    assert len(app._monitors_xrandr_tool()) == 2
+    assert app.xrandr_poll['interval'] == app.MONITOR_REFRESH_S
+
+
+def test_display_change_event_rereads_xrandr_at_once(app, xrandr, monkeypatch):
+    for name in ('monitor_layout', 'virtual_left', 'virtual_top', 'screen_width', 'screen_height'):
+        monkeypatch.setattr(app, name, getattr(app, name))
+    monkeypatch.setattr(app.platform, 'system', lambda: 'Linux')
+    monkeypatch.delenv('TRACKPAD_MONITORS', raising=False)
+    monkeypatch.setitem(app.MONITOR_PROVIDERS, 'Linux', app._monitors_xrandr_tool)
+    app._monitors_xrandr_tool()
+    for _ in range(4):
+        app.clock.advance(app.xrandr_poll['interval'] * 1000)
+        app._monitors_xrandr_tool()
+    runs = len(xrandr['runs'])
+    xrandr['out'] = LISTING + ' 1: +DP-1 1280/340x1024/270+1920+0  DP-1\n'
+    app._on_display_change()
+    assert len(xrandr['runs']) == runs + 1
+    assert app.monitor_layout.monitors == [(0, 0, 1920, 1080), (1920, 0, 1280, 1024)]
+    assert app.xrandr_poll['interval'] == app.MONITOR_REFRESH_S
+
+
+def test_xrandr_timeout_keeps_last_layout(app, xrandr):
+    app._monitors_xrandr_tool()
+    xrandr['out'] = subprocess.TimeoutExpired(['xrandr'], app.MONITOR_XRANDR_TIMEOUT_S)
+    app.clock.advance(5000)
+    assert app._monitors_xrandr_tool() == [(0, 0, 1920, 1080)]
+
+
+def test_clamp_keeps_points_on_a_monitor(app):
+    layout = app.MonitorLayout([(0, 0, 1920, 1080), (1920, 200, 1280, 1024)])
+    assert layout.clamp(100, 100) == (100, 100)
+    assert layout.clamp(2000, 1100) == (2000, 1100)
+
+
+def test_clamp_crosses_a_horizontal_gap_to_the_nearest_monitor(app):
+    layout = app.MonitorLayout([(0, 0, 1000, 1000), (2000, 0, 1000, 1000)])
+    assert layout.clamp(1800, 500) == (2000, 500)
+    assert layout.clamp(1200, 500) == (999, 500)
+
+
+def test_clamp_uses_distance_not_strip_order(app):
+    # A point below the short left monitor is closer to the tall right one
+    layout = app.MonitorLayout([(0, 0, 1000, 500), (1000, 0, 1000, 1500)])
+    assert layout.clamp(990, 1400) == (1000, 1400)
+    assert layout.clamp(100, 600) == (100, 499)
+    assert layout.clamp(-50, -50) == (0, 0)
+
+
+def test_corners_follow_the_monitor_rectangles(app):
+    # Right monitor sits lower: the bounding box's top-right corner is off-screen
+    layout = app.MonitorLayout([(0, 0, 1920, 1080), (1920, 200, 1280, 1024)])
+    assert layout.is_corner(0, 0)
+    assert layout.is_corner(3199, 200)
+    assert layout.is_corner(1919, 0)
+    assert layout.is_corner(3199, 1223)
+    assert not layout.is_corner(3199, 0)
+    assert not layout.is_corner(1919, 500)
+    assert not layout.is_corner(1920, 200)
@@ -0,0 +1,70 @@
+def test_corner_stop_does_not_leave_stale_contacts(app, trace):
+    pg = app.pyautogui
+    trace.down(1, 100, 100)
+    trace.drag(1, 100, 100, 40, 0, 4)
+    # The physical mouse parks the cursor in a corner while the finger is down
+    pg._x, pg._y = 0, 0
+    trace.drag(1, 140, 100, 40, 0, 5)
+    assert app.pointer_state['owner'] == 'stopped'
+    app.clock.advance(60)
+    trace.up(1, 180, 100)
+    assert not app.touch_state['test']['touches']
+    assert not app._contacts_down(app.clock.time())
+
+    # Mouse leaves the corner; a one-finger drag moves the cursor again
+    pg._x, pg._y = 500, 500
+    app.clock.advance(60)
+    pg.calls.clear()
+    trace.down(2, 100, 100)
+    trace.drag(2, 100, 100, 60, 0, 6)
+    trace.up(2, 160, 100)
+    assert app.pointer_state['owner'] == 'phone'
+    assert pg.calls.get('moveTo', 0) > 0
+    assert pg.calls.get('scroll', 0) == 0
+
+
+def test_fingers_put_down_during_a_stop_are_forgotten_on_lift(app, trace):
+    pg = app.pyautogui
+    trace.down(1, 100, 100)
+    trace.drag(1, 100, 100, 40, 0, 4)
+    pg._x, pg._y = 0, 0
+    app.clock.advance(60)
+    # The stop starts in the middle of this batch; the second finger's down still lands
+    trace.send(('move', 1, 150, 100), ('down', 2, 300, 300))
+    assert app.pointer_state['owner'] == 'stopped'
+    trace.send(('up', 1, 150, 100), ('up', 2, 300, 300))
+    assert not app.touch_state['test']['touches']
+
+
+def test_blend_picks_up_mouse_motion_between_back_to_back_moves(app, trace):
+    pg = app.pyautogui
+    trace.down(1, 100, 100)
+    trace.drag(1, 100, 100, 20, 0, 2, step_ms=8)
+    # The physical mouse moves between two phone samples 8 ms apart
+    pg._x, pg._y = pg._x + 300, pg._y + 200
+    moved_to = (pg._x, pg._y)
+    external = app.pointer_stats['external']
+    trace.drag(1, 120, 100, 10, 0, 1, step_ms=8)
+    assert app.pointer_stats['external'] == external + 1
+    assert pg._x > moved_to[0] and pg._y == moved_to[1]
+
+
+def test_yield_drops_the_next_move_after_mouse_motion(app, trace, monkeypatch):
+    monkeypatch.setattr(app, 'POINTER_POLICY', 'yield')
+    pg = app.pyautogui
+    trace.down(1, 100, 100)
+    trace.drag(1, 100, 100, 20, 0, 2, step_ms=8)
+    pg._x, pg._y = 700, 300
+    trace.drag(1, 120, 100, 10, 0, 1, step_ms=8)
+    assert app.pointer_state['owner'] == 'mouse'
+    assert (pg._x, pg._y) == (700, 300)
+
+
+def test_corner_stop_uses_monitor_corners(app, trace, monkeypatch):
+    monkeypatch.setattr(app, 'monitor_layout', app.MonitorLayout([(0, 0, 1920, 1080), (1920, 200, 1280, 1024)]))
+    pg = app.pyautogui
+    trace.down(1, 100, 100)
+    trace.drag(1, 100, 100, 20, 0, 2)
+    pg._x, pg._y = 3199, 200
+    trace.drag(1, 120, 100, 20, 0, 2)
+    assert app.pointer_state['owner'] == 'stopped'
@@ -0,0 +1,44 @@
+def ev(etype, tid, x, y, t):
+    return {'type': etype, 'id': tid, 'x': x, 'y': y, 'time': t, 'pointerType': 'touch'}
+
+
+def test_tap_inside_shed_tail_still_clicks(app, pg, monkeypatch):
+    monkeypatch.setattr(app, 'RAW_MAX_BATCH', 1)
+    t = app.clock.now * 1000
+    app.process_raw_events([ev('up', 7, 0, 0, t), ev('down', 1, 100, 100, t + 10), ev('up', 1, 101, 100, t + 80)], 'test')
+    assert pg.names() == ['click']
+    assert app.touch_state['test']['touches'] == {}
+
+
+def test_two_finger_tap_pairs_are_kept_in_order(app):
+    events = [ev('down', 1, 100, 100, 0), ev('down', 2, 140, 100, 5), ev('move', 1, 101, 100, 20),
+              ev('up', 1, 101, 100, 60), ev('up', 2, 140, 100, 70)]
+    out = app._shed_backlog(events, set())
+    assert [(e['type'], e['id']) for e in out] == [('down', 1), ('down', 2), ('move', 1), ('up', 1), ('up', 2)]
+    assert not any(e.get('handoff') for e in out)
+
+
+def test_strokes_and_long_presses_inside_tail_are_shed(app):
+    stroke = [ev('down', 1, 100, 100, 0), ev('move', 1, 160, 100, 30), ev('up', 1, 160, 100, 60)]
+    press = [ev('down', 2, 100, 100, 100), ev('up', 2, 100, 100, 100 + app.TAP_TIMEOUT_MS + 50)]
+    assert app._shed_backlog(stroke + press, set()) == []
+
+
+def test_tap_flood_is_capped_and_charged(app, pg):
+    t = app.clock.now * 1000
+    flood = []
+    for n in range(20000):
+        flood += [ev('down', n, 100, 100, t), ev('up', n, 100, 100, t + 1)]
+    app.process_raw_events(flood, 'test')
+    fs = app.flow_state['test']
+    clicks = pg.count('click') + pg.count('doubleClick')
+    assert clicks <= app.RAW_MAX_BATCH // 2 + app.RAW_SHED_MAX_TAPS
+    assert fs['shed'] >= len(flood) - app.RAW_MAX_BATCH - 2 * app.RAW_SHED_MAX_TAPS
+    assert fs['tokens'] < app.RAW_RATE_BURST - app.RAW_MAX_BATCH
+    assert app.touch_state['test']['touches'] == {}
+
+
+def test_tail_shed_for_time_keeps_no_taps(app):
+    events = [ev('down', 1, 100, 100, 0), ev('up', 1, 100, 100, 50)]
+    assert app._shed_backlog(events, set(), max_taps=0) == []
+    assert len(app._shed_backlog(events * 10, set(), max_taps=1)) == 2
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    for name in app.TUNABLES:
+        monkeypatch.setattr(app, name, getattr(app, name))
+    return app.app.test_client()
+
+
+def test_int_tunable_rejects_fractions(app, client):
+    before = app.RAW_MAX_BATCH
+    resp = client.post('/admin/tuning', json={'RAW_MAX_BATCH': 16.5})
+    assert resp.status_code == 400
+    assert app.RAW_MAX_BATCH == before
+
+
+def test_int_tunable_stays_int(app, client):
+    assert client.post('/admin/tuning', json={'RAW_MAX_BATCH': 16.0}).status_code == 200
+    assert app.RAW_MAX_BATCH == 16 and type(app.RAW_MAX_BATCH) is int
+    assert client.post('/admin/tuning', json={'RAW_MAX_BATCH': 32}).status_code == 200
+    assert type(app.RAW_MAX_BATCH) is int
+    resp = client.post('/raw', json=[{'type': 'down', 'id': 1, 'x': 1, 'y': 1}, {'type': 'up', 'id': 1, 'x': 1, 'y': 1}])
+    assert resp.json['status'] == 'ok'
+
+
+def test_float_tunable_coerced_by_declared_type(app, client):
+    assert client.post('/admin/tuning', json={'SCROLL_MULTIPLIER': 3}).status_code == 200
+    assert type(app.SCROLL_MULTIPLIER) is float
+
+
+@pytest.mark.parametrize('name', ['RAW_RATE_BURST', 'RAW_RATE_EVENTS_PER_S', 'TAP_TIMEOUT_MS', 'MOVE_MULTIPLIER', 'SCROLL_MULTIPLIER'])
+@pytest.mark.parametrize('value', [0, -1])
+def test_out_of_range_rejected(app, client, name, value):
+    before = getattr(app, name)
+    assert client.post('/admin/tuning', json={name: value}).status_code == 400
+    assert getattr(app, name) == before
+
+
+def test_invalid_entry_applies_nothing(app, client):
+    before = (app.ACCEL_CAP, app.RAW_MAX_BATCH)
+    resp = client.post('/admin/tuning', json={'ACCEL_CAP': 4, 'RAW_MAX_BATCH': 0})
+    assert resp.status_code == 400
+    assert (app.ACCEL_CAP, app.RAW_MAX_BATCH) == before
+
+
+def test_bad_tuning_file_is_logged_and_ignored(app, client, monkeypatch, tmp_path, caplog):
+    path = tmp_path / 'tuning.json'
+    path.write_text('{"RAW_MAX_BATCH": -5}')
+    monkeypatch.setattr(app, 'TUNING_FILE', str(path))
+    monkeypatch.setattr(app, 'tuning_state', dict(app.tuning_state, mtime=None))
+    before = app.RAW_MAX_BATCH
+    with caplog.at_level('WARNING', logger=app.log.name):
+        app.check_tuning_file()
+    assert app.RAW_MAX_BATCH == before
+    assert any('Ignoring tuning file' in r.getMessage() for r in caplog.records)
@@ -0,0 +1,155 @@
+"""Trace replay shared by the test suite and record_gesture_baseline.py.
+
+A trace is a list of steps: ['wait', ms] advances the fake clock and
+['send', [[type, id, x, y], ...]] feeds one raw batch through
+process_raw_events. Replaying a trace against a RecordingBackend gives the
+list of injected calls that the baseline file pins.
+"""
+import random
+import time
+
+
+class FakeClock:
+    """Stands in for app's `time` module so traces control time.time()."""
+
+    def __init__(self, now=None):
+        self.now = time.time() if now is None else now
+
+    def time(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000.0
+
+    def __getattr__(self, name):
+        # sleep, monotonic, perf_counter, ... stay real
+        return getattr(time, name)
+
+
+class RecordingBackend:
+    """pyautogui stand-in that keeps a virtual cursor and records every call with its arguments."""
+
+    FAILSAFE = False
+    PAUSE = 0.0
+
+    def __init__(self):
+        self._x, self._y = 960, 540
+        self.log = []
+
+    def size(self):
+        return (1920, 1080)
+
+    def position(self):
+        return (self._x, self._y)
+
+    def moveTo(self, x, y, *args, **kwargs):
+        self._x, self._y = int(x), int(y)
+        self.log.append(('moveTo', (self._x, self._y)))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.log.append((name, args))
+
+    def names(self):
+        return [name for name, _ in self.log if name != 'moveTo']
+
+    def count(self, name):
+        return sum(1 for n, _ in self.log if n == name)
+
+
+def replay(module, clock, steps, sid_key='trace'):
+    seq = 0
+    for kind, arg in steps:
+        if kind == 'wait':
+            clock.advance(arg)
+            continue
+        batch = []
+        for etype, tid, x, y in arg:
+            seq += 1
+            batch.append({'type': etype, 'id': tid, 'x': x, 'y': y, 'seq': seq, 'time': clock.now * 1000, 'pointerType': 'touch'})
+        module.process_raw_events(batch, sid_key)
+
+
+def calls(backend):
+    """The backend log in the JSON form the baseline file stores."""
+    return [[name, list(args)] for name, args in backend.log]
+
+
+def _tap(tid=1, x=100, y=100, hold=80):
+    return [['send', [['down', tid, x, y]]], ['wait', hold], ['send', [['up', tid, x, y]]]]
+
+
+def _drag(fingers, dx, dy, steps, step_ms=16, y0=300):
+    out = [['send', [['down', tid, 100 + 50 * tid, y0] for tid in fingers]]]
+    for i in range(1, steps + 1):
+        out.append(['wait', step_ms])
+        out.append(['send', [['move', tid, 100 + 50 * tid + dx * i, y0 + dy * i] for tid in fingers]])
+    out.append(['send', [['up', tid, 100 + 50 * tid + dx * steps, y0 + dy * steps] for tid in fingers]])
+    return out
+
+
+# Hand-written traces for every gesture the recognizer knows
+SCRIPTED = {
+    'tap': _tap(),
+    'long_press': _tap(hold=260),
+    'one_finger_drag': _drag([1], 10, 5, 6),
+    'double_tap': _tap() + [['wait', 60]] + _tap(tid=2, hold=60),
+    'two_taps_apart': _tap() + [['wait', 400]] + _tap(tid=2),
+    'double_tap_hold_drag': _tap() + [['wait', 60], ['send', [['down', 2, 100, 100]]], ['wait', 170]]
+    + [s for i in range(1, 9) for s in (['wait', 16], ['send', [['move', 2, 100 + 10 * i, 100]]])] + [['send', [['up', 2, 180, 100]]]],
+    'two_finger_tap': [['send', [['down', 1, 100, 100]]], ['send', [['down', 2, 150, 100]]], ['wait', 80],
+                       ['send', [['up', 1, 100, 100]]], ['send', [['up', 2, 150, 100]]]],
+    'three_finger_tap': [['send', [['down', t, 50 + 50 * t, 100]]] for t in (1, 2, 3)] + [['wait', 80]]
+    + [['send', [['up', t, 50 + 50 * t, 100]]] for t in (3, 2, 1)],
+    'two_finger_scroll_up': _drag([1, 2], 0, -10, 8),
+    'two_finger_scroll_down': _drag([1, 2], 0, 12, 8),
+    'two_finger_scroll_sideways': _drag([1, 2], 14, 1, 8),
+    'three_finger_swipe_up': _drag([1, 2, 3], 0, -15, 6),
+    'three_finger_swipe_down': _drag([1, 2, 3], 0, 15, 6),
+    # The second tap slides and lifts before the hold trigger, then a new drag starts
+    'second_tap_slides_then_drag': _tap() + [['wait', 60], ['send', [['down', 2, 100, 100]]], ['wait', 16], ['send', [['move', 2, 130, 100]]],
+                                             ['wait', 16], ['send', [['up', 2, 130, 100]]], ['wait', 600]] + _drag([3], 10, 0, 4),
+}
+
+
+def random_traces(count=150, seed=27):
+    """Seeded random down/move/up traces with up to three fingers."""
+    rng = random.Random(seed)
+    traces = {}
+    for n in range(count):
+        steps = []
+        down = {}
+        next_id = 1
+        for _ in range(rng.randint(8, 40)):
+            r = rng.random()
+            if r < 0.3:
+                steps.append(['wait', rng.choice((5, 16, 16, 40, 90, 150, 250, 400))])
+            elif r < 0.5 and len(down) < 3:
+                pos = [rng.randint(50, 400), rng.randint(50, 600)]
+                down[next_id] = pos
+                steps.append(['send', [['down', next_id, pos[0], pos[1]]]])
+                next_id += 1
+            elif r < 0.85 and down:
+                stride = rng.choice((1, 2, 8, 20))
+                batch = []
+                for tid, pos in down.items():
+                    pos[0] += rng.randint(-stride, stride)
+                    pos[1] += rng.randint(-stride, stride)
+                    batch.append(['move', tid, pos[0], pos[1]])
+                steps.append(['send', batch])
+            elif down:
+                tid = rng.choice(list(down))
+                x, y = down.pop(tid)
+                steps.append(['send', [['up', tid, x, y]]])
+        for tid, (x, y) in down.items():
+            steps.append(['wait', 16])
+            steps.append(['send', [['up', tid, x, y]]])
+        traces[f'random_{n:03d}'] = steps
+    return traces
+
+
+def all_traces():
+    traces = dict(SCRIPTED)
+    traces.update(random_traces())
+    return traces